@@ -188,8 +188,8 @@ async def get_document_binary(
     client: DocumentServiceClient = Depends(get_document_client),
 ) -> Response:
     try:
-        content = await client.get_document_binary(document_id, variant)
-        media_type = "image/png" if variant == "preprocessed" else "application/octet-stream"
+        # Passed-through pages keep the original's JPEG/TIFF encoding, so the type comes from upstream.
+        content, media_type = await client.get_document_binary(document_id, variant)
         return Response(content=content, media_type=media_type)
     except httpx.HTTPStatusError as exc:
         raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text) from exc
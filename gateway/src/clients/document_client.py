@@ -70,10 +70,11 @@ class DocumentServiceClient:
         response.raise_for_status()
         return response.json()
 
-    async def get_document_binary(self, document_id: str, variant: str = "original") -> bytes:
+    async def get_document_binary(self, document_id: str, variant: str = "original") -> tuple[bytes, str]:
+        """The binary and the media type the document service labelled it with."""
         response = await self._client.get(
             f"/internal/documents/{document_id}/binary",
             params={"variant": variant},
         )
         response.raise_for_status()
-        return response.content
+        return response.content, response.headers.get("content-type", "application/octet-stream")
@@ -8,6 +8,43 @@ class Settings:
     broker_service_url: str = os.getenv("BROKER_SERVICE_URL", "http://broker-service:8003")
     document_service_url: str = os.getenv("DOCUMENT_SERVICE_URL", "http://document-service:8002")
     queue_topic: str = os.getenv("QUEUE_TOPIC", "image_preprocess")
+    # Jobs handled at once per process, plus leases held ahead of them; 0 matches the process pool size.
+    consumer_concurrency: int = int(os.getenv("CONSUMER_CONCURRENCY", "0"))
+    prefetch_count: int = int(os.getenv("PREFETCH_COUNT", "2"))
+    claim_wait_seconds: float = float(os.getenv("CLAIM_WAIT_SECONDS", "20"))
+    # 0 disables ack coalescing; otherwise acks are buffered for this long and sent as one batch.
+    ack_batch_window_seconds: float = float(os.getenv("ACK_BATCH_WINDOW_SECONDS", "0"))
+    # Stage names from pipelines.stages, run in order; a job's params.stages overrides them.
+    stages: tuple[str, ...] = tuple(os.getenv("PREPROCESS_STAGES", "grayscale,resize,denoise,sharpen").split(","))
+    # Skip stages the image's statistics say will not help, down to passing a clean original through untouched.
+    adaptive_stages: bool = os.getenv("ADAPTIVE_STAGES", "true").lower() in {"1", "true", "yes"}
+    # raster: uncompressed gray or 1-bit page for OCR, no PNG encode/decode; png: the PNG "preprocessed" variant.
+    handoff_format: str = os.getenv("HANDOFF_FORMAT", "raster")
+    # Prometheus exposition port for stage timings; 0 disables it.
+    metrics_port: int = int(os.getenv("METRICS_PORT", "9102"))
+    # Images are resampled so their text lands at this effective DPI before filtering.
+    target_dpi: int = int(os.getenv("TARGET_DPI", "300"))
+    # Pixel budget after resampling, whatever the estimate; 12 MP fits an A4 page at 300 DPI with margin.
+    max_pixels: int = int(os.getenv("MAX_PIXELS", "12000000"))
+    # Small text is enlarged at most this much.
+    max_upscale: float = float(os.getenv("MAX_UPSCALE", "2.0"))
+    # Processes running preprocess_image; 0 means one per CPU core.
+    process_workers: int = int(os.getenv("PREPROCESS_WORKERS", "0"))
+    # cv2.setNumThreads in each pool process; 1 avoids oversubscription when the pool has a process per core.
+    cv2_threads: int = int(os.getenv("CV2_THREADS", "1"))
+    # Recycle a pool process after this many images to cap memory growth; 0 never recycles.
+    max_tasks_per_child: int = int(os.getenv("PREPROCESS_MAX_TASKS_PER_CHILD", "0"))
+    # After SIGTERM, time for running jobs to finish before their leases are abandoned.
+    drain_timeout_seconds: float = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "60"))
+
+    @property
+    def pool_size(self) -> int:
+        return self.process_workers or os.cpu_count() or 1
+
+    @property
+    def concurrency(self) -> int:
+        # Fewer concurrent jobs than pool processes would leave cores idle.
+        return self.consumer_concurrency or self.pool_size
 
 
 def get_settings() -> Settings:
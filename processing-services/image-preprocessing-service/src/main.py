@@ -3,19 +3,33 @@ from __future__ import annotations
 import asyncio
 import base64
 import logging
+from concurrent.futures import Executor
+from functools import partial
 from typing import Any
 
 import httpx
+from prometheus_client import start_http_server
 
 from shared.utils.broker import AsyncBrokerClient
+from shared.utils.consumer import Consumer, ConsumerConfig
 
 from .core.config import get_settings
-from .pipelines.preprocess import preprocess_image
+from .metrics import record_result
+from .pipelines.executor import create_pool
+from .pipelines.preprocess import PreprocessResult, preprocess_image
+from .pipelines.stages import PreprocessOptions, resolve_stages
 
 logger = logging.getLogger("image-preprocessing-service")
 logging.basicConfig(level=logging.INFO)
 
 settings = get_settings()
+options = PreprocessOptions(
+    target_dpi=settings.target_dpi,
+    max_pixels=settings.max_pixels,
+    max_upscale=settings.max_upscale,
+)
+# Validated at import, so a typo in PREPROCESS_STAGES stops the service instead of failing every job.
+default_stages = resolve_stages(settings.stages)
 
 
 async def fetch_original(client: httpx.AsyncClient, document_id: str) -> bytes:
@@ -27,11 +41,18 @@ async def fetch_original(client: httpx.AsyncClient, document_id: str) -> bytes:
     return response.content
 
 
-async def upload_preprocessed(client: httpx.AsyncClient, document_id: str, data: bytes) -> None:
-    payload = {
-        "variant": "preprocessed",
-        "data_base64": base64.b64encode(data).decode("ascii"),
-    }
+async def upload_preprocessed(
+    client: httpx.AsyncClient,
+    document_id: str,
+    result: PreprocessResult,
+    stats: dict[str, Any],
+) -> None:
+    payload: dict[str, Any] = {"variant": result.variant, "stats": stats}
+    if result.data is None:
+        # Passthrough: the document service copies the original in place, nothing is re-encoded or re-sent.
+        payload["copy_from"] = "original"
+    else:
+        payload["data_base64"] = base64.b64encode(result.data).decode("ascii")
     response = await client.post(f"/api/internal/documents/{document_id}/binary", json=payload)
     response.raise_for_status()
 
@@ -52,51 +73,72 @@ async def mark_failed(client: httpx.AsyncClient, document_id: str, message: str)
     response.raise_for_status()
 
 
-async def process_job(
-    broker: AsyncBrokerClient,
-    doc_client: httpx.AsyncClient,
-    job: dict[str, Any],
-) -> None:
-    item_id = job["id"]
-    payload = job.get("payload", {})
-    document_id = payload.get("document_id")
+async def process_job(doc_client: httpx.AsyncClient, pool: Executor, job: dict[str, Any]) -> None:
+    document_id = job.get("payload", {}).get("document_id")
     if not document_id:
-        logger.error("Job %s missing document_id", item_id)
-        await broker.fail(item_id)
-        return
+        raise ValueError("missing document_id")
+    # Set per job by worker-service pipeline stages, e.g. {"stages": ["grayscale", "deskew"], "adaptive": false}.
+    params = job["payload"].get("params") or {}
 
     try:
+        stages = resolve_stages(params["stages"]) if "stages" in params else default_stages
         logger.info("Processing document %s", document_id)
         try:
             await update_status(doc_client, document_id, "preprocessing")
         except Exception:  # noqa: BLE001
             logger.exception("Failed to mark document %s as preprocessing", document_id)
         original_bytes = await fetch_original(doc_client, document_id)
-        processed_bytes = preprocess_image(original_bytes)
-        await upload_preprocessed(doc_client, document_id, processed_bytes)
-        await broker.ack(item_id)
-        logger.info("Document %s preprocessed", document_id)
+        # The loop keeps fetching, uploading and claiming for other jobs while a pool process does the CPU work.
+        result = await asyncio.get_running_loop().run_in_executor(
+            pool,
+            partial(
+                preprocess_image,
+                original_bytes,
+                stages=stages,
+                options=options,
+                adaptive=params.get("adaptive", settings.adaptive_stages),
+                handoff=settings.handoff_format,
+            ),
+        )
+        record_result(result)
+        stats = {
+            "variant": result.variant,
+            "stages": list(result.stages),
+            "skipped": list(result.skipped),
+            "passthrough": result.data is None,
+            "analysis": result.analysis,
+            "timings_ms": {name: round(seconds * 1000, 2) for name, seconds in result.timings.items()},
+        }
+        await upload_preprocessed(doc_client, document_id, result, stats)
+        logger.info("Document %s preprocessed: %s", document_id, stats)
     except Exception as exc:  # noqa: BLE001
-        logger.exception("Failed to preprocess document %s", document_id)
-        await broker.fail(item_id)
         try:
             await mark_failed(doc_client, document_id, str(exc))
         except Exception:  # noqa: BLE001
             logger.exception("Failed to mark document %s as failed", document_id)
+        raise
 
 
 async def run_worker() -> None:
-    broker = AsyncBrokerClient(settings.broker_service_url)
-    async with httpx.AsyncClient(base_url=settings.document_service_url, timeout=20.0) as doc_client:
-        try:
-            while True:
-                job = await broker.claim(settings.queue_topic)
-                if job is None:
-                    await asyncio.sleep(1.0)
-                    continue
-                await process_job(broker, doc_client, job)
-        finally:
-            await broker.close()
+    broker = AsyncBrokerClient(
+        settings.broker_service_url,
+        ack_batch_window_seconds=settings.ack_batch_window_seconds or None,
+    )
+    config = ConsumerConfig(
+        topic=settings.queue_topic,
+        concurrency=settings.concurrency,
+        prefetch=settings.prefetch_count,
+        claim_wait_seconds=settings.claim_wait_seconds,
+        drain_timeout_seconds=settings.drain_timeout_seconds,
+    )
+    if settings.metrics_port:
+        start_http_server(settings.metrics_port)
+    with create_pool(settings) as pool:
+        async with httpx.AsyncClient(base_url=settings.document_service_url, timeout=20.0) as doc_client:
+            try:
+                await Consumer(broker, lambda job: process_job(doc_client, pool, job), config).run()
+            finally:
+                await broker.close()
 
 
 def main() -> None:
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from prometheus_client import Counter, Histogram
+
+from .pipelines.preprocess import PreprocessResult
+
+# From a few milliseconds for a small grayscale pass to seconds for a full-resolution PNG encode.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+STAGE_SECONDS = Histogram(
+    "preprocess_stage_seconds",
+    "Wall time of one preprocessing stage per image, including decode and encode.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+IMAGES = Counter("preprocess_images_total", "Images preprocessed.")
+SKIPPED = Counter(
+    "preprocess_stages_skipped_total",
+    "Configured stages left out because the image did not need them.",
+    ["stage"],
+)
+PASSTHROUGH = Counter("preprocess_passthrough_total", "Images handed to OCR as uploaded, without re-encoding.")
+
+
+def record_result(result: PreprocessResult) -> None:
+    IMAGES.inc()
+    for stage, seconds in result.timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+    for stage in result.skipped:
+        SKIPPED.labels(stage).inc()
+    if result.data is None:
+        PASSTHROUGH.inc()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from ..core.config import Settings
+
+
+def _init_worker(cv2_threads: int) -> None:
+    # One busy process per core already saturates the machine; OpenCV's own pool would only oversubscribe it.
+    cv2.setNumThreads(cv2_threads)
+
+
+def create_pool(settings: Settings) -> ProcessPoolExecutor:
+    """Process pool that runs ``preprocess_image`` next to the event loop instead of on it."""
+    return ProcessPoolExecutor(
+        max_workers=settings.pool_size,
+        # Spawned, not forked: the parent runs an event loop and HTTP client threads.
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(settings.cv2_threads,),
+        max_tasks_per_child=settings.max_tasks_per_child or None,
+    )
@@ -1,19 +1,149 @@
+from __future__ import annotations
+
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
 import cv2
 import numpy as np
+from PIL import Image
 
+from shared.utils import raster
 
-def preprocess_image(image_bytes: bytes) -> bytes:
-    np_array = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
+from .stages import DEFAULT_STAGES, STAGES, ImageAnalysis, PreprocessOptions, plan_stages
+
+# PIL only reads headers here, to size the decode; the pixels are decoded by OpenCV.
+Image.MAX_IMAGE_PIXELS = None
+
+# PIL modes of single-channel sources, which decode straight to grayscale.
+_GRAY_MODES = frozenset({"1", "L", "LA", "I", "I;16"})
+_REDUCED_GRAY = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+_REDUCED_COLOR = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+# Formats OCR reads directly; a gray page in one of them that needs no stage is handed over as is.
+PASSTHROUGH_FORMATS = frozenset({"PNG", "JPEG", "TIFF"})
+PASSTHROUGH_MODES = frozenset({"L", "1"})
+
+
+@dataclass(frozen=True)
+class PreprocessResult:
+    # None means passthrough: the original is already fit for OCR and was not re-encoded.
+    data: Optional[bytes]
+    # Document variant ``data`` is stored as: "raster" (shared.utils.raster) or "preprocessed" (PNG).
+    variant: str
+    stages: tuple[str, ...]
+    skipped: tuple[str, ...]
+    # Wall time of every step in seconds, under its stage name plus decode, analyze and encode.
+    timings: dict[str, float]
+    analysis: dict[str, Any] = field(default_factory=dict)
+
+
+def preprocess_image(
+    image_bytes: bytes,
+    *,
+    stages: tuple[str, ...] = DEFAULT_STAGES,
+    options: PreprocessOptions = PreprocessOptions(),
+    adaptive: bool = True,
+    handoff: str = "raster",
+) -> PreprocessResult:
+    """Run ``stages`` in order and hand the result over as ``handoff``.
+
+    With ``adaptive``, stages whose skip rule matches the page's statistics are left
+    out. A "raster" handoff is stored uncompressed, so neither side spends time on
+    PNG; color results, which rasters do not carry, are PNG-encoded either way.
+    Input OpenCV cannot decode comes back unchanged, as ``data``.
+    """
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    header = _read_header(image_bytes)
+    # A leading grayscale stage, or a single-channel source, decodes straight to grayscale, which is cheaper.
+    gray = stages[:1] == ("grayscale",) or (header is not None and header.mode in _GRAY_MODES)
+    image = _decode(image_bytes, header, options.max_pixels, gray=gray)
+    timings["decode"] = time.perf_counter() - started
     if image is None:
-        return image_bytes
+        return PreprocessResult(data=image_bytes, variant="preprocessed", stages=(), skipped=(), timings=timings)
+
+    analysis = ImageAnalysis(image, options)
+    skipped: tuple[str, ...] = ()
+    if adaptive:
+        started = time.perf_counter()
+        stages, skipped = plan_stages(stages, analysis)
+        timings["analyze"] = time.perf_counter() - started
+        if not stages and _passthrough_ok(header, image):
+            return PreprocessResult(
+                data=None,
+                variant="preprocessed",
+                stages=(),
+                skipped=skipped,
+                timings=timings,
+                analysis=analysis.summary(),
+            )
+
+    for name in stages:
+        started = time.perf_counter()
+        image = STAGES[name](image, options, analysis)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+    started = time.perf_counter()
+    if handoff == "raster" and image.ndim == 2:
+        data, variant = raster.encode(image), "raster"
+    else:
+        success, encoded = cv2.imencode(".png", image)
+        data, variant = (encoded.tobytes() if success else image_bytes), "preprocessed"
+    timings["encode"] = time.perf_counter() - started
+    return PreprocessResult(
+        data=data,
+        variant=variant,
+        stages=stages,
+        skipped=skipped,
+        timings=timings,
+        analysis=analysis.summary(),
+    )
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-    sharpen_kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-    sharpened = cv2.filter2D(blurred, -1, sharpen_kernel)
 
-    success, encoded = cv2.imencode(".png", sharpened)
-    if not success:
-        return image_bytes
-    return encoded.tobytes()
+def _passthrough_ok(header: Optional[Image.Image], image: np.ndarray) -> bool:
+    # A color file decoded as gray would go out in color; a reduced decode means the original
+    # is over the pixel budget, however clean it looks.
+    return (
+        header is not None
+        and header.format in PASSTHROUGH_FORMATS
+        and header.mode in PASSTHROUGH_MODES
+        and header.size == image.shape[1::-1]
+    )
+
+
+def _read_header(image_bytes: bytes) -> Optional[Image.Image]:
+    try:
+        # Lazy: only the header is parsed.
+        return Image.open(io.BytesIO(image_bytes))
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def _decode(
+    image_bytes: bytes,
+    header: Optional[Image.Image],
+    max_pixels: int,
+    *,
+    gray: bool,
+) -> Optional[np.ndarray]:
+    """Decode, letting the codec downscale by 2/4/8 when the image is far over budget."""
+    np_array = np.frombuffer(image_bytes, dtype=np.uint8)
+    flags = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+    width, height = header.size if header is not None else (0, 0)
+    for factor, reduced in _REDUCED_GRAY if gray else _REDUCED_COLOR:
+        # Never below the budget: the exact fit is left to the resize stage.
+        if (width // factor) * (height // factor) >= max_pixels:
+            flags = reduced
+            break
+    return cv2.imdecode(np_array, flags)
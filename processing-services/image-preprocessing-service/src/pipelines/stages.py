@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+# Median glyph height of 10pt body text, in points (about its x-height); what "typical" text measures at any DPI.
+TEXT_HEIGHT_POINTS = 5.0
+# Long side of the copies text height and skew are measured on.
+ESTIMATE_SIDE = 1024
+# Resampling within this much of 1.0 is skipped; it costs a pass and gains nothing.
+SCALE_TOLERANCE = 0.1
+# Deskew searches this many degrees either way, coarse in whole degrees and then in tenths.
+MAX_SKEW_DEGREES = 5
+# Smaller corrections are within the estimate's own error.
+MIN_SKEW_DEGREES = 0.2
+# Side of the full-resolution center crop noise is measured on; downsampling would average noise away.
+SAMPLE_SIDE = 512
+# Below this estimated noise sigma (in gray levels) blurring only softens glyph edges.
+NOISE_SIGMA_SKIP = 2.5
+# Share of sampled pixels within 32 levels of black or white above which a page counts as already bilevel.
+BILEVEL_FRACTION = 0.97
+# ... provided ink and paper are this far apart; a faint page on pale paper also sits near white.
+BILEVEL_MIN_CONTRAST = 128
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    # Text is resampled to land at this effective DPI.
+    target_dpi: int = 300
+    # Pixel budget after resampling, whatever the estimate.
+    max_pixels: int = 12_000_000
+    # Small text is enlarged at most this much.
+    max_upscale: float = 2.0
+
+
+class ImageAnalysis:
+    """Cheap statistics of one decoded page, each computed on first use and shared by planning and stages."""
+
+    def __init__(self, image: np.ndarray, options: PreprocessOptions) -> None:
+        self._image = image
+        self._options = options
+
+    @property
+    def channels(self) -> int:
+        return 1 if self._image.ndim == 2 else self._image.shape[2]
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        return _gray(self._image)
+
+    @cached_property
+    def _sample(self) -> np.ndarray:
+        height, width = self.gray.shape[:2]
+        top, left = max(0, (height - SAMPLE_SIDE) // 2), max(0, (width - SAMPLE_SIDE) // 2)
+        return self.gray[top : top + SAMPLE_SIDE, left : left + SAMPLE_SIDE]
+
+    @cached_property
+    def _levels(self) -> np.ndarray:
+        """About SAMPLE_SIDE² pixels strided across the whole page, for ink and paper levels.
+
+        Unlike the center crop, it still sees ink when the text sits in a margin column.
+        """
+        height, width = self.gray.shape[:2]
+        step = max(1, math.isqrt(height * width // (SAMPLE_SIDE * SAMPLE_SIDE)))
+        return np.ascontiguousarray(self.gray[::step, ::step])
+
+    @cached_property
+    def contrast(self) -> float:
+        """Gap between the mean ink and mean paper gray level, split by Otsu's threshold.
+
+        Class means rather than percentiles: on a clean page ink is a few percent of the
+        pixels, and any fixed percentile lands on paper.
+        """
+        sample = self._levels
+        threshold, _ = cv2.threshold(sample, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        dark = sample <= threshold
+        if dark.all() or not dark.any():
+            return 0.0
+        return float(sample[~dark].mean() - sample[dark].mean())
+
+    @cached_property
+    def bilevel(self) -> float:
+        """Share of pixels that are already (near) pure black or white."""
+        sample = self._levels
+        return float(np.count_nonzero((sample <= 32) | (sample >= 223)) / max(1, sample.size))
+
+    @cached_property
+    def noise(self) -> float:
+        """Gaussian noise sigma after Immerkaer (1996), leaving out the strongest edges so glyphs do not count as noise."""
+        sample = self._sample.astype(np.float32)
+        if min(sample.shape) < 3:
+            return 0.0
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = np.abs(cv2.filter2D(sample, -1, kernel))[1:-1, 1:-1]
+        gradient = (np.abs(cv2.Sobel(sample, -1, 1, 0)) + np.abs(cv2.Sobel(sample, -1, 0, 1)))[1:-1, 1:-1]
+        flat = response[gradient <= np.percentile(gradient, 90)]
+        return float(flat.mean() * math.sqrt(math.pi / 2) / 6) if flat.size else 0.0
+
+    @cached_property
+    def dpi(self) -> Optional[float]:
+        return estimate_dpi(self.gray)
+
+    @cached_property
+    def skew(self) -> float:
+        return estimate_skew(self.gray)
+
+    @property
+    def resize_scale(self) -> float:
+        height, width = self._image.shape[:2]
+        options = self._options
+        scale = options.target_dpi / self.dpi if self.dpi else 1.0
+        scale = min(scale, options.max_upscale, math.sqrt(options.max_pixels / (height * width)))
+        return 1.0 if abs(scale - 1.0) < SCALE_TOLERANCE else scale
+
+    def summary(self) -> dict[str, Any]:
+        """The statistics computed so far, rounded for job metadata."""
+        summary: dict[str, Any] = {"channels": self.channels}
+        for name in ("contrast", "bilevel", "noise", "dpi", "skew"):
+            value = self.__dict__.get(name)
+            if value is not None:
+                summary[name] = round(value, 3)
+        return summary
+
+
+Stage = Callable[[np.ndarray, PreprocessOptions, ImageAnalysis], np.ndarray]
+# Whether a stage would change the page noticeably; stages without one always run.
+SkipRule = Callable[[ImageAnalysis], bool]
+
+STAGES: dict[str, Stage] = {}
+SKIP_RULES: dict[str, SkipRule] = {}
+# grayscale -> resize -> denoise -> sharpen is what the service did before stages were configurable.
+DEFAULT_STAGES = ("grayscale", "resize", "denoise", "sharpen")
+
+
+def register(name: str, *, skip_if: Optional[SkipRule] = None) -> Callable[[Stage], Stage]:
+    def decorator(stage: Stage) -> Stage:
+        STAGES[name] = stage
+        if skip_if is not None:
+            SKIP_RULES[name] = skip_if
+        return stage
+
+    return decorator
+
+
+def resolve_stages(names: Iterable[str]) -> tuple[str, ...]:
+    stages = tuple(name.strip() for name in names if name.strip())
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"unknown preprocessing stages {unknown}; known: {sorted(STAGES)}")
+    return stages
+
+
+def plan_stages(stages: tuple[str, ...], analysis: ImageAnalysis) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Split ``stages`` into those worth running on this page and those its statistics say to skip."""
+    run: list[str] = []
+    skipped: list[str] = []
+    for name in stages:
+        rule = SKIP_RULES.get(name)
+        (skipped if rule is not None and rule(analysis) else run).append(name)
+    return tuple(run), tuple(skipped)
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _estimate_copy(gray: np.ndarray) -> tuple[np.ndarray, float]:
+    """Otsu-binarized copy (text white) with a long side of at most ESTIMATE_SIDE, and its scale."""
+    factor = min(1.0, ESTIMATE_SIDE / max(gray.shape[:2]))
+    small = gray if factor == 1.0 else cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return binary, factor
+
+
+def _rotate(image: np.ndarray, angle: float, *, interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), flags=interpolation, borderMode=cv2.BORDER_REPLICATE)
+
+
+def estimate_dpi(image: np.ndarray) -> Optional[float]:
+    """Effective DPI from the median height of glyph-sized connected components; None without text."""
+    binary, factor = _estimate_copy(_gray(image))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:count, cv2.CC_STAT_WIDTH]
+    # Drop specks, rules, blocks and page borders; what is left is mostly characters.
+    glyphs = heights[(heights >= 3) & (heights <= binary.shape[0] // 10) & (widths <= heights * 4)]
+    if glyphs.size < 20:
+        return None
+    text_height = float(np.median(glyphs)) / factor
+    return text_height * 72.0 / TEXT_HEIGHT_POINTS
+
+
+def estimate_skew(image: np.ndarray) -> float:
+    """Rotation in degrees that makes text lines horizontal, by maximizing row-profile contrast."""
+    binary, _ = _estimate_copy(_gray(image))
+
+    def score(angle: float) -> float:
+        rows = _rotate(binary, angle, interpolation=cv2.INTER_NEAREST).sum(axis=1, dtype=np.float64)
+        return float(np.square(np.diff(rows)).sum())
+
+    best = max(range(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 1), key=score)
+    return max((best + tenth / 10 for tenth in range(-9, 10)), key=score)
+
+
+def _is_bilevel(analysis: ImageAnalysis) -> bool:
+    return analysis.bilevel >= BILEVEL_FRACTION and analysis.contrast >= BILEVEL_MIN_CONTRAST
+
+
+@register("grayscale", skip_if=lambda analysis: analysis.channels == 1)
+def grayscale(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    return _gray(image)
+
+
+@register("resize", skip_if=lambda analysis: analysis.resize_scale == 1.0)
+def resize(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    """Resample so text lands at ``target_dpi``, within ``max_pixels`` and ``max_upscale``."""
+    scale = analysis.resize_scale
+    if scale == 1.0:
+        return image
+    height, width = image.shape[:2]
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+@register("deskew", skip_if=lambda analysis: abs(analysis.skew) < MIN_SKEW_DEGREES)
+def deskew(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    # The angle survives resampling, so the estimate from the decoded page still applies.
+    if abs(analysis.skew) < MIN_SKEW_DEGREES:
+        return image
+    return _rotate(image, analysis.skew, interpolation=cv2.INTER_CUBIC)
+
+
+@register("denoise", skip_if=lambda analysis: _is_bilevel(analysis) or analysis.noise < NOISE_SIGMA_SKIP)
+def denoise(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    return cv2.GaussianBlur(image, (3, 3), 0)
+
+
+@register("binarize", skip_if=_is_bilevel)
+def binarize(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    # Adaptive rather than global, so shadows and uneven phone lighting do not swallow text.
+    return cv2.adaptiveThreshold(_gray(image), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+
+
+# On a clean black-and-white page sharpening only adds ringing around glyphs.
+@register("sharpen", skip_if=_is_bilevel)
+def sharpen(image: np.ndarray, options: PreprocessOptions, analysis: ImageAnalysis) -> np.ndarray:
+    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+    return cv2.filter2D(image, -1, kernel)
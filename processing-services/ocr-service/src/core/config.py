@@ -8,6 +8,15 @@ class Settings:
     broker_service_url: str = os.getenv("BROKER_SERVICE_URL", "http://broker-service:8003")
     document_service_url: str = os.getenv("DOCUMENT_SERVICE_URL", "http://document-service:8002")
     queue_topic: str = os.getenv("QUEUE_TOPIC", "ocr_extract")
+    # Jobs handled at once per process, plus leases held ahead of them.
+    concurrency: int = int(os.getenv("CONSUMER_CONCURRENCY", "2"))
+    prefetch_count: int = int(os.getenv("PREFETCH_COUNT", "1"))
+    claim_wait_seconds: float = float(os.getenv("CLAIM_WAIT_SECONDS", "20"))
+    # 0 disables ack coalescing; otherwise acks are buffered for this long and sent as one batch.
+    ack_batch_window_seconds: float = float(os.getenv("ACK_BATCH_WINDOW_SECONDS", "0"))
+    # After SIGTERM, time for running jobs to finish before their leases are abandoned.
+    drain_timeout_seconds: float = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "60"))
+    lease_heartbeat_seconds: float = float(os.getenv("LEASE_HEARTBEAT_SECONDS", "20"))
     # Tesseract configurare
     tesseract_lang: str = os.getenv("TESSERACT_LANG", "eng")
     tesseract_psm: str = os.getenv("TESSERACT_PSM", "6")  # Page segmentation mode
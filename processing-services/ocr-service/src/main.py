@@ -7,6 +7,7 @@ from typing import Any
 import httpx
 
 from shared.utils.broker import AsyncBrokerClient
+from shared.utils.consumer import Consumer, ConsumerConfig
 
 from .core.config import get_settings
 from .pipelines.ocr import run_ocr
@@ -17,10 +18,14 @@ logging.basicConfig(level=logging.INFO)
 settings = get_settings()
 
 
-async def fetch_preprocessed(client: httpx.AsyncClient, document_id: str) -> bytes:
+# The uncompressed raster when preprocessing left one, else the PNG.
+PREPROCESSED_VARIANTS = ["raster", "preprocessed"]
+
+
+async def fetch_image(client: httpx.AsyncClient, document_id: str, variants: list[str]) -> bytes:
     response = await client.get(
         f"/api/internal/documents/{document_id}/binary",
-        params={"variant": "preprocessed"},
+        params={"variant": variants},
     )
     response.raise_for_status()
     return response.content
@@ -50,18 +55,12 @@ async def mark_failed(client: httpx.AsyncClient, document_id: str, message: str)
     response.raise_for_status()
 
 
-async def process_job(
-    broker: AsyncBrokerClient,
-    doc_client: httpx.AsyncClient,
-    job: dict[str, Any],
-) -> None:
-    item_id = job["id"]
-    payload = job.get("payload", {})
-    document_id = payload.get("document_id")
+async def process_job(doc_client: httpx.AsyncClient, job: dict[str, Any]) -> None:
+    document_id = job.get("payload", {}).get("document_id")
     if not document_id:
-        logger.error("Job %s missing document_id", item_id)
-        await broker.fail(item_id)
-        return
+        raise ValueError("missing document_id")
+    # Set by worker-service pipeline stages, e.g. {"variant": "original"} to skip preprocessing.
+    params = job["payload"].get("params") or {}
 
     try:
         logger.info("Running OCR for document %s", document_id)
@@ -69,30 +68,36 @@ async def process_job(
             await update_status(doc_client, document_id, "ocr")
         except Exception:  # noqa: BLE001
             logger.exception("Failed to mark document %s as OCR in-progress", document_id)
-        image_bytes = await fetch_preprocessed(doc_client, document_id)
-        text = run_ocr(image_bytes)
+        variants = [params["variant"]] if "variant" in params else PREPROCESSED_VARIANTS
+        image_bytes = await fetch_image(doc_client, document_id, variants)
+        # Tesseract runs in a thread so other jobs and the lease heartbeat keep going during long pages.
+        text = await asyncio.to_thread(run_ocr, image_bytes, lang=params.get("lang"))
         await upload_ocr_text(doc_client, document_id, text)
-        await broker.ack(item_id)
         logger.info("Document %s OCR completed", document_id)
     except Exception as exc:  # noqa: BLE001
-        logger.exception("Failed to run OCR for document %s", document_id)
-        await broker.fail(item_id)
         try:
             await mark_failed(doc_client, document_id, str(exc))
         except Exception:  # noqa: BLE001
             logger.exception("Failed to mark document %s as failed", document_id)
+        raise
 
 
 async def run_worker() -> None:
-    broker = AsyncBrokerClient(settings.broker_service_url)
+    broker = AsyncBrokerClient(
+        settings.broker_service_url,
+        ack_batch_window_seconds=settings.ack_batch_window_seconds or None,
+    )
+    config = ConsumerConfig(
+        topic=settings.queue_topic,
+        concurrency=settings.concurrency,
+        prefetch=settings.prefetch_count,
+        claim_wait_seconds=settings.claim_wait_seconds,
+        heartbeat_seconds=settings.lease_heartbeat_seconds,
+        drain_timeout_seconds=settings.drain_timeout_seconds,
+    )
     async with httpx.AsyncClient(base_url=settings.document_service_url, timeout=60.0) as doc_client:
         try:
-            while True:
-                job = await broker.claim(settings.queue_topic)
-                if job is None:
-                    await asyncio.sleep(1.0)
-                    continue
-                await process_job(broker, doc_client, job)
+            await Consumer(broker, lambda job: process_job(doc_client, job), config).run()
         finally:
             await broker.close()
 
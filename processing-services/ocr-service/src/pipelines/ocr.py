@@ -1,22 +1,29 @@
 from __future__ import annotations
 
 import io
+from typing import Optional
+
 from PIL import Image
 import pytesseract
 import cv2
 import numpy as np
 
+from shared.utils import raster
+
 from ..core.config import get_settings
 
 settings = get_settings()
 
 
-def run_ocr(image_bytes: bytes) -> str:
+def run_ocr(image_bytes: bytes, *, lang: Optional[str] = None) -> str:
     """
     Extrage text din imagine folosind Tesseract OCR.
     Tesseract este optimizat pentru limba engleză și oferă rezultate excelente
     pentru text tipărit.
     """
+    if raster.is_raster(image_bytes):
+        return _tesseract(_raster_image(image_bytes), lang)
+
     # Convertim bytes la numpy array pentru OpenCV
     np_array = np.frombuffer(image_bytes, dtype=np.uint8)
     image = cv2.imdecode(np_array, cv2.IMREAD_GRAYSCALE)
@@ -30,12 +37,24 @@ def run_ocr(image_bytes: bytes) -> str:
         # Convertim numpy array la PIL Image pentru pytesseract
         image = Image.fromarray(image)
     
+    return _tesseract(image, lang)
+
+
+def _raster_image(image_bytes: bytes) -> Image.Image:
+    # Pixels stay in the fetched buffer; pytesseract writes its temp file in ``format``, and
+    # PIL's PPM writer stores L/1 pages as uncompressed PGM/PBM instead of PNG-encoding them.
+    image = raster.to_image(image_bytes)
+    image.format = "PPM"
+    return image
+
+
+def _tesseract(image: Image.Image, lang: Optional[str]) -> str:
     # Configurare Tesseract pentru limba engleză
     # --psm 6: Assume a single uniform block of text
     # --oem 3: Default, based on what is available (LSTM + Legacy)
     custom_config = r'--oem 3 --psm 6'
     
     # Extrage textul
-    text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
+    text = pytesseract.image_to_string(image, lang=lang or settings.tesseract_lang, config=custom_config)
     
     return text.strip()
@@ -0,0 +1,96 @@
+"""Compare enqueue and claim+ack throughput across the queue backends.
+
+Run from the broker-service directory:
+
+    python -m benchmarks.backend_throughput --backend memory --backend sqlite
+    python -m benchmarks.backend_throughput --backend postgres --messages 50000
+
+``memory`` and ``sqlite`` need nothing but the standard library; ``postgres`` uses
+POSTGRES_DSN like the service does. Every backend goes through the same
+``QueueBackend`` calls the HTTP handlers make, so the numbers isolate the engine
+from the HTTP layer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from src.core.config import get_settings
+from src.queue.backends import QueueBackend, create_backend
+from src.queue.policy import DEFAULT_RETRY_POLICY
+from src.queue.topics import TopicPolicy
+
+settings = get_settings()
+
+BACKENDS = ("memory", "sqlite", "postgres")
+
+
+async def enqueue(backend: QueueBackend, topic: str, messages: int, batch_size: int) -> float:
+    payload = json.dumps({"document_id": "bench", "owner_id": "bench"})
+    started = time.perf_counter()
+    for offset in range(0, messages, batch_size):
+        await backend.enqueue_many(topic, [payload] * min(batch_size, messages - offset))
+    return time.perf_counter() - started
+
+
+async def drain(backend: QueueBackend, topic: str, workers: int, batch_size: int) -> tuple[int, float]:
+    policy = TopicPolicy(name=topic, retry=DEFAULT_RETRY_POLICY)
+
+    async def worker() -> int:
+        processed = 0
+        while items := await backend.claim_many(topic, max_items=batch_size, policy=policy):
+            processed += len(await backend.ack_many([item.id for item in items]))
+        return processed
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(worker() for _ in range(workers)))
+    return sum(counts), time.perf_counter() - started
+
+
+async def run_backend(name: str, args: argparse.Namespace, workdir: Path) -> None:
+    config = replace(settings, queue_backend=name, sqlite_path=workdir / "broker.sqlite3")
+    backend = create_backend(config)
+    await backend.start()
+    try:
+        for batch_size in args.batch_size:
+            topic = f"bench_backend_{batch_size}"
+            elapsed = await enqueue(backend, topic, args.messages, batch_size)
+            processed, drained = await drain(backend, topic, args.workers, batch_size)
+            print(
+                f"{name:>8} batch={batch_size:<4}"
+                f" enqueue {args.messages / elapsed:>9.0f} msg/s"
+                f"  claim+ack {processed / drained:>9.0f} msg/s"
+            )
+    finally:
+        await backend.stop()
+        if name == "postgres":
+            from src.db.session import engine
+
+            await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.backend or BACKENDS[:2]:
+            await run_backend(name, args, Path(workdir))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="repeat to compare; default memory+sqlite")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, action="append", help="repeatable; default 1 and 50")
+    args = parser.parse_args()
+    args.batch_size = args.batch_size or [1, 50]
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
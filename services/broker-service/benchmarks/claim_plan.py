@@ -0,0 +1,159 @@
+"""Check that the claim query stays an index scan on a large, retry-heavy backlog.
+
+Run from the broker-service directory against a migrated database:
+
+    python -m benchmarks.claim_plan --rows 1000000
+
+Seeds ``--rows`` items spread over several topics, a share of them delayed for
+retry and a share in flight, runs ANALYZE, then EXPLAINs the exact statement
+``manager.claim_many`` executes. Exits non-zero if the plan reads queue_items with
+anything but an index scan on ``ix_queue_items_claim``.
+
+When queue_items is partitioned the bench topics get partitions of their own (dropped
+again unless ``--keep``), and the plan must touch only the claimed topic's partition.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Iterator
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects import postgresql
+
+from src.core.config import get_settings
+from src.db import partitions
+from src.db.models import QueueItem
+from src.db.session import engine
+from src.queue import manager
+
+settings = get_settings()
+
+CLAIM_INDEX = "ix_queue_items_claim"
+TOPIC_PREFIX = "bench_plan_"
+
+SEED_SQL = text(
+    """
+    INSERT INTO broker.queue_items
+        (id, topic, payload, status, attempts, available_at, claimed_until, created_at, updated_at)
+    SELECT
+        gen_random_uuid(),
+        :prefix || (g % :topics),
+        '{"document_id": "bench", "owner_id": "bench"}',
+        CASE WHEN g % 10 = 0 THEN 'processing' ELSE 'pending' END,
+        CASE WHEN (g / :topics) % 3 = 0 THEN 2 ELSE 0 END,
+        -- every third row of each topic is waiting out a retry backoff; g alone cycles in step with the topic
+        CASE WHEN (g / :topics) % 3 = 0 THEN now() + interval '1 hour' ELSE now() END,
+        CASE WHEN g % 10 = 0 THEN now() + interval '2 minutes' END,
+        now() - g * interval '1 millisecond',
+        now()
+    FROM generate_series(1, :rows) AS g
+    """
+)
+
+
+CLAIM_INDEX_SQL = text(
+    """
+    SELECT CAST(:index AS text) UNION ALL
+    SELECT CAST(c.relname AS text)
+    FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass('broker.' || CAST(:index AS text))
+    """
+)
+
+
+def iter_plan_nodes(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+async def explain_claim(topic: str, max_items: int) -> dict[str, Any]:
+    stmt = manager.build_claim_statement(
+        topic,
+        max_items=max_items,
+        visibility_timeout_seconds=settings.visibility_timeout_seconds,
+        max_concurrency=None,
+        now=datetime.utcnow(),
+    )
+    compiled = stmt.compile(dialect=postgresql.asyncpg.dialect())
+    params = [compiled.params[name] for name in compiled.positiontup]
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        plan = await raw.driver_connection.fetchval(f"EXPLAIN (FORMAT JSON) {compiled}", *params)
+    # SQLAlchemy registers a json codec on its asyncpg connections, so the plan usually arrives decoded.
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def drop_bench_partitions(names: list[str]) -> None:
+    async with engine.begin() as connection:
+        for name in names:
+            await connection.execute(text(f"DROP TABLE IF EXISTS {partitions.SCHEMA}.{name}"))
+
+
+async def run(rows: int, topics: int, max_items: int, keep: bool) -> int:
+    bench_topics = [f"{TOPIC_PREFIX}{n}" for n in range(topics)]
+    async with engine.begin() as connection:
+        await connection.execute(delete(QueueItem).where(QueueItem.topic.startswith(TOPIC_PREFIX)))
+        await connection.run_sync(partitions.ensure_partitions, {topic: {} for topic in bench_topics})
+        claim_indexes = set((await connection.execute(CLAIM_INDEX_SQL, {"index": CLAIM_INDEX})).scalars())
+        started = time.perf_counter()
+        await connection.execute(SEED_SQL, {"prefix": TOPIC_PREFIX, "topics": topics, "rows": rows})
+        print(f"seeded {rows} rows over {topics} topics in {time.perf_counter() - started:.1f}s")
+    async with engine.begin() as connection:
+        await connection.execute(text("ANALYZE broker.queue_items"))
+
+    plan = await explain_claim(bench_topics[0], max_items)
+    print(json.dumps(plan, indent=2))
+
+    # ModifyTable is the UPDATE itself; every read of queue_items below it must be an index scan
+    # (the CTE through the claim index, the join back to the target through the primary key).
+    # Partitioned, the relations are queue_items_* and the index is a child of the claim index.
+    scans = [
+        node
+        for node in iter_plan_nodes(plan)
+        if node.get("Relation Name", "").startswith("queue_items") and node["Node Type"] != "ModifyTable"
+    ]
+    offending = [node for node in scans if node["Node Type"] not in ("Index Scan", "Index Only Scan")]
+    used_claim_index = any(node.get("Index Name") in claim_indexes for node in scans)
+    touched = {node["Relation Name"] for node in scans}
+    if len(touched) > 1:
+        print(f"FAIL: claim plan reads more than one partition: {', '.join(sorted(touched))}", file=sys.stderr)
+        offending.append(plan)
+
+    if not keep:
+        async with engine.begin() as connection:
+            await connection.execute(delete(QueueItem).where(QueueItem.topic.startswith(TOPIC_PREFIX)))
+        await drop_bench_partitions([partitions.partition_name(topic) for topic in bench_topics])
+    await engine.dispose()
+
+    if offending or not used_claim_index:
+        print(
+            f"FAIL: claim plan does not use {CLAIM_INDEX}: "
+            + ", ".join(f"{node['Node Type']} ({node.get('Index Name', '-')})" for node in scans),
+            file=sys.stderr,
+        )
+        return 1
+    print(f"OK: claim plan uses {CLAIM_INDEX}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--max-items", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.rows, args.topics, args.max_items, args.keep)))
+
+
+if __name__ == "__main__":
+    main()
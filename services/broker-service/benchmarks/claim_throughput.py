@@ -0,0 +1,119 @@
+"""Measure claim+ack throughput of the broker queue against a live Postgres.
+
+Run from the broker-service directory with the same POSTGRES_DSN the service uses:
+
+    python -m benchmarks.claim_throughput --messages 20000 --workers 16
+
+Both the current single-statement path (``manager.claim``/``manager.ack``) and the
+previous ORM path (SELECT ... FOR UPDATE, mutate, flush; SELECT, then delete) are
+timed on the same seeded topic so the numbers are directly comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config import get_settings
+from src.db.models import QueueItem
+from src.queue import manager
+
+settings = get_settings()
+
+ClaimAck = Callable[[AsyncSession, str], Awaitable[bool]]
+
+
+async def legacy_claim_ack(session: AsyncSession, topic: str) -> bool:
+    now = datetime.utcnow()
+    stmt = (
+        select(QueueItem)
+        .where(QueueItem.topic == topic)
+        .where(QueueItem.status == "pending")
+        .where(QueueItem.available_at <= now)
+        .order_by(QueueItem.created_at.asc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    item: Optional[QueueItem] = (await session.execute(stmt)).scalar_one_or_none()
+    if item is None:
+        await session.commit()
+        return False
+    item.status = "processing"
+    item.claimed_until = now + timedelta(seconds=settings.visibility_timeout_seconds)
+    item.updated_at = now
+    item.attempts += 1
+    await session.commit()
+
+    item = (await session.execute(select(QueueItem).where(QueueItem.id == item.id))).scalar_one_or_none()
+    if item is not None:
+        await session.delete(item)
+    await session.commit()
+    return True
+
+
+async def current_claim_ack(session: AsyncSession, topic: str) -> bool:
+    item = await manager.claim(session, topic, visibility_timeout_seconds=settings.visibility_timeout_seconds)
+    await session.commit()
+    if item is None:
+        return False
+    await manager.ack(session, item.id)
+    await session.commit()
+    return True
+
+
+async def seed(sessions: async_sessionmaker[AsyncSession], topic: str, messages: int) -> None:
+    async with sessions() as session:
+        await session.execute(delete(QueueItem).where(QueueItem.topic == topic))
+        payload = json.dumps({"document_id": "bench", "owner_id": "bench"})
+        for offset in range(0, messages, 1000):
+            await manager.enqueue_many(session, topic, [payload] * min(1000, messages - offset))
+        await session.commit()
+
+
+async def drain(sessions: async_sessionmaker[AsyncSession], topic: str, workers: int, claim_ack: ClaimAck) -> int:
+    async def worker() -> int:
+        processed = 0
+        async with sessions() as session:
+            while await claim_ack(session, topic):
+                processed += 1
+        return processed
+
+    counts = await asyncio.gather(*(worker() for _ in range(workers)))
+    return sum(counts)
+
+
+async def run(messages: int, workers: int, topic: str) -> None:
+    # Every worker holds its own connection for the whole drain, beyond the service's default pool.
+    engine = create_async_engine(settings.postgres_dsn, pool_size=workers, max_overflow=0)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    results: dict[str, float] = {}
+    for name, claim_ack in (("legacy_orm", legacy_claim_ack), ("single_statement", current_claim_ack)):
+        await seed(sessions, topic, messages)
+        started = time.perf_counter()
+        processed = await drain(sessions, topic, workers, claim_ack)
+        elapsed = time.perf_counter() - started
+        results[name] = processed / elapsed
+        print(f"{name:>16}: {processed} messages in {elapsed:.2f}s -> {results[name]:.0f} claims/s")
+
+    print(f"speedup: {results['single_statement'] / results['legacy_orm']:.2f}x")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--topic", default="bench_claim_throughput")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.workers, args.topic))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Mixed-topic load test: one churning topic next to quiet ones.
+
+Run from the broker-service directory against a migrated database, once partitioned
+and once on a single table, to compare:
+
+    python -m benchmarks.partition_load --duration 120
+
+For the single table, ``alembic downgrade 0006_queue_item_dedup_key`` and add back the
+``claimed_at timestamp`` column of 0008, which the current code writes.
+
+Producers and consumers churn ``bench_load_hot`` through enqueue/claim/ack as fast
+as they can while a probe enqueues and claims single items on the cold topics and
+records claim latency. A sampler counts broker sessions waiting on locks. At the end
+the script prints the probe latency percentiles, the lock-wait samples and, per
+queue_items relation, dead tuples and autovacuum runs from ``pg_stat_user_tables``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import replace
+
+from sqlalchemy import delete, text
+
+from src.core.config import get_settings
+from src.db import partitions
+from src.db.models import QueueItem
+from src.db.session import engine
+from src.queue.backends import QueueBackend, create_backend
+from src.queue.policy import DEFAULT_RETRY_POLICY
+from src.queue.topics import TopicPolicy
+
+settings = get_settings()
+
+TOPIC_PREFIX = "bench_load_"
+HOT_TOPIC = f"{TOPIC_PREFIX}hot"
+
+LOCK_WAITS_SQL = text(
+    """
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND wait_event_type = 'Lock' AND query ILIKE '%queue_items%'
+    """
+)
+
+TABLE_STATS_SQL = text(
+    """
+    SELECT relname, n_live_tup, n_dead_tup, autovacuum_count, autoanalyze_count
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'broker' AND relname LIKE 'queue_items%'
+    ORDER BY relname
+    """
+)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def produce(backend: QueueBackend, batch_size: int, deadline: float) -> int:
+    payload = json.dumps({"document_id": "bench", "owner_id": "bench"})
+    produced = 0
+    while time.monotonic() < deadline:
+        produced += len(await backend.enqueue_many(HOT_TOPIC, [payload] * batch_size))
+    return produced
+
+
+async def consume(backend: QueueBackend, batch_size: int, deadline: float) -> int:
+    policy = TopicPolicy(name=HOT_TOPIC, retry=DEFAULT_RETRY_POLICY)
+    consumed = 0
+    while time.monotonic() < deadline:
+        items = await backend.claim_many(HOT_TOPIC, max_items=batch_size, policy=policy)
+        if not items:
+            await asyncio.sleep(0.01)
+            continue
+        consumed += len(await backend.ack_many([item.id for item in items]))
+    return consumed
+
+
+async def probe(backend: QueueBackend, topics: list[str], interval: float, deadline: float) -> list[float]:
+    policies = {topic: TopicPolicy(name=topic, retry=DEFAULT_RETRY_POLICY) for topic in topics}
+    payload = json.dumps({"document_id": "probe", "owner_id": "probe"})
+    latencies: list[float] = []
+    turn = 0
+    while time.monotonic() < deadline:
+        topic = topics[turn % len(topics)]
+        turn += 1
+        await backend.enqueue_many(topic, [payload])
+        started = time.perf_counter()
+        items = await backend.claim_many(topic, max_items=1, policy=policies[topic])
+        latencies.append(time.perf_counter() - started)
+        await backend.ack_many([item.id for item in items])
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def sample_lock_waits(deadline: float) -> list[int]:
+    samples: list[int] = []
+    while time.monotonic() < deadline:
+        async with engine.connect() as connection:
+            samples.append(int((await connection.execute(LOCK_WAITS_SQL)).scalar_one()))
+        await asyncio.sleep(1.0)
+    return samples
+
+
+async def run(args: argparse.Namespace) -> None:
+    cold_topics = [f"{TOPIC_PREFIX}cold_{n}" for n in range(args.cold_topics)]
+    bench_topics = [HOT_TOPIC, *cold_topics]
+    async with engine.begin() as connection:
+        await connection.execute(delete(QueueItem).where(QueueItem.topic.startswith(TOPIC_PREFIX)))
+        partitioned = await connection.run_sync(partitions.is_partitioned)
+        await connection.run_sync(partitions.ensure_partitions, {topic: {} for topic in bench_topics})
+    print(f"queue_items is {'partitioned' if partitioned else 'a single table'}")
+
+    backend = create_backend(replace(settings, queue_backend="postgres"))
+    deadline = time.monotonic() + args.duration
+    try:
+        results = await asyncio.gather(
+            asyncio.gather(*(produce(backend, args.batch_size, deadline) for _ in range(args.producers))),
+            asyncio.gather(*(consume(backend, args.batch_size, deadline) for _ in range(args.consumers))),
+            probe(backend, cold_topics, args.probe_interval, deadline),
+            sample_lock_waits(deadline),
+        )
+    finally:
+        await backend.stop()
+    produced, consumed, latencies, lock_waits = results
+
+    print(f"hot topic: {sum(produced) / args.duration:.0f} enq/s, {sum(consumed) / args.duration:.0f} ack/s")
+    print(
+        f"cold claim latency over {len(latencies)} probes: "
+        f"p50={percentile(latencies, 0.50) * 1000:.2f}ms p95={percentile(latencies, 0.95) * 1000:.2f}ms"
+    )
+    if lock_waits:
+        print(f"sessions waiting on locks: mean={statistics.fmean(lock_waits):.2f} max={max(lock_waits)}")
+
+    async with engine.connect() as connection:
+        rows = (await connection.execute(TABLE_STATS_SQL)).all()
+    print(f"{'relation':<40} {'live':>10} {'dead':>10} {'autovacuum':>11} {'autoanalyze':>12}")
+    for row in rows:
+        print(
+            f"{row.relname:<40} {row.n_live_tup:>10} {row.n_dead_tup:>10}"
+            f" {row.autovacuum_count:>11} {row.autoanalyze_count:>12}"
+        )
+
+    if not args.keep:
+        async with engine.begin() as connection:
+            await connection.execute(delete(QueueItem).where(QueueItem.topic.startswith(TOPIC_PREFIX)))
+            if partitioned:
+                for topic in bench_topics:
+                    name = partitions.partition_name(topic)
+                    await connection.execute(text(f"DROP TABLE IF EXISTS {partitions.SCHEMA}.{name}"))
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--consumers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--cold-topics", type=int, default=3)
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between probe claims")
+    parser.add_argument("--keep", action="store_true", help="leave bench rows and partitions in place")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""create dead letters table
+
+Revision ID: 0002_create_dead_letters
+Revises: 0001_create_queue_items
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_create_dead_letters"
+down_revision = "0001_create_queue_items"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dead_letters",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("topic", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("dead_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        schema="broker",
+    )
+    op.create_index("ix_dead_letters_topic_dead_at", "dead_letters", ["topic", "dead_at"], schema="broker")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dead_letters_topic_dead_at", table_name="dead_letters", schema="broker")
+    op.drop_table("dead_letters", schema="broker")
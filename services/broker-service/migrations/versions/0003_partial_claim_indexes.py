@@ -0,0 +1,44 @@
+"""partial indexes for the claim and lease sweep queries
+
+Revision ID: 0003_partial_claim_indexes
+Revises: 0002_create_dead_letters
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_partial_claim_indexes"
+down_revision = "0002_create_dead_letters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_queue_items_claim",
+        "queue_items",
+        ["topic", "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+    op.create_index(
+        "ix_queue_items_processing",
+        "queue_items",
+        ["topic", "claimed_until"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+    # Both statuses are now covered by the partial indexes above.
+    op.drop_index("ix_queue_items_topic_status", table_name="queue_items", schema="broker")
+
+
+def downgrade() -> None:
+    op.create_index("ix_queue_items_topic_status", "queue_items", ["topic", "status"], schema="broker")
+    op.drop_index("ix_queue_items_processing", table_name="queue_items", schema="broker")
+    op.drop_index("ix_queue_items_claim", table_name="queue_items", schema="broker")
@@ -0,0 +1,49 @@
+"""priority lanes for queue items
+
+Revision ID: 0004_queue_item_priority
+Revises: 0003_partial_claim_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_queue_item_priority"
+down_revision = "0003_partial_claim_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "queue_items",
+        sa.Column("priority", sa.SmallInteger(), nullable=False, server_default=sa.text("0")),
+        schema="broker",
+    )
+    # The claim now orders by priority first, so the index has to lead with it after topic.
+    op.drop_index("ix_queue_items_claim", table_name="queue_items", schema="broker")
+    op.create_index(
+        "ix_queue_items_claim",
+        "queue_items",
+        ["topic", sa.text("priority DESC"), "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_queue_items_claim", table_name="queue_items", schema="broker")
+    op.create_index(
+        "ix_queue_items_claim",
+        "queue_items",
+        ["topic", "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+    op.drop_column("queue_items", "priority", schema="broker")
@@ -0,0 +1,40 @@
+"""owner column and index for fair-share claims
+
+Revision ID: 0005_queue_item_owner
+Revises: 0004_queue_item_priority
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_queue_item_owner"
+down_revision = "0004_queue_item_priority"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "queue_items",
+        sa.Column("owner_id", sa.String(length=64), nullable=False, server_default=sa.text("''")),
+        schema="broker",
+    )
+    op.execute("UPDATE broker.queue_items SET owner_id = coalesce(payload::jsonb ->> 'owner_id', '')")
+    op.create_index(
+        "ix_queue_items_owner_claim",
+        "queue_items",
+        ["topic", "owner_id", sa.text("priority DESC"), "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_queue_items_owner_claim", table_name="queue_items", schema="broker")
+    op.drop_column("queue_items", "owner_id", schema="broker")
@@ -0,0 +1,35 @@
+"""dedup key with a unique partial index for idempotent enqueue
+
+Revision ID: 0006_queue_item_dedup_key
+Revises: 0005_queue_item_owner
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_queue_item_dedup_key"
+down_revision = "0005_queue_item_owner"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("queue_items", sa.Column("dedup_key", sa.String(length=255), nullable=True), schema="broker")
+    op.create_index(
+        "ux_queue_items_dedup",
+        "queue_items",
+        ["topic", "dedup_key"],
+        unique=True,
+        schema="broker",
+        postgresql_where=sa.text("dedup_key IS NOT NULL AND status IN ('pending', 'processing')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_queue_items_dedup", table_name="queue_items", schema="broker")
+    op.drop_column("queue_items", "dedup_key", schema="broker")
@@ -0,0 +1,112 @@
+"""list-partition queue_items by topic
+
+Revision ID: 0007_partition_queue_items
+Revises: 0006_queue_item_dedup_key
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.core.config import get_settings
+from src.db import partitions
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_partition_queue_items"
+down_revision = "0006_queue_item_dedup_key"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, topic, payload, owner_id, dedup_key, status, attempts, priority, available_at, claimed_until, created_at, updated_at"
+INDEXES = ("ix_queue_items_claim", "ix_queue_items_owner_claim", "ux_queue_items_dedup", "ix_queue_items_processing")
+
+
+def _create_queue_table(name: str, *, partitioned: bool) -> None:
+    op.create_table(
+        name,
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("topic", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("owner_id", sa.String(length=64), nullable=False, server_default=sa.text("''")),
+        sa.Column("dedup_key", sa.String(length=255), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("priority", sa.SmallInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("available_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("claimed_until", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint(*(("id", "topic") if partitioned else ("id",)), name="queue_items_pkey"),
+        schema="broker",
+        **({"postgresql_partition_by": "LIST (topic)"} if partitioned else {}),
+    )
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        "ix_queue_items_claim",
+        "queue_items",
+        ["topic", sa.text("priority DESC"), "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+    op.create_index(
+        "ix_queue_items_owner_claim",
+        "queue_items",
+        ["topic", "owner_id", sa.text("priority DESC"), "created_at"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'pending'"),
+        postgresql_include=["available_at"],
+    )
+    op.create_index(
+        "ux_queue_items_dedup",
+        "queue_items",
+        ["topic", "dedup_key"],
+        unique=True,
+        schema="broker",
+        postgresql_where=sa.text("dedup_key IS NOT NULL AND status IN ('pending', 'processing')"),
+    )
+    op.create_index(
+        "ix_queue_items_processing",
+        "queue_items",
+        ["topic", "claimed_until"],
+        schema="broker",
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+
+
+def _swap_out_current_table() -> None:
+    # Index and constraint names are schema-wide, so the old table gives them up before the copy.
+    for index in INDEXES:
+        op.drop_index(index, table_name="queue_items", schema="broker")
+    op.execute("ALTER TABLE broker.queue_items RENAME CONSTRAINT queue_items_pkey TO queue_items_old_pkey")
+    op.rename_table("queue_items", "queue_items_old", schema="broker")
+
+
+def _copy_and_drop_old() -> None:
+    op.execute(f"INSERT INTO broker.queue_items ({COLUMNS}) SELECT {COLUMNS} FROM broker.queue_items_old")
+    op.drop_table("queue_items_old", schema="broker")
+
+
+def upgrade() -> None:
+    _swap_out_current_table()
+    _create_queue_table("queue_items", partitioned=True)
+
+    connection = op.get_bind()
+    partitions.create_default_partition(connection)
+    for name, definition in get_settings().load_topic_definitions().items():
+        partitions.ensure_partition(connection, name, definition.get("autovacuum", {}))
+
+    _copy_and_drop_old()
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _swap_out_current_table()
+    _create_queue_table("queue_items", partitioned=False)
+    _copy_and_drop_old()
+    _create_indexes()
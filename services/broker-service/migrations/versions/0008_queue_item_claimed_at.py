@@ -0,0 +1,27 @@
+"""lease start time for claim-to-ack latency
+
+Revision ID: 0008_queue_item_claimed_at
+Revises: 0007_partition_queue_items
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_queue_item_claimed_at"
+down_revision = "0007_partition_queue_items"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: a catalog-only change, cascaded to every partition.
+    op.add_column("queue_items", sa.Column("claimed_at", sa.DateTime(), nullable=True), schema="broker")
+
+
+def downgrade() -> None:
+    op.drop_column("queue_items", "claimed_at", schema="broker")
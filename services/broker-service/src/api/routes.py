@@ -1,22 +1,43 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Query
 
 from ..core.config import get_settings
-from ..db.session import get_session
-from ..queue import manager
+from ..queue import metrics
+from ..queue.backends import ClaimedItem
+from ..queue.policy import DEFAULT_RETRY_POLICY
+from ..queue.store import backend
+from ..queue.topics import registry
+from ..schemas.queue import (
+    DeadLetterRead,
+    DeadLetterSelection,
+    EnqueueBatchRequest,
+    FailBatchRequest,
+    FailRequest,
+    ItemIdsRequest,
+)
 
 router = APIRouter()
 settings = get_settings()
 
 
-def get_topic_definition(topic: str) -> dict[str, Any]:
-    definitions = settings.load_topic_definitions()
-    return definitions.get(topic, {"max_retries": 5, "retry_delay_seconds": 30})
+def owner_of(payload: dict[str, Any]) -> str:
+    # Fair-share claims group items by the payload's owner_id; ownerless items share one lane.
+    return str(payload.get("owner_id") or "")[:64]
+
+
+def serialize_item(item: ClaimedItem) -> dict[str, Any]:
+    return {
+        "id": str(item.id),
+        "topic": item.topic,
+        "payload": json.loads(item.payload),
+        "attempts": item.attempts,
+        "priority": item.priority,
+    }
 
 
 @router.get("/health", tags=["system"])
@@ -28,46 +49,168 @@ async def healthcheck() -> dict[str, str]:
 async def enqueue_topic(
     topic: str,
     payload: dict[str, Any],
-    session: AsyncSession = Depends(get_session),
+    priority: Optional[int] = Query(default=None, ge=0, le=settings.max_priority),
+    dedup_key: Optional[str] = Query(default=None, min_length=1, max_length=255),
 ) -> dict[str, Any]:
-    data = json.dumps(payload)
-    item = await manager.enqueue(session, topic, data)
-    await session.commit()
-    return {"id": str(item.id), "topic": item.topic}
+    # Without an explicit priority, messages take the topic's configured default.
+    if priority is None:
+        priority = registry.get(topic).priority
+    (item,) = await backend.enqueue_many(
+        topic,
+        [json.dumps(payload)],
+        priority=priority,
+        owner_ids=[owner_of(payload)],
+        dedup_keys=[dedup_key],
+    )
+    metrics.record_enqueued(topic, [item])
+    return {"id": str(item.id), "topic": topic, "duplicate": item.duplicate}
+
+
+@router.post("/enqueue-batch/{topic}", tags=["queue"])
+async def enqueue_topic_batch(
+    topic: str,
+    payload: EnqueueBatchRequest,
+    priority: Optional[int] = Query(default=None, ge=0, le=settings.max_priority),
+) -> dict[str, Any]:
+    if priority is None:
+        priority = registry.get(topic).priority
+    items = await backend.enqueue_many(
+        topic,
+        [json.dumps(item) for item in payload.payloads],
+        priority=priority,
+        owner_ids=[owner_of(item) for item in payload.payloads],
+        dedup_keys=payload.dedup_keys,
+    )
+    metrics.record_enqueued(topic, items)
+    return {
+        "ids": [str(item.id) for item in items],
+        "topic": topic,
+        "duplicates": sum(item.duplicate for item in items),
+    }
 
 
 @router.post("/claim/{topic}", tags=["queue"])
-async def claim_topic(topic: str, session: AsyncSession = Depends(get_session)) -> dict[str, Any]:
-    item = await manager.claim(session, topic)
-    if item is None:
-        await session.commit()
+async def claim_topic(
+    topic: str,
+    max_items: Optional[int] = Query(default=None, ge=1, le=settings.max_claim_batch_size),
+    wait_seconds: float = Query(default=0, ge=0, le=settings.max_claim_wait_seconds),
+) -> dict[str, Any]:
+    # Without max_items the endpoint keeps its single-item response shape;
+    # with it, up to max_items leases are taken in one statement and returned as a list.
+    items = await backend.claim_wait(
+        topic,
+        max_items=max_items or 1,
+        policy=registry.get(topic),
+        wait_seconds=wait_seconds,
+    )
+    if not items:
         raise HTTPException(status_code=404, detail="no messages")
-    await session.commit()
-    return {
-        "id": str(item.id),
-        "topic": item.topic,
-        "payload": json.loads(item.payload),
-        "attempts": item.attempts,
-    }
+    metrics.record_claimed(items)
+    if max_items is None:
+        return serialize_item(items[0])
+    return {"items": [serialize_item(item) for item in items]}
 
 
 @router.post("/ack/{item_id}", tags=["queue"])
-async def ack_item(item_id: str, session: AsyncSession = Depends(get_session)) -> dict[str, str]:
-    success = await manager.ack(session, item_id)
-    await session.commit()
-    if not success:
+async def ack_item(item_id: UUID) -> dict[str, str]:
+    acknowledged = await backend.ack_many([item_id])
+    if not acknowledged:
         raise HTTPException(status_code=404, detail="item not found")
+    metrics.record_acked(acknowledged)
     return {"status": "acknowledged"}
 
 
 @router.post("/fail/{item_id}", tags=["queue"])
-async def fail_item(item_id: str, session: AsyncSession = Depends(get_session)) -> dict[str, str]:
-    item = await manager.get_item(session, item_id)
-    if item is None:
-        await session.commit()
+async def fail_item(item_id: UUID, payload: Optional[FailRequest] = None) -> dict[str, str]:
+    result = await backend.fail_many(
+        [item_id],
+        policies=registry.retry_policies,
+        default_policy=DEFAULT_RETRY_POLICY,
+        error=payload.error if payload else None,
+    )
+    if result.dead_lettered:
+        return {"status": "dead_lettered"}
+    if not result.requeued:
         raise HTTPException(status_code=404, detail="item not found")
-
-    definition = get_topic_definition(item.topic)
-    success = await manager.fail(session, item_id, retry_delay_seconds=definition.get("retry_delay_seconds", 30))
-    await session.commit()
     return {"status": "requeued"}
+
+
+@router.post("/extend/{item_id}", tags=["queue"])
+async def extend_item(
+    item_id: UUID,
+    lease_seconds: int = Query(default=settings.job_lease_seconds, ge=1, le=settings.max_lease_seconds),
+) -> dict[str, str]:
+    claimed_until = await backend.extend(item_id, lease_seconds=lease_seconds)
+    if claimed_until is None:
+        raise HTTPException(status_code=404, detail="item not found")
+    return {"status": "extended", "claimed_until": claimed_until.isoformat()}
+
+
+@router.post("/ack-batch", tags=["queue"])
+async def ack_items(payload: ItemIdsRequest) -> dict[str, int]:
+    acknowledged = await backend.ack_many(payload.ids)
+    metrics.record_acked(acknowledged)
+    return {"acknowledged": len(acknowledged)}
+
+
+@router.post("/fail-batch", tags=["queue"])
+async def fail_items(payload: FailBatchRequest) -> dict[str, int]:
+    result = await backend.fail_many(
+        payload.ids,
+        policies=registry.retry_policies,
+        default_policy=DEFAULT_RETRY_POLICY,
+        error=payload.error,
+    )
+    return result._asdict()
+
+
+@router.get("/dlq/{topic}", response_model=list[DeadLetterRead], tags=["dead-letters"])
+async def list_dead_letters(
+    topic: str,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+) -> list[DeadLetterRead]:
+    items = await backend.list_dead_letters(topic, limit=limit, offset=offset)
+    return [
+        DeadLetterRead(
+            id=item.id,
+            topic=item.topic,
+            payload=json.loads(item.payload),
+            attempts=item.attempts,
+            last_error=item.last_error,
+            created_at=item.created_at,
+            dead_at=item.dead_at,
+        )
+        for item in items
+    ]
+
+
+@router.post("/dlq/{topic}/replay", tags=["dead-letters"])
+async def replay_dead_letters(topic: str, payload: Optional[DeadLetterSelection] = None) -> dict[str, int]:
+    replayed = await backend.replay_dead_letters(
+        topic,
+        payload.ids if payload else None,
+        priority=registry.get(topic).priority,
+    )
+    return {"replayed": replayed}
+
+
+@router.post("/dlq/{topic}/purge", tags=["dead-letters"])
+async def purge_dead_letters(topic: str, payload: Optional[DeadLetterSelection] = None) -> dict[str, int]:
+    purged = await backend.purge_dead_letters(topic, payload.ids if payload else None)
+    return {"purged": purged}
+
+
+@router.get("/admin/topics", tags=["admin"])
+async def list_topics() -> dict[str, dict[str, Any]]:
+    return {name: policy.to_dict() for name, policy in registry.all().items()}
+
+
+@router.post("/admin/topics/reload", tags=["admin"])
+async def reload_topics() -> dict[str, Any]:
+    try:
+        registry.load()
+    except (OSError, ValueError, KeyError) as exc:
+        raise HTTPException(status_code=400, detail=f"invalid topic definitions: {exc}") from exc
+    await backend.sync_topics(registry.all())
+    return {"status": "reloaded", "topics": sorted(registry.all())}
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from ..core.config import get_settings
+from ..queue import metrics
+from ..queue.policy import DEFAULT_RETRY_POLICY
+from ..queue.store import backend
+from ..queue.topics import registry
+from ..schemas.queue import StreamCommand
+from .routes import serialize_item
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+settings = get_settings()
+
+
+class _Subscriber:
+    """One WebSocket consumer of a topic with a fixed prefetch window.
+
+    The broker pushes ``{"type": "messages", "items": [...]}`` frames (items shaped
+    as in ``/claim``) while fewer than ``prefetch`` leases are outstanding on the
+    connection. The consumer answers with ``StreamCommand`` frames, e.g.
+    ``{"op": "ack", "ids": [...]}``; every ack or nack returns credit. Leases still
+    outstanding when the socket closes are not released early: they go back to
+    pending when they expire, like those of a crashed HTTP worker.
+    """
+
+    def __init__(self, websocket: WebSocket, topic: str, prefetch: int) -> None:
+        self._websocket = websocket
+        self._topic = topic
+        self._prefetch = prefetch
+        self._leased: set[UUID] = set()
+        self._credit = asyncio.Event()
+
+    async def run(self) -> None:
+        tasks = [asyncio.create_task(self._push()), asyncio.create_task(self._listen())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    async def _push(self) -> None:
+        while True:
+            free = self._prefetch - len(self._leased)
+            if free <= 0:
+                self._credit.clear()
+                await self._credit.wait()
+                continue
+            items = await backend.claim_wait(
+                self._topic,
+                max_items=free,
+                policy=registry.get(self._topic),
+                wait_seconds=settings.max_claim_wait_seconds,
+            )
+            if not items:
+                continue
+            self._leased.update(item.id for item in items)
+            metrics.record_claimed(items)
+            await self._websocket.send_json({"type": "messages", "items": [serialize_item(item) for item in items]})
+
+    async def _listen(self) -> None:
+        while True:
+            command = StreamCommand.model_validate(await self._websocket.receive_json())
+            if command.op == "ack":
+                metrics.record_acked(await backend.ack_many(command.ids))
+            elif command.op == "nack":
+                await backend.fail_many(
+                    command.ids,
+                    policies=registry.retry_policies,
+                    default_policy=DEFAULT_RETRY_POLICY,
+                    error=command.error,
+                )
+            else:
+                lease_seconds = min(command.lease_seconds or settings.job_lease_seconds, settings.max_lease_seconds)
+                for item_id in command.ids:
+                    await backend.extend(item_id, lease_seconds=lease_seconds)
+                # Extending keeps the lease on this connection, so no credit comes back.
+                continue
+            self._leased.difference_update(command.ids)
+            self._credit.set()
+
+
+@router.websocket("/subscribe/{topic}")
+async def subscribe_topic(
+    websocket: WebSocket,
+    topic: str,
+    prefetch: int = Query(default=10, ge=1, le=settings.max_claim_batch_size),
+) -> None:
+    """Stream leases of ``topic`` over a WebSocket; see ``_Subscriber`` for the protocol."""
+    await websocket.accept()
+    try:
+        await _Subscriber(websocket, topic, prefetch).run()
+    except WebSocketDisconnect:
+        return
+    except (ValidationError, ValueError) as exc:
+        logger.warning("Closing subscriber of '%s' after a malformed frame: %s", topic, exc)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="malformed frame")
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import Column, DateTime, Index, Integer, SmallInteger, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase
 
@@ -14,28 +14,76 @@ class Base(DeclarativeBase):
 
 class QueueItem(Base):
     __tablename__ = "queue_items"
-    __table_args__ = {"schema": "broker"}
+    __table_args__ = (
+        # Serves the claim query: pending rows of a topic, highest priority first and FIFO within a
+        # priority, available_at read from the index.
+        Index(
+            "ix_queue_items_claim",
+            "topic",
+            text("priority DESC"),
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+            postgresql_include=["available_at"],
+        ),
+        # Serves fair-share claims: one bounded scan per owner, plus the distinct-owner lookup.
+        Index(
+            "ix_queue_items_owner_claim",
+            "topic",
+            "owner_id",
+            text("priority DESC"),
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+            postgresql_include=["available_at"],
+        ),
+        # At most one live item per dedup key and topic; enqueue upserts against it.
+        Index(
+            "ux_queue_items_dedup",
+            "topic",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("dedup_key IS NOT NULL AND status IN ('pending', 'processing')"),
+        ),
+        # Serves the lease sweeper and the per-topic in-flight count.
+        Index(
+            "ix_queue_items_processing",
+            "topic",
+            "claimed_until",
+            postgresql_where=text("status = 'processing'"),
+        ),
+        # One list partition per topic (see db/partitions.py); every index above is per partition.
+        {"schema": "broker", "postgresql_partition_by": "LIST (topic)"},
+    )
 
+    # The partition key has to be part of the primary key; id leads so lookups by id alone use it.
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    topic = Column(String(64), nullable=False, index=True)
+    topic = Column(String(64), primary_key=True)
     payload = Column(Text, nullable=False)
+    # Copied from payload["owner_id"] on enqueue for fair-share claims; empty when the payload has none.
+    owner_id = Column(String(64), nullable=False, default="", server_default=text("''"))
+    # Optional idempotency key, e.g. "<document_id>:<stage>"; see ux_queue_items_dedup.
+    dedup_key = Column(String(255), nullable=True)
     status = Column(String(32), nullable=False, default="pending")
     attempts = Column(Integer, nullable=False, default=0)
+    priority = Column(SmallInteger, nullable=False, default=0, server_default=text("0"))
     available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     claimed_until = Column(DateTime, nullable=True)
+    # Start of the current lease, for claim-to-ack latency; extend() moves claimed_until only.
+    claimed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    def claim(self, visibility_timeout_seconds: int) -> None:
-        self.status = "processing"
-        now = datetime.utcnow()
-        self.claimed_until = now + timedelta(seconds=visibility_timeout_seconds)
-        self.updated_at = now
-        self.attempts += 1
-
-    def mark_pending(self, *, delay_seconds: int = 0) -> None:
-        now = datetime.utcnow()
-        self.status = "pending"
-        self.claimed_until = None
-        self.available_at = now + timedelta(seconds=delay_seconds)
-        self.updated_at = now
+
+class DeadLetter(Base):
+    __tablename__ = "dead_letters"
+    __table_args__ = (
+        Index("ix_dead_letters_topic_dead_at", "topic", "dead_at"),
+        {"schema": "broker"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    topic = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    dead_at = Column(DateTime, default=datetime.utcnow, nullable=False)
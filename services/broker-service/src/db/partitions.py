@@ -0,0 +1,110 @@
+"""List partitions of ``broker.queue_items``, one per topic plus a default.
+
+Each busy topic gets its own heap and indexes, so a topic that churns millions of
+rows an hour is vacuumed on its own schedule and its dead tuples never sit under
+another topic's claim index. Topics without a definition land in the default
+partition until one is added.
+
+The helpers take a sync ``Connection`` so migrations can call them directly; the
+service runs them through ``AsyncConnection.run_sync``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SCHEMA = "broker"
+PARENT = "queue_items"
+DEFAULT_PARTITION = "queue_items_default"
+
+# Queue partitions turn over their whole contents every few minutes, far faster than
+# the global autovacuum defaults (20% of the table dead before a vacuum) assume.
+DEFAULT_STORAGE: dict[str, Any] = {
+    "autovacuum_vacuum_scale_factor": 0.01,
+    "autovacuum_vacuum_threshold": 500,
+    "autovacuum_vacuum_insert_scale_factor": 0.05,
+    "autovacuum_analyze_scale_factor": 0.02,
+    "autovacuum_vacuum_cost_delay": 1,
+}
+
+_STORAGE_KEY = re.compile(r"^[a-z_]+$")
+
+
+def partition_name(topic: str) -> str:
+    slug = re.sub(r"[^a-z0-9_]", "_", topic.lower())
+    if slug == topic and len(slug) <= 48:
+        return f"{PARENT}_{slug}"
+    # Keep distinct topics distinct once folded into an identifier (63 bytes max).
+    digest = hashlib.sha1(topic.encode("utf-8")).hexdigest()[:8]
+    return f"{PARENT}_{slug[:40]}_{digest}"
+
+
+def storage_options(overrides: Mapping[str, Any]) -> dict[str, Any]:
+    options = {**DEFAULT_STORAGE, **overrides}
+    for key, value in options.items():
+        if not _STORAGE_KEY.match(key) or not isinstance(value, (int, float)):
+            raise ValueError(f"invalid partition storage option {key}={value!r}")
+    return options
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _set_storage(connection: Connection, table: str, options: Mapping[str, Any]) -> None:
+    rendered = ", ".join(f"{key} = {value}" for key, value in storage_options(options).items())
+    connection.execute(text(f"ALTER TABLE {SCHEMA}.{table} SET ({rendered})"))
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return (
+        connection.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"),
+            {"parent": f"{SCHEMA}.{PARENT}"},
+        ).scalar()
+        is not None
+    )
+
+
+def ensure_partition(connection: Connection, topic: str, storage: Mapping[str, Any]) -> bool:
+    """Give ``topic`` its own partition, moving its rows out of the default. Returns True if created."""
+    name = partition_name(topic)
+    # Serialize with other broker replicas doing the same at startup or reload.
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('broker.queue_items partitions'))"))
+    created = connection.execute(text("SELECT to_regclass(:name)"), {"name": f"{SCHEMA}.{name}"}).scalar() is None
+    if created:
+        # A partition cannot be attached while the default still holds rows for its value,
+        # so the new table is filled first and attached second.
+        connection.execute(text(f"CREATE TABLE {SCHEMA}.{name} (LIKE {SCHEMA}.{PARENT} INCLUDING DEFAULTS)"))
+        connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {SCHEMA}.{DEFAULT_PARTITION} WHERE topic = :topic RETURNING *) "
+                f"INSERT INTO {SCHEMA}.{name} SELECT * FROM moved"
+            ),
+            {"topic": topic},
+        )
+        connection.execute(
+            text(
+                f"ALTER TABLE {SCHEMA}.{PARENT} ATTACH PARTITION {SCHEMA}.{name} "
+                f"FOR VALUES IN ({_quote_literal(topic)})"
+            )
+        )
+    _set_storage(connection, name, storage)
+    return created
+
+
+def ensure_partitions(connection: Connection, storage_by_topic: Mapping[str, Mapping[str, Any]]) -> list[str]:
+    """Ensure a partition per topic; returns the topics that got a new one."""
+    if not is_partitioned(connection):
+        return []
+    return [topic for topic, storage in storage_by_topic.items() if ensure_partition(connection, topic, storage)]
+
+
+def create_default_partition(connection: Connection) -> None:
+    connection.execute(text(f"CREATE TABLE {SCHEMA}.{DEFAULT_PARTITION} PARTITION OF {SCHEMA}.{PARENT} DEFAULT"))
+    _set_storage(connection, DEFAULT_PARTITION, {})
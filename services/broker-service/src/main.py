@@ -1,13 +1,48 @@
-from fastapi import FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 
 from .api.routes import router as api_router
+from .api.stream import router as stream_router
 from .core.config import get_settings
+from .queue import metrics
+from .queue.reaper import run_reaper
+from .queue.store import backend
+from .queue.topics import registry
 
 settings = get_settings()
-app = FastAPI(title="Broker Service", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    registry.load()
+    await backend.sync_topics(registry.all())
+    await backend.start()
+    tasks = [
+        asyncio.create_task(run_reaper()),
+        asyncio.create_task(registry.watch(settings.topic_reload_interval_seconds, backend.sync_topics)),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await backend.stop()
+
+
+app = FastAPI(title="Broker Service", version="0.1.0", lifespan=lifespan)
 app.include_router(api_router, prefix="/api")
+app.include_router(stream_router, prefix="/api")
 
 
 @app.get("/health", tags=["system"])
 async def health() -> dict[str, str]:
     return {"status": "ok", "service": settings.service_name}
+
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    return Response(content=await metrics.render(backend), media_type=metrics.CONTENT_TYPE_LATEST)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from ...core.config import Settings
+from .base import AckedItem, ClaimedItem, DeadLetterRecord, EnqueuedItem, FailResult, QueueBackend, TopicStats
+
+__all__ = [
+    "AckedItem",
+    "ClaimedItem",
+    "DeadLetterRecord",
+    "EnqueuedItem",
+    "FailResult",
+    "QueueBackend",
+    "TopicStats",
+    "create_backend",
+]
+
+
+def create_backend(config: Settings) -> QueueBackend:
+    # Engines are imported lazily so single-node installs don't need asyncpg or a Postgres server.
+    if config.queue_backend == "postgres":
+        from .postgres import PostgresBackend
+
+        return PostgresBackend(config)
+    if config.queue_backend == "memory":
+        from .memory import MemoryBackend
+
+        return MemoryBackend()
+    if config.queue_backend == "sqlite":
+        from .sqlite import SqliteBackend
+
+        return SqliteBackend(config.sqlite_path)
+    raise ValueError(f"unknown queue backend '{config.queue_backend}'")
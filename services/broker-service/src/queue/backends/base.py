@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from ..notifier import TopicNotifier
+from ..policy import RetryPolicy
+from ..topics import TopicPolicy
+
+
+class ClaimedItem(NamedTuple):
+    id: UUID
+    topic: str
+    payload: str
+    attempts: int
+    priority: int
+    # When the item last became claimable: its enqueue, or the end of a retry backoff.
+    available_at: datetime
+
+
+class AckedItem(NamedTuple):
+    topic: str
+    claimed_at: Optional[datetime]
+
+
+class EnqueuedItem(NamedTuple):
+    id: UUID
+    # True when the payload collapsed into an item already queued under the same dedup key.
+    duplicate: bool
+
+
+class FailResult(NamedTuple):
+    requeued: int
+    dead_lettered: int
+
+
+class DeadLetterRecord(NamedTuple):
+    id: UUID
+    topic: str
+    payload: str
+    attempts: int
+    last_error: Optional[str]
+    created_at: datetime
+    dead_at: datetime
+
+
+class TopicStats(NamedTuple):
+    topic: str
+    # Pending items that can be claimed now; delayed ones are waiting out a retry backoff.
+    pending: int
+    delayed: int
+    processing: int
+    dead_letters: int
+    # created_at of the oldest pending or delayed item, None when there is none.
+    oldest_pending_at: Optional[datetime]
+
+
+class QueueBackend(ABC):
+    """Storage engine behind the broker's queue operations.
+
+    Every method is its own transaction. Payloads are stored as serialized JSON
+    strings and timestamps are naive UTC, whatever the engine.
+    """
+
+    notifier: TopicNotifier
+
+    async def start(self) -> None:
+        await self.notifier.start()
+
+    async def stop(self) -> None:
+        await self.notifier.stop()
+
+    async def sync_topics(self, topics: dict[str, TopicPolicy]) -> None:
+        """Prepare per-topic storage after the topic definitions were (re)loaded."""
+
+    @abstractmethod
+    async def enqueue_many(
+        self,
+        topic: str,
+        payloads: list[str],
+        *,
+        priority: int = 0,
+        owner_ids: Optional[list[str]] = None,
+        dedup_keys: Optional[list[Optional[str]]] = None,
+    ) -> list[EnqueuedItem]:
+        """Append ``payloads`` in order.
+
+        ``owner_ids`` and ``dedup_keys`` run parallel to ``payloads``. A payload whose
+        key matches a pending or processing item of the topic (or an earlier payload of
+        the batch) is not stored; that item's id is returned and its priority raised to
+        ``priority`` if lower.
+        """
+
+    @abstractmethod
+    async def claim_many(self, topic: str, *, max_items: int, policy: TopicPolicy) -> list[ClaimedItem]:
+        """Lease up to ``max_items``, FIFO by priority or round-robin by owner per ``policy.fair_share``."""
+
+    @abstractmethod
+    async def ack_many(self, item_ids: list[UUID]) -> list[AckedItem]:
+        """Delete the items; returns one entry per item that still existed."""
+
+    @abstractmethod
+    async def fail_many(
+        self,
+        item_ids: list[UUID],
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str] = None,
+    ) -> FailResult: ...
+
+    @abstractmethod
+    async def extend(self, item_id: UUID, *, lease_seconds: int) -> Optional[datetime]: ...
+
+    @abstractmethod
+    async def release_expired(
+        self,
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+    ) -> FailResult: ...
+
+    @abstractmethod
+    async def promote_aged(self, *, aging_seconds: float, max_priority: int) -> int:
+        """Raise each pending item to at least one priority level per ``aging_seconds`` waited.
+
+        Levels stop at ``max_priority``, so low-priority work eventually competes with
+        fresh work of that level instead of starving behind it. The reaper passes a cap
+        below the interactive lane, which aged work never reaches. Only items whose level
+        actually rises are written. Returns rows promoted.
+        """
+
+    @abstractmethod
+    async def list_dead_letters(self, topic: str, *, limit: int, offset: int) -> list[DeadLetterRecord]: ...
+
+    @abstractmethod
+    async def replay_dead_letters(
+        self,
+        topic: str,
+        item_ids: Optional[list[UUID]] = None,
+        *,
+        priority: int = 0,
+    ) -> int: ...
+
+    @abstractmethod
+    async def purge_dead_letters(self, topic: str, item_ids: Optional[list[UUID]] = None) -> int: ...
+
+    @abstractmethod
+    async def queue_stats(self) -> list[TopicStats]:
+        """Per-topic item counts for every topic with live items or dead letters."""
+
+    async def claim_wait(
+        self,
+        topic: str,
+        *,
+        max_items: int,
+        policy: TopicPolicy,
+        wait_seconds: float,
+    ) -> list[ClaimedItem]:
+        """Claim up to ``max_items``, parking for up to ``wait_seconds`` while the topic is empty."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait_seconds
+        while True:
+            signal = self.notifier.watch(topic)
+            items = await self.claim_many(topic, max_items=max_items, policy=policy)
+            if items:
+                return items
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            await self.notifier.wait(signal, remaining)
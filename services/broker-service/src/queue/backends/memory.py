@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID, uuid4
+
+from ..notifier import TopicNotifier
+from ..policy import RetryPolicy
+from ..topics import TopicPolicy
+from .base import AckedItem, ClaimedItem, DeadLetterRecord, EnqueuedItem, FailResult, QueueBackend, TopicStats
+
+
+def _owner_of(payload: str) -> str:
+    data = json.loads(payload)
+    return str(data.get("owner_id") or "") if isinstance(data, dict) else ""
+
+
+@dataclass
+class _Item:
+    id: UUID
+    topic: str
+    payload: str
+    owner_id: str
+    priority: int
+    seq: int
+    created_at: datetime
+    available_at: datetime
+    status: str = "pending"
+    attempts: int = 0
+    claimed_until: Optional[datetime] = None
+    claimed_at: Optional[datetime] = None
+    dedup_key: Optional[str] = None
+    # Bumped on every state change; heap entries carrying an older version are stale.
+    version: int = 0
+
+
+@dataclass
+class _TopicQueue:
+    # Per owner_id heap of (-priority, seq, version, id): highest priority first, FIFO within a priority.
+    ready: dict[str, list[tuple[int, int, int, UUID]]] = field(default_factory=dict)
+    delayed: list[tuple[datetime, int, UUID]] = field(default_factory=list)
+    processing: set[UUID] = field(default_factory=set)
+    # dedup_key -> id of the live (pending or processing) item holding it.
+    dedup: dict[str, UUID] = field(default_factory=dict)
+
+
+class MemoryBackend(QueueBackend):
+    """Process-local queue for single-node installs, tests and load runs.
+
+    Nothing survives a restart and the broker must run as a single process. All
+    operations are synchronous between awaits, so the event loop serializes them.
+    """
+
+    def __init__(self) -> None:
+        self.notifier = TopicNotifier()
+        self._items: dict[UUID, _Item] = {}
+        self._topics: dict[str, _TopicQueue] = {}
+        self._dead: dict[str, dict[UUID, DeadLetterRecord]] = {}
+        self._seq = itertools.count()
+
+    def _queue(self, topic: str) -> _TopicQueue:
+        queue = self._topics.get(topic)
+        if queue is None:
+            queue = self._topics[topic] = _TopicQueue()
+        return queue
+
+    def _push_ready(self, item: _Item) -> None:
+        lane = self._queue(item.topic).ready.setdefault(item.owner_id, [])
+        heapq.heappush(lane, (-item.priority, item.seq, item.version, item.id))
+
+    def _head(self, lane: list[tuple[int, int, int, UUID]]) -> Optional[_Item]:
+        """Return the first live item of an owner's lane, dropping stale entries on the way."""
+        while lane:
+            _, _, version, item_id = lane[0]
+            item = self._items.get(item_id)
+            if item is not None and item.version == version:
+                return item
+            heapq.heappop(lane)
+        return None
+
+    def _add(
+        self,
+        item_id: UUID,
+        topic: str,
+        payload: str,
+        now: datetime,
+        priority: int,
+        owner_id: str,
+        dedup_key: Optional[str] = None,
+    ) -> None:
+        item = _Item(
+            id=item_id,
+            topic=topic,
+            payload=payload,
+            owner_id=owner_id,
+            priority=priority,
+            seq=next(self._seq),
+            created_at=now,
+            available_at=now,
+            dedup_key=dedup_key,
+        )
+        self._items[item_id] = item
+        if dedup_key is not None:
+            self._queue(topic).dedup[dedup_key] = item_id
+        self._push_ready(item)
+
+    def _reschedule(self, item: _Item, now: datetime) -> None:
+        """Re-file a pending item after its priority changed; older heap entries go stale."""
+        item.version += 1
+        if item.available_at <= now:
+            self._push_ready(item)
+        else:
+            heapq.heappush(self._queue(item.topic).delayed, (item.available_at, item.version, item.id))
+
+    def _remove(self, item: _Item) -> None:
+        queue = self._queue(item.topic)
+        del self._items[item.id]
+        queue.processing.discard(item.id)
+        if item.dedup_key is not None:
+            queue.dedup.pop(item.dedup_key, None)
+
+    async def enqueue_many(
+        self,
+        topic: str,
+        payloads: list[str],
+        *,
+        priority: int = 0,
+        owner_ids: Optional[list[str]] = None,
+        dedup_keys: Optional[list[Optional[str]]] = None,
+    ) -> list[EnqueuedItem]:
+        now = datetime.utcnow()
+        queue = self._queue(topic)
+        owner_ids = owner_ids or [""] * len(payloads)
+        dedup_keys = dedup_keys or [None] * len(payloads)
+        items: list[EnqueuedItem] = []
+        for payload, owner_id, dedup_key in zip(payloads, owner_ids, dedup_keys):
+            existing = self._items.get(queue.dedup[dedup_key]) if dedup_key in queue.dedup else None
+            if existing is None:
+                item_id = uuid4()
+                self._add(item_id, topic, payload, now, priority, owner_id, dedup_key)
+                items.append(EnqueuedItem(item_id, duplicate=False))
+                continue
+            if priority > existing.priority:
+                existing.priority = priority
+                if existing.status == "pending":
+                    self._reschedule(existing, now)
+            items.append(EnqueuedItem(existing.id, duplicate=True))
+        if not all(item.duplicate for item in items):
+            self.notifier.wake(topic)
+        return items
+
+    async def claim_many(self, topic: str, *, max_items: int, policy: TopicPolicy) -> list[ClaimedItem]:
+        now = datetime.utcnow()
+        queue = self._queue(topic)
+        while queue.delayed and queue.delayed[0][0] <= now:
+            _, version, item_id = heapq.heappop(queue.delayed)
+            item = self._items.get(item_id)
+            if item is not None and item.version == version:
+                self._push_ready(item)
+
+        limit = max_items
+        if policy.max_concurrency is not None:
+            limit = min(limit, policy.max_concurrency - len(queue.processing))
+
+        # Merge the owner lanes by (slot, priority, seq). FIFO mode keeps every slot at 0; fair
+        # mode numbers each owner's turns after its current leases, as in manager._fair_share_ids.
+        fair = policy.fair_share
+        owner_cap = policy.max_inflight_per_owner if fair else None
+        in_flight = Counter(self._items[item_id].owner_id for item_id in queue.processing) if fair else Counter()
+        heads: list[tuple[int, int, int, str]] = []
+        for owner_id, lane in list(queue.ready.items()):
+            head = self._head(lane)
+            if head is None:
+                del queue.ready[owner_id]
+                continue
+            heads.append((in_flight[owner_id] + 1 if fair else 0, -head.priority, head.seq, owner_id))
+        heapq.heapify(heads)
+
+        claimed: list[ClaimedItem] = []
+        while heads and len(claimed) < limit:
+            slot, _, _, owner_id = heapq.heappop(heads)
+            if owner_cap is not None and slot > owner_cap:
+                # heads is ordered by slot, so every remaining owner is at its cap too.
+                break
+            lane = queue.ready[owner_id]
+            _, _, _, item_id = heapq.heappop(lane)
+            item = self._items[item_id]
+            following = self._head(lane)
+            if following is not None:
+                heapq.heappush(heads, (slot + 1 if fair else 0, -following.priority, following.seq, owner_id))
+            item.status = "processing"
+            item.attempts += 1
+            item.claimed_until = now + timedelta(seconds=policy.visibility_timeout_seconds)
+            item.claimed_at = now
+            item.version += 1
+            queue.processing.add(item_id)
+            claimed.append(
+                ClaimedItem(item.id, item.topic, item.payload, item.attempts, item.priority, item.available_at)
+            )
+        return claimed
+
+    async def ack_many(self, item_ids: list[UUID]) -> list[AckedItem]:
+        acknowledged: list[AckedItem] = []
+        for item_id in item_ids:
+            item = self._items.get(item_id)
+            if item is None:
+                continue
+            self._remove(item)
+            acknowledged.append(AckedItem(item.topic, item.claimed_at if item.status == "processing" else None))
+        return acknowledged
+
+    def _dead_letter(self, item: _Item, *, now: datetime, error: Optional[str]) -> None:
+        self._remove(item)
+        self._dead.setdefault(item.topic, {})[item.id] = DeadLetterRecord(
+            id=item.id,
+            topic=item.topic,
+            payload=item.payload,
+            attempts=item.attempts,
+            last_error=error,
+            created_at=item.created_at,
+            dead_at=now,
+        )
+
+    def _requeue(self, item: _Item, *, available_at: datetime) -> None:
+        queue = self._queue(item.topic)
+        queue.processing.discard(item.id)
+        item.status = "pending"
+        item.claimed_until = None
+        item.available_at = available_at
+        item.version += 1
+        heapq.heappush(queue.delayed, (available_at, item.version, item.id))
+
+    async def fail_many(
+        self,
+        item_ids: list[UUID],
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str] = None,
+    ) -> FailResult:
+        now = datetime.utcnow()
+        requeued = dead_lettered = 0
+        for item_id in item_ids:
+            item = self._items.get(item_id)
+            if item is None or item.status != "processing":
+                continue
+            retry = policies.get(item.topic, default_policy)
+            if retry.exhausted(item.attempts):
+                self._dead_letter(item, now=now, error=error)
+                dead_lettered += 1
+            else:
+                self._requeue(item, available_at=now + timedelta(seconds=retry.next_delay_seconds(item.attempts)))
+                requeued += 1
+        return FailResult(requeued=requeued, dead_lettered=dead_lettered)
+
+    async def extend(self, item_id: UUID, *, lease_seconds: int) -> Optional[datetime]:
+        item = self._items.get(item_id)
+        if item is None or item.status != "processing":
+            return None
+        item.claimed_until = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        return item.claimed_until
+
+    async def release_expired(
+        self,
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+    ) -> FailResult:
+        now = datetime.utcnow()
+        requeued = dead_lettered = 0
+        for topic, queue in self._topics.items():
+            expired = [
+                self._items[item_id]
+                for item_id in queue.processing
+                if self._items[item_id].claimed_until is not None and self._items[item_id].claimed_until < now
+            ]
+            for item in expired:
+                if policies.get(topic, default_policy).exhausted(item.attempts):
+                    self._dead_letter(item, now=now, error="lease expired")
+                    dead_lettered += 1
+                else:
+                    self._requeue(item, available_at=now)
+                    requeued += 1
+            if expired:
+                self.notifier.wake(topic)
+        return FailResult(requeued=requeued, dead_lettered=dead_lettered)
+
+    async def promote_aged(self, *, aging_seconds: float, max_priority: int) -> int:
+        now = datetime.utcnow()
+        promoted = 0
+        for item in self._items.values():
+            if item.status != "pending" or item.priority >= max_priority:
+                continue
+            level = min(max_priority, int((now - item.created_at).total_seconds() // aging_seconds))
+            if level <= item.priority:
+                continue
+            item.priority = level
+            self._reschedule(item, now)
+            promoted += 1
+        return promoted
+
+    def _select_dead(self, topic: str, item_ids: Optional[list[UUID]]) -> list[UUID]:
+        dead = self._dead.get(topic, {})
+        if item_ids is None:
+            return list(dead)
+        return [item_id for item_id in item_ids if item_id in dead]
+
+    async def list_dead_letters(self, topic: str, *, limit: int, offset: int) -> list[DeadLetterRecord]:
+        # Insertion order is dead_at order.
+        return list(itertools.islice(self._dead.get(topic, {}).values(), offset, offset + limit))
+
+    async def replay_dead_letters(
+        self,
+        topic: str,
+        item_ids: Optional[list[UUID]] = None,
+        *,
+        priority: int = 0,
+    ) -> int:
+        now = datetime.utcnow()
+        selected = self._select_dead(topic, item_ids)
+        for item_id in selected:
+            record = self._dead[topic].pop(item_id)
+            self._add(record.id, record.topic, record.payload, now, priority, _owner_of(record.payload))
+        if selected:
+            self.notifier.wake(topic)
+        return len(selected)
+
+    async def purge_dead_letters(self, topic: str, item_ids: Optional[list[UUID]] = None) -> int:
+        selected = self._select_dead(topic, item_ids)
+        for item_id in selected:
+            del self._dead[topic][item_id]
+        return len(selected)
+
+    async def queue_stats(self) -> list[TopicStats]:
+        now = datetime.utcnow()
+        counts: dict[str, Counter[str]] = {}
+        oldest: dict[str, datetime] = {}
+        for item in self._items.values():
+            if item.status == "processing":
+                state = "processing"
+            else:
+                state = "pending" if item.available_at <= now else "delayed"
+                if item.topic not in oldest or item.created_at < oldest[item.topic]:
+                    oldest[item.topic] = item.created_at
+            counts.setdefault(item.topic, Counter())[state] += 1
+        stats: list[TopicStats] = []
+        for topic in sorted(set(counts) | {topic for topic, dead in self._dead.items() if dead}):
+            count = counts.get(topic, Counter())
+            stats.append(
+                TopicStats(
+                    topic=topic,
+                    pending=count["pending"],
+                    delayed=count["delayed"],
+                    processing=count["processing"],
+                    dead_letters=len(self._dead.get(topic, {})),
+                    oldest_pending_at=oldest.get(topic),
+                )
+            )
+        return stats
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from ...core.config import Settings
+from ...db import partitions
+from ...db.session import SessionLocal, engine
+from .. import manager
+from ..notifier import TopicNotifier
+from ..policy import RetryPolicy
+from ..topics import TopicPolicy
+from .base import AckedItem, ClaimedItem, DeadLetterRecord, EnqueuedItem, FailResult, QueueBackend, TopicStats
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresTopicNotifier(TopicNotifier):
+    """Wake parked claim requests when Postgres sends a NOTIFY for their topic."""
+
+    def __init__(self, dsn: str, channel: str, *, reconnect_delay_seconds: float = 2.0) -> None:
+        super().__init__()
+        self._dsn = make_url(dsn).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._channel = channel
+        self._reconnect_delay_seconds = reconnect_delay_seconds
+        self._connection: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+        self._closing = False
+
+    async def start(self) -> None:
+        self._closing = False
+        try:
+            await self._connect()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to LISTEN on '%s'; claims fall back to bounded waits", self._channel)
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+        self.wake_all()
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self._dsn)
+        connection.add_termination_listener(self._on_termination)
+        await connection.add_listener(self._channel, self._on_notification)
+        self._connection = connection
+        logger.info("Listening for queue notifications on '%s'", self._channel)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        self.wake(payload)
+
+    def _on_termination(self, connection: asyncpg.Connection) -> None:
+        if self._closing:
+            return
+        logger.warning("Queue notification connection lost; reconnecting")
+        self._connection = None
+        # Waiters re-check the queue instead of sleeping through the outage.
+        self.wake_all()
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(self._reconnect_delay_seconds)
+            try:
+                await self._connect()
+                self.wake_all()
+                return
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to re-establish LISTEN on '%s'", self._channel)
+
+
+class PostgresBackend(QueueBackend):
+    """Default backend: the SQL in ``queue.manager`` against ``broker.queue_items``."""
+
+    def __init__(self, config: Settings) -> None:
+        self.notifier = PostgresTopicNotifier(config.postgres_dsn, config.notify_channel)
+
+    async def sync_topics(self, topics: dict[str, TopicPolicy]) -> None:
+        storage = {name: policy.autovacuum for name, policy in topics.items()}
+        async with engine.begin() as connection:
+            created = await connection.run_sync(partitions.ensure_partitions, storage)
+        if created:
+            logger.info("Created queue partitions for topics %s", ", ".join(created))
+
+    async def enqueue_many(
+        self,
+        topic: str,
+        payloads: list[str],
+        *,
+        priority: int = 0,
+        owner_ids: Optional[list[str]] = None,
+        dedup_keys: Optional[list[Optional[str]]] = None,
+    ) -> list[EnqueuedItem]:
+        async with SessionLocal() as session:
+            items = await manager.enqueue_many(
+                session,
+                topic,
+                payloads,
+                priority=priority,
+                owner_ids=owner_ids,
+                dedup_keys=dedup_keys,
+            )
+            await session.commit()
+        return items
+
+    async def claim_many(self, topic: str, *, max_items: int, policy: TopicPolicy) -> list[ClaimedItem]:
+        # Each attempt commits and returns its connection, so parked long-polls hold no pool slot.
+        async with SessionLocal() as session:
+            items = await manager.claim_many(
+                session,
+                topic,
+                max_items=max_items,
+                visibility_timeout_seconds=policy.visibility_timeout_seconds,
+                max_concurrency=policy.max_concurrency,
+                fair_share=policy.fair_share,
+                max_inflight_per_owner=policy.max_inflight_per_owner,
+            )
+            await session.commit()
+        return items
+
+    async def ack_many(self, item_ids: list[UUID]) -> list[AckedItem]:
+        async with SessionLocal() as session:
+            acknowledged = await manager.ack_many(session, item_ids)
+            await session.commit()
+        return acknowledged
+
+    async def fail_many(
+        self,
+        item_ids: list[UUID],
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str] = None,
+    ) -> FailResult:
+        async with SessionLocal() as session:
+            result = await manager.fail_many(
+                session,
+                item_ids,
+                policies=policies,
+                default_policy=default_policy,
+                error=error,
+            )
+            await session.commit()
+        return result
+
+    async def extend(self, item_id: UUID, *, lease_seconds: int) -> Optional[datetime]:
+        async with SessionLocal() as session:
+            claimed_until = await manager.extend(session, item_id, lease_seconds=lease_seconds)
+            await session.commit()
+        return claimed_until
+
+    async def release_expired(
+        self,
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+    ) -> FailResult:
+        async with SessionLocal() as session:
+            result = await manager.release_expired(session, policies=policies, default_policy=default_policy)
+            await session.commit()
+        return result
+
+    async def promote_aged(self, *, aging_seconds: float, max_priority: int) -> int:
+        async with SessionLocal() as session:
+            promoted = await manager.promote_aged(session, aging_seconds=aging_seconds, max_priority=max_priority)
+            await session.commit()
+        return promoted
+
+    async def list_dead_letters(self, topic: str, *, limit: int, offset: int) -> list[DeadLetterRecord]:
+        async with SessionLocal() as session:
+            items = await manager.list_dead_letters(session, topic, limit=limit, offset=offset)
+        return [
+            DeadLetterRecord(
+                id=item.id,
+                topic=item.topic,
+                payload=item.payload,
+                attempts=item.attempts,
+                last_error=item.last_error,
+                created_at=item.created_at,
+                dead_at=item.dead_at,
+            )
+            for item in items
+        ]
+
+    async def replay_dead_letters(
+        self,
+        topic: str,
+        item_ids: Optional[list[UUID]] = None,
+        *,
+        priority: int = 0,
+    ) -> int:
+        async with SessionLocal() as session:
+            replayed = await manager.replay_dead_letters(session, topic, item_ids, priority=priority)
+            await session.commit()
+        return replayed
+
+    async def purge_dead_letters(self, topic: str, item_ids: Optional[list[UUID]] = None) -> int:
+        async with SessionLocal() as session:
+            purged = await manager.purge_dead_letters(session, topic, item_ids)
+            await session.commit()
+        return purged
+
+    async def queue_stats(self) -> list[TopicStats]:
+        async with SessionLocal() as session:
+            return await manager.queue_stats(session)
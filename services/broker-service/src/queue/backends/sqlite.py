@@ -0,0 +1,542 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+from uuid import UUID, uuid4
+
+from ..notifier import TopicNotifier
+from ..policy import RetryPolicy
+from ..topics import TopicPolicy
+from .base import AckedItem, ClaimedItem, DeadLetterRecord, EnqueuedItem, FailResult, QueueBackend, TopicStats
+
+T = TypeVar("T")
+
+# Stay well under SQLite's host-parameter limit when expanding id lists.
+_ID_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_items (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    owner_id TEXT NOT NULL DEFAULT '',
+    dedup_key TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    claimed_until REAL,
+    claimed_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_queue_items_claim
+    ON queue_items (topic, priority DESC, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS ix_queue_items_owner_claim
+    ON queue_items (topic, owner_id, priority DESC, created_at) WHERE status = 'pending';
+CREATE UNIQUE INDEX IF NOT EXISTS ux_queue_items_dedup
+    ON queue_items (topic, dedup_key) WHERE dedup_key IS NOT NULL AND status IN ('pending', 'processing');
+CREATE INDEX IF NOT EXISTS ix_queue_items_processing
+    ON queue_items (topic, claimed_until) WHERE status = 'processing';
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    dead_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_dead_letters_topic_dead_at ON dead_letters (topic, dead_at);
+"""
+
+STATS_SQL = """
+SELECT topic,
+       sum(status = 'pending' AND available_at <= :now),
+       sum(status = 'pending' AND available_at > :now),
+       sum(status = 'processing'),
+       min(CASE WHEN status = 'pending' THEN created_at END)
+FROM queue_items
+GROUP BY topic
+"""
+
+# status is spelled out rather than bound so the planner can match the partial indexes.
+CLAIM_SQL = """
+UPDATE queue_items
+SET status = 'processing', attempts = attempts + 1, claimed_until = :claimed_until, claimed_at = :now, updated_at = :now
+WHERE id IN (
+    SELECT id FROM queue_items
+    WHERE topic = :topic AND status = 'pending' AND available_at <= :now
+    ORDER BY priority DESC, created_at, rowid
+    LIMIT :limit
+)
+RETURNING id, topic, payload, attempts, priority, created_at, available_at
+"""
+
+# Fair-share variant of CLAIM_SQL: each owner's pending items are numbered by turn, shifted
+# by the owner's current leases, and the batch is filled lowest slot first.
+FAIR_CLAIM_SQL = """
+UPDATE queue_items
+SET status = 'processing', attempts = attempts + 1, claimed_until = :claimed_until, claimed_at = :now, updated_at = :now
+WHERE id IN (
+    SELECT heads.id
+    FROM (
+        SELECT id, owner_id, priority, created_at,
+               row_number() OVER (PARTITION BY owner_id ORDER BY priority DESC, created_at, rowid) AS turn
+        FROM queue_items
+        WHERE topic = :topic AND status = 'pending' AND available_at <= :now
+    ) AS heads
+    LEFT JOIN (
+        SELECT owner_id, count(*) AS leases
+        FROM queue_items
+        WHERE topic = :topic AND status = 'processing'
+        GROUP BY owner_id
+    ) AS in_flight ON in_flight.owner_id = heads.owner_id
+    WHERE :owner_cap IS NULL OR heads.turn + coalesce(in_flight.leases, 0) <= :owner_cap
+    ORDER BY heads.turn + coalesce(in_flight.leases, 0), heads.priority DESC, heads.created_at
+    LIMIT :limit
+)
+RETURNING id, topic, payload, attempts, priority, created_at, available_at
+"""
+
+INSERT_SQL = """
+INSERT INTO queue_items (id, topic, payload, owner_id, dedup_key, priority, available_at, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Same upsert as manager._upsert_keyed: keep the live item, raise its priority, return its id.
+UPSERT_SQL = (
+    INSERT_SQL
+    + """
+ON CONFLICT (topic, dedup_key) WHERE dedup_key IS NOT NULL AND status IN ('pending', 'processing')
+DO UPDATE SET priority = max(priority, excluded.priority)
+RETURNING id
+"""
+)
+
+PROMOTE_SQL = """
+UPDATE queue_items
+SET priority = min(:max_priority, CAST((:now - created_at) / :aging_seconds AS INTEGER)), updated_at = :now
+WHERE status = 'pending'
+  AND priority < min(:max_priority, CAST((:now - created_at) / :aging_seconds AS INTEGER))
+"""
+
+
+def _chunks(values: list[str]) -> Iterator[list[str]]:
+    for offset in range(0, len(values), _ID_CHUNK):
+        yield values[offset : offset + _ID_CHUNK]
+
+
+def _placeholders(values: list[str]) -> str:
+    return ", ".join("?" * len(values))
+
+
+def _to_datetime(value: float) -> datetime:
+    return datetime.utcfromtimestamp(value)
+
+
+class SqliteBackend(QueueBackend):
+    """Single-file queue for single-node installs that need durability without Postgres.
+
+    The database runs in WAL mode with ``synchronous=NORMAL``: readers never block the
+    writer and a commit costs one WAL append rather than a full fsync. One worker
+    thread owns the connection, so every operation is serialized and each runs in its
+    own ``BEGIN IMMEDIATE`` transaction. Only one broker process may use the file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.notifier = TopicNotifier()
+        self._path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-queue")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    async def start(self) -> None:
+        await self._run(self._open)
+        await super().start()
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _open(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly in _transaction.
+        connection = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        self._upgrade(connection)
+        connection.executescript(SCHEMA)
+        self._connection = connection
+
+    @staticmethod
+    def _upgrade(connection: sqlite3.Connection) -> None:
+        # Files from older releases: add missing columns and let SCHEMA (re)build the indexes.
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(queue_items)")}
+        if columns and "priority" not in columns:
+            connection.execute("ALTER TABLE queue_items ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            connection.execute("DROP INDEX IF EXISTS ix_queue_items_claim")
+        if columns and "owner_id" not in columns:
+            connection.execute("ALTER TABLE queue_items ADD COLUMN owner_id TEXT NOT NULL DEFAULT ''")
+            connection.execute(
+                "UPDATE queue_items SET owner_id = coalesce(json_extract(payload, '$.owner_id'), '')"
+            )
+        if columns and "dedup_key" not in columns:
+            connection.execute("ALTER TABLE queue_items ADD COLUMN dedup_key TEXT")
+        if columns and "claimed_at" not in columns:
+            connection.execute("ALTER TABLE queue_items ADD COLUMN claimed_at REAL")
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _transaction(self, fn: Callable[..., T], *args: Any) -> T:
+        connection = self._connection
+        if connection is None:
+            raise RuntimeError("sqlite queue backend is not started")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(connection, *args)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    async def _execute(self, fn: Callable[..., T], *args: Any) -> T:
+        return await self._run(self._transaction, fn, *args)
+
+    async def enqueue_many(
+        self,
+        topic: str,
+        payloads: list[str],
+        *,
+        priority: int = 0,
+        owner_ids: Optional[list[str]] = None,
+        dedup_keys: Optional[list[Optional[str]]] = None,
+    ) -> list[EnqueuedItem]:
+        rows = list(
+            zip(
+                [str(uuid4()) for _ in payloads],
+                payloads,
+                owner_ids or [""] * len(payloads),
+                dedup_keys or [None] * len(payloads),
+            )
+        )
+        stored = await self._execute(self._insert, topic, rows, priority)
+        items = [EnqueuedItem(UUID(item_id), duplicate=item_id != row[0]) for item_id, row in zip(stored, rows)]
+        if not all(item.duplicate for item in items):
+            self.notifier.wake(topic)
+        return items
+
+    @staticmethod
+    def _insert(
+        connection: sqlite3.Connection,
+        topic: str,
+        rows: list[tuple[str, str, str, Optional[str]]],
+        priority: int,
+    ) -> list[str]:
+        now = time.time()
+        params = [
+            (item_id, topic, payload, owner_id, dedup_key, priority, now, now, now)
+            for item_id, payload, owner_id, dedup_key in rows
+        ]
+        if all(dedup_key is None for _, _, _, dedup_key in rows):
+            connection.executemany(INSERT_SQL, params)
+            return [item_id for item_id, _, _, _ in rows]
+        # RETURNING rules out executemany; rows run one by one inside the same transaction.
+        stored = []
+        for row, values in zip(rows, params):
+            if row[3] is None:
+                connection.execute(INSERT_SQL, values)
+                stored.append(row[0])
+            else:
+                stored.append(connection.execute(UPSERT_SQL, values).fetchone()[0])
+        return stored
+
+    async def claim_many(self, topic: str, *, max_items: int, policy: TopicPolicy) -> list[ClaimedItem]:
+        return await self._execute(self._claim, topic, max_items, policy)
+
+    @staticmethod
+    def _claim(connection: sqlite3.Connection, topic: str, max_items: int, policy: TopicPolicy) -> list[ClaimedItem]:
+        now = time.time()
+        limit = max_items
+        if policy.max_concurrency is not None:
+            (inflight,) = connection.execute(
+                "SELECT count(*) FROM queue_items WHERE topic = ? AND status = 'processing'", (topic,)
+            ).fetchone()
+            limit = min(limit, policy.max_concurrency - inflight)
+        if limit <= 0:
+            return []
+        params = {
+            "topic": topic,
+            "now": now,
+            "limit": limit,
+            "claimed_until": now + policy.visibility_timeout_seconds,
+        }
+        if policy.fair_share:
+            rows = connection.execute(FAIR_CLAIM_SQL, {**params, "owner_cap": policy.max_inflight_per_owner}).fetchall()
+        else:
+            rows = connection.execute(CLAIM_SQL, params).fetchall()
+        # RETURNING order is unspecified; hand items out in claim order like the other backends.
+        rows.sort(key=lambda row: (-row[4], row[5]))
+        return [ClaimedItem(UUID(row[0]), row[1], row[2], row[3], row[4], _to_datetime(row[6])) for row in rows]
+
+    async def ack_many(self, item_ids: list[UUID]) -> list[AckedItem]:
+        rows = await self._execute(self._ack, [str(item_id) for item_id in item_ids])
+        return [
+            AckedItem(topic, _to_datetime(claimed_at) if claimed_at is not None else None)
+            for topic, claimed_at in rows
+        ]
+
+    @staticmethod
+    def _ack(connection: sqlite3.Connection, ids: list[str]) -> list[tuple[str, Optional[float]]]:
+        acknowledged: list[tuple[str, Optional[float]]] = []
+        for chunk in _chunks(ids):
+            acknowledged.extend(
+                connection.execute(
+                    f"DELETE FROM queue_items WHERE id IN ({_placeholders(chunk)})"
+                    " RETURNING topic, CASE WHEN status = 'processing' THEN claimed_at END",
+                    chunk,
+                ).fetchall()
+            )
+        return acknowledged
+
+    @staticmethod
+    def _settle(
+        connection: sqlite3.Connection,
+        rows: list[tuple[str, str, int]],
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str],
+        retry_delay: Callable[[RetryPolicy, int], float],
+    ) -> FailResult:
+        """Dead-letter exhausted ``(id, topic, attempts)`` rows and return the rest to pending."""
+        now = time.time()
+        dead: list[str] = []
+        requeue: list[tuple[float, float, str]] = []
+        for item_id, topic, attempts in rows:
+            retry = policies.get(topic, default_policy)
+            if retry.exhausted(attempts):
+                dead.append(item_id)
+            else:
+                requeue.append((now + retry_delay(retry, attempts), now, item_id))
+        for chunk in _chunks(dead):
+            connection.execute(
+                "INSERT INTO dead_letters (id, topic, payload, attempts, last_error, created_at, dead_at)"
+                " SELECT id, topic, payload, attempts, ?, created_at, ?"
+                f" FROM queue_items WHERE id IN ({_placeholders(chunk)})",
+                [error, now, *chunk],
+            )
+            connection.execute(f"DELETE FROM queue_items WHERE id IN ({_placeholders(chunk)})", chunk)
+        connection.executemany(
+            "UPDATE queue_items SET status = 'pending', claimed_until = NULL, available_at = ?, updated_at = ?"
+            " WHERE id = ?",
+            requeue,
+        )
+        return FailResult(requeued=len(requeue), dead_lettered=len(dead))
+
+    async def fail_many(
+        self,
+        item_ids: list[UUID],
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str] = None,
+    ) -> FailResult:
+        return await self._execute(
+            self._fail, [str(item_id) for item_id in item_ids], policies, default_policy, error
+        )
+
+    def _fail(
+        self,
+        connection: sqlite3.Connection,
+        ids: list[str],
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        error: Optional[str],
+    ) -> FailResult:
+        rows: list[tuple[str, str, int]] = []
+        for chunk in _chunks(ids):
+            rows.extend(
+                connection.execute(
+                    "SELECT id, topic, attempts FROM queue_items"
+                    f" WHERE status = 'processing' AND id IN ({_placeholders(chunk)})",
+                    chunk,
+                ).fetchall()
+            )
+        return self._settle(
+            connection,
+            rows,
+            policies=policies,
+            default_policy=default_policy,
+            error=error,
+            retry_delay=RetryPolicy.next_delay_seconds,
+        )
+
+    async def extend(self, item_id: UUID, *, lease_seconds: int) -> Optional[datetime]:
+        claimed_until = await self._execute(self._extend, str(item_id), lease_seconds)
+        return _to_datetime(claimed_until) if claimed_until is not None else None
+
+    @staticmethod
+    def _extend(connection: sqlite3.Connection, item_id: str, lease_seconds: int) -> Optional[float]:
+        now = time.time()
+        row = connection.execute(
+            "UPDATE queue_items SET claimed_until = ?, updated_at = ?"
+            " WHERE id = ? AND status = 'processing' RETURNING claimed_until",
+            (now + lease_seconds, now, item_id),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    async def release_expired(
+        self,
+        *,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+    ) -> FailResult:
+        result, topics = await self._execute(self._release_expired, policies, default_policy)
+        for topic in topics:
+            self.notifier.wake(topic)
+        return result
+
+    def _release_expired(
+        self,
+        connection: sqlite3.Connection,
+        policies: dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+    ) -> tuple[FailResult, set[str]]:
+        rows = connection.execute(
+            "SELECT id, topic, attempts FROM queue_items WHERE status = 'processing' AND claimed_until < ?",
+            (time.time(),),
+        ).fetchall()
+        result = self._settle(
+            connection,
+            rows,
+            policies=policies,
+            default_policy=default_policy,
+            error="lease expired",
+            # Expired leases go straight back to pending, as in the Postgres sweep.
+            retry_delay=lambda retry, attempts: 0.0,
+        )
+        return result, {row[1] for row in rows}
+
+    async def promote_aged(self, *, aging_seconds: float, max_priority: int) -> int:
+        return await self._execute(self._promote_aged, aging_seconds, max_priority)
+
+    @staticmethod
+    def _promote_aged(connection: sqlite3.Connection, aging_seconds: float, max_priority: int) -> int:
+        params = {"now": time.time(), "aging_seconds": aging_seconds, "max_priority": max_priority}
+        return connection.execute(PROMOTE_SQL, params).rowcount
+
+    async def list_dead_letters(self, topic: str, *, limit: int, offset: int) -> list[DeadLetterRecord]:
+        rows = await self._execute(self._list_dead_letters, topic, limit, offset)
+        return [
+            DeadLetterRecord(
+                id=UUID(row[0]),
+                topic=row[1],
+                payload=row[2],
+                attempts=row[3],
+                last_error=row[4],
+                created_at=_to_datetime(row[5]),
+                dead_at=_to_datetime(row[6]),
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _list_dead_letters(connection: sqlite3.Connection, topic: str, limit: int, offset: int) -> list[tuple]:
+        return connection.execute(
+            "SELECT id, topic, payload, attempts, last_error, created_at, dead_at FROM dead_letters"
+            " WHERE topic = ? ORDER BY dead_at LIMIT ? OFFSET ?",
+            (topic, limit, offset),
+        ).fetchall()
+
+    @staticmethod
+    def _select_dead(connection: sqlite3.Connection, topic: str, item_ids: Optional[list[UUID]]) -> list[str]:
+        if item_ids is None:
+            rows = connection.execute("SELECT id FROM dead_letters WHERE topic = ?", (topic,)).fetchall()
+            return [row[0] for row in rows]
+        ids = [str(item_id) for item_id in item_ids]
+        selected: list[str] = []
+        for chunk in _chunks(ids):
+            rows = connection.execute(
+                f"SELECT id FROM dead_letters WHERE topic = ? AND id IN ({_placeholders(chunk)})",
+                [topic, *chunk],
+            ).fetchall()
+            selected.extend(row[0] for row in rows)
+        return selected
+
+    async def replay_dead_letters(
+        self,
+        topic: str,
+        item_ids: Optional[list[UUID]] = None,
+        *,
+        priority: int = 0,
+    ) -> int:
+        replayed = await self._execute(self._replay, topic, item_ids, priority)
+        if replayed:
+            self.notifier.wake(topic)
+        return replayed
+
+    def _replay(
+        self,
+        connection: sqlite3.Connection,
+        topic: str,
+        item_ids: Optional[list[UUID]],
+        priority: int,
+    ) -> int:
+        now = time.time()
+        selected = self._select_dead(connection, topic, item_ids)
+        for chunk in _chunks(selected):
+            connection.execute(
+                "INSERT INTO queue_items"
+                " (id, topic, payload, owner_id, priority, available_at, created_at, updated_at)"
+                " SELECT id, topic, payload, coalesce(json_extract(payload, '$.owner_id'), ''), ?, ?, ?, ?"
+                f" FROM dead_letters WHERE id IN ({_placeholders(chunk)})",
+                [priority, now, now, now, *chunk],
+            )
+            connection.execute(f"DELETE FROM dead_letters WHERE id IN ({_placeholders(chunk)})", chunk)
+        return len(selected)
+
+    async def purge_dead_letters(self, topic: str, item_ids: Optional[list[UUID]] = None) -> int:
+        return await self._execute(self._purge, topic, item_ids)
+
+    def _purge(self, connection: sqlite3.Connection, topic: str, item_ids: Optional[list[UUID]]) -> int:
+        selected = self._select_dead(connection, topic, item_ids)
+        for chunk in _chunks(selected):
+            connection.execute(f"DELETE FROM dead_letters WHERE id IN ({_placeholders(chunk)})", chunk)
+        return len(selected)
+
+    async def queue_stats(self) -> list[TopicStats]:
+        rows, dead = await self._execute(self._queue_stats)
+        stats = {
+            topic: TopicStats(
+                topic=topic,
+                pending=pending,
+                delayed=delayed,
+                processing=processing,
+                dead_letters=dead.pop(topic, 0),
+                oldest_pending_at=_to_datetime(oldest) if oldest is not None else None,
+            )
+            for topic, pending, delayed, processing, oldest in rows
+        }
+        for topic, count in dead.items():
+            stats[topic] = TopicStats(topic, 0, 0, 0, count, None)
+        return [stats[topic] for topic in sorted(stats)]
+
+    @staticmethod
+    def _queue_stats(connection: sqlite3.Connection) -> tuple[list[tuple], dict[str, int]]:
+        rows = connection.execute(STATS_SQL, {"now": time.time()}).fetchall()
+        dead = connection.execute("SELECT topic, count(*) FROM dead_letters GROUP BY topic").fetchall()
+        return rows, dict(dead)
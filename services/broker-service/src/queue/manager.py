@@ -1,60 +1,621 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import (
+    ColumnElement,
+    SmallInteger,
+    Text,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    extract,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    text,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import Update
 
 from ..core.config import get_settings
-from ..db.models import QueueItem
+from ..db.models import DeadLetter, QueueItem
+from .backends.base import AckedItem, ClaimedItem, EnqueuedItem, FailResult, TopicStats
+from .policy import RetryPolicy
 
 settings = get_settings()
 
+# Rows per multi-VALUES upsert; keeps bind parameters well under the protocol's 32767 limit.
+DEDUP_INSERT_CHUNK = 1000
+DEDUP_INDEX_WHERE = text("dedup_key IS NOT NULL AND status IN ('pending', 'processing')")
 
-async def enqueue(session: AsyncSession, topic: str, payload: str) -> QueueItem:
-    item = QueueItem(topic=topic, payload=payload)
-    session.add(item)
-    await session.flush()
-    return item
+
+async def enqueue(
+    session: AsyncSession,
+    topic: str,
+    payload: str,
+    *,
+    priority: int = 0,
+    owner_id: str = "",
+    dedup_key: Optional[str] = None,
+) -> EnqueuedItem:
+    items = await enqueue_many(
+        session,
+        topic,
+        [payload],
+        priority=priority,
+        owner_ids=[owner_id],
+        dedup_keys=[dedup_key],
+    )
+    return items[0]
 
 
-async def claim(session: AsyncSession, topic: str) -> Optional[QueueItem]:
+async def enqueue_many(
+    session: AsyncSession,
+    topic: str,
+    payloads: list[str],
+    *,
+    priority: int = 0,
+    owner_ids: Optional[list[str]] = None,
+    dedup_keys: Optional[list[Optional[str]]] = None,
+) -> list[EnqueuedItem]:
+    """Insert ``payloads`` in order; a payload whose dedup key is already queued collapses into that item."""
     now = datetime.utcnow()
+    owner_ids = owner_ids or [""] * len(payloads)
+    dedup_keys = dedup_keys or [None] * len(payloads)
+    # Offset created_at by a microsecond per row so claims keep the batch order.
+    rows = [
+        {
+            "id": uuid4(),
+            "topic": topic,
+            "payload": payload,
+            "owner_id": owner_id,
+            "dedup_key": dedup_key,
+            "status": "pending",
+            "attempts": 0,
+            "priority": priority,
+            "available_at": now,
+            "created_at": now + timedelta(microseconds=index),
+            "updated_at": now,
+        }
+        for index, (payload, owner_id, dedup_key) in enumerate(zip(payloads, owner_ids, dedup_keys))
+    ]
+    plain = [row for row in rows if row["dedup_key"] is None]
+    # A key repeated inside the batch collapses onto its first row before reaching the table.
+    keyed = list({row["dedup_key"]: row for row in reversed(rows) if row["dedup_key"] is not None}.values())
+    if plain:
+        # RETURNING makes SQLAlchemy's insertmanyvalues send the rows as multi-row INSERTs (up to
+        # 1000 rows each); without it asyncpg runs a prepared single-row INSERT per payload.
+        await session.execute(insert(QueueItem).returning(QueueItem.id), plain)
+    ids_by_key = await _upsert_keyed(session, keyed) if keyed else {}
+
+    items = []
+    for row in rows:
+        if row["dedup_key"] is None:
+            items.append(EnqueuedItem(row["id"], duplicate=False))
+        else:
+            item_id = ids_by_key[row["dedup_key"]]
+            items.append(EnqueuedItem(item_id, duplicate=item_id != row["id"]))
+    if not all(item.duplicate for item in items):
+        await notify(session, topic)
+    return items
+
+
+async def _upsert_keyed(session: AsyncSession, rows: list[dict[str, Any]]) -> dict[str, UUID]:
+    """Insert rows carrying a dedup key, returning the live item id for every key.
+
+    On conflict the existing item is kept and only its priority is raised to the
+    newcomer's, so a duplicate sent interactively still jumps the queue. DO UPDATE
+    (rather than DO NOTHING) makes the existing row come back from RETURNING.
+    """
+    ids_by_key: dict[str, UUID] = {}
+    for offset in range(0, len(rows), DEDUP_INSERT_CHUNK):
+        stmt = pg_insert(QueueItem).values(rows[offset : offset + DEDUP_INSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[QueueItem.topic, QueueItem.dedup_key],
+            index_where=DEDUP_INDEX_WHERE,
+            set_={"priority": func.greatest(QueueItem.priority, stmt.excluded.priority)},
+        ).returning(QueueItem.dedup_key, QueueItem.id)
+        result = await session.execute(stmt)
+        ids_by_key.update({key: item_id for key, item_id in result.all()})
+    return ids_by_key
+
+
+async def notify(session: AsyncSession, topic: str) -> None:
+    # Delivered by Postgres on commit, so long-polling claims only wake once the row is visible.
+    await session.execute(select(func.pg_notify(settings.notify_channel, topic)))
+
+
+async def claim(
+    session: AsyncSession,
+    topic: str,
+    *,
+    visibility_timeout_seconds: int,
+    max_concurrency: Optional[int] = None,
+) -> Optional[ClaimedItem]:
+    items = await claim_many(
+        session,
+        topic,
+        max_items=1,
+        visibility_timeout_seconds=visibility_timeout_seconds,
+        max_concurrency=max_concurrency,
+    )
+    return items[0] if items else None
+
+
+async def claim_many(
+    session: AsyncSession,
+    topic: str,
+    *,
+    max_items: int,
+    visibility_timeout_seconds: int,
+    max_concurrency: Optional[int] = None,
+    fair_share: bool = False,
+    max_inflight_per_owner: Optional[int] = None,
+) -> list[ClaimedItem]:
+    """Lock and lease up to ``max_items`` pending items in a single statement."""
+    stmt = build_claim_statement(
+        topic,
+        max_items=max_items,
+        visibility_timeout_seconds=visibility_timeout_seconds,
+        max_concurrency=max_concurrency,
+        fair_share=fair_share,
+        max_inflight_per_owner=max_inflight_per_owner,
+        now=datetime.utcnow(),
+    )
+    result = await session.execute(stmt)
+    return [ClaimedItem(*row) for row in result]
+
+
+def build_claim_statement(
+    topic: str,
+    *,
+    max_items: int,
+    visibility_timeout_seconds: int,
+    max_concurrency: Optional[int],
+    now: datetime,
+    fair_share: bool = False,
+    max_inflight_per_owner: Optional[int] = None,
+) -> Update:
+    # The FIFO CTE must stay servable by ix_queue_items_claim; benchmarks/claim_plan.py checks the plan.
+    limit: Any = max_items
+    if max_concurrency is not None:
+        # Best-effort cap: concurrent claimers can both see the same in-flight count.
+        in_flight = (
+            select(func.count())
+            .where(QueueItem.topic == topic)
+            .where(QueueItem.status == "processing")
+            .scalar_subquery()
+        )
+        limit = func.greatest(0, func.least(max_items, max_concurrency - in_flight))
+    if fair_share:
+        claimable = (
+            select(QueueItem.id)
+            .where(QueueItem.id.in_(_fair_share_ids(topic, now, limit, max_items, max_inflight_per_owner)))
+            # Re-checked on rows a concurrent claimer updated meanwhile, so an item it just leased is skipped.
+            .where(QueueItem.topic == topic)
+            .where(QueueItem.status == "pending")
+            .where(QueueItem.available_at <= now)
+            .with_for_update(skip_locked=True)
+            .cte("claimable")
+        )
+    else:
+        claimable = (
+            select(QueueItem.id)
+            .where(QueueItem.topic == topic)
+            .where(QueueItem.status == "pending")
+            .where(QueueItem.available_at <= now)
+            .order_by(QueueItem.priority.desc(), QueueItem.created_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("claimable")
+        )
     stmt = (
-        select(QueueItem)
+        update(QueueItem)
+        # The topic predicate prunes the update to the topic's partition.
+        .where(QueueItem.topic == topic, QueueItem.id == claimable.c.id)
+        .values(
+            status="processing",
+            attempts=QueueItem.attempts + 1,
+            claimed_until=now + timedelta(seconds=visibility_timeout_seconds),
+            claimed_at=now,
+            updated_at=now,
+        )
+        .returning(
+            QueueItem.id,
+            QueueItem.topic,
+            QueueItem.payload,
+            QueueItem.attempts,
+            QueueItem.priority,
+            QueueItem.available_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return stmt
+
+
+def _fair_share_ids(
+    topic: str,
+    now: datetime,
+    limit: Any,
+    max_items: int,
+    max_inflight_per_owner: Optional[int],
+) -> Select:
+    """Pick up to ``limit`` pending ids, taking turns across ``owner_id`` values.
+
+    Each owner's head-of-line items are numbered 1, 2, 3... and shifted by what the
+    owner already has in flight, so the batch is filled round-robin and owners
+    holding fewer leases go first. ``max_inflight_per_owner`` caps lease count per owner.
+    """
+    pending = (
+        QueueItem.topic == topic,
+        QueueItem.status == "pending",
+        QueueItem.available_at <= now,
+    )
+    owners = select(QueueItem.owner_id).where(*pending).distinct().subquery("owners")
+    # No owner can get more than one batch (or its cap) per claim, so each lateral scan is bounded
+    # and served by ix_queue_items_owner_claim.
+    per_owner = max_items if max_inflight_per_owner is None else min(max_items, max_inflight_per_owner)
+    order = (QueueItem.priority.desc(), QueueItem.created_at.asc())
+    heads = (
+        select(
+            QueueItem.id,
+            QueueItem.priority,
+            QueueItem.created_at,
+            func.row_number().over(order_by=order).label("turn"),
+        )
+        .where(*pending)
+        .where(QueueItem.owner_id == owners.c.owner_id)
+        .order_by(*order)
+        .limit(per_owner)
+        .lateral("heads")
+    )
+    in_flight = (
+        select(QueueItem.owner_id, func.count().label("leases"))
         .where(QueueItem.topic == topic)
-        .where(QueueItem.status == "pending")
-        .where(QueueItem.available_at <= now)
-        .order_by(QueueItem.created_at.asc())
-        .limit(1)
+        .where(QueueItem.status == "processing")
+        .group_by(QueueItem.owner_id)
+        .subquery("in_flight")
+    )
+    slot = heads.c.turn + func.coalesce(in_flight.c.leases, 0)
+    stmt = select(heads.c.id).select_from(
+        owners.join(heads, true()).outerjoin(
+            in_flight,
+            in_flight.c.owner_id == owners.c.owner_id,
+        )
+    )
+    if max_inflight_per_owner is not None:
+        stmt = stmt.where(slot <= max_inflight_per_owner)
+    return stmt.order_by(slot, heads.c.priority.desc(), heads.c.created_at).limit(limit)
+
+
+async def extend(session: AsyncSession, item_id: UUID, *, lease_seconds: int) -> Optional[datetime]:
+    now = datetime.utcnow()
+    stmt = (
+        update(QueueItem)
+        .where(QueueItem.id == item_id)
+        .where(QueueItem.status == "processing")
+        .values(claimed_until=now + timedelta(seconds=lease_seconds), updated_at=now)
+        .returning(QueueItem.claimed_until)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def release_expired(
+    session: AsyncSession,
+    *,
+    policies: dict[str, RetryPolicy],
+    default_policy: RetryPolicy,
+) -> FailResult:
+    """Return items whose lease ran out to ``pending``, dead-lettering exhausted ones."""
+    now = datetime.utcnow()
+    # An item that keeps crashing its worker never reaches /fail, so retries are enforced here too.
+    dead_lettered = await _dead_letter(
+        session,
+        QueueItem.status == "processing",
+        QueueItem.claimed_until < now,
+        QueueItem.attempts > _policy_value(policies, "max_retries", default_policy),
+        now=now,
+        error="lease expired",
+    )
+    # SKIP LOCKED keeps the sweep from blocking on items that are being acked or extended right now.
+    expired = (
+        select(QueueItem.id)
+        .where(QueueItem.status == "processing")
+        .where(QueueItem.claimed_until < now)
         .with_for_update(skip_locked=True)
+        .cte("expired")
+    )
+    stmt = (
+        update(QueueItem)
+        .where(QueueItem.id == expired.c.id)
+        .values(status="pending", claimed_until=None, available_at=now, updated_at=now)
+        .returning(QueueItem.topic)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    topics = [row.topic for row in result]
+    for topic in set(topics):
+        await notify(session, topic)
+    return FailResult(requeued=len(topics), dead_lettered=dead_lettered)
+
+
+async def promote_aged(session: AsyncSession, *, aging_seconds: float, max_priority: int) -> int:
+    """Age pending items up one priority level per ``aging_seconds`` waited, capped at ``max_priority``.
+
+    Only rows whose computed level is above their stored priority are written, so a
+    sweep within the same aging step touches nothing. Each write is still a non-HOT
+    update, as ``priority`` is a key of the claim index, so an item that waits long
+    enough costs up to ``max_priority`` extra heap and index tuples on its topic's
+    partition. Raise ``PRIORITY_AGING_SECONDS`` on topics with deep backlogs.
+    """
+    now = datetime.utcnow()
+    waited = extract("epoch", literal(now) - QueueItem.created_at)
+    level = func.least(max_priority, func.floor(waited / aging_seconds)).cast(SmallInteger)
+    stmt = (
+        update(QueueItem)
+        .where(QueueItem.status == "pending")
+        .where(QueueItem.priority < max_priority)
+        .where(QueueItem.created_at < now - timedelta(seconds=aging_seconds))
+        .where(QueueItem.priority < level)
+        .values(priority=level, updated_at=now)
+        .execution_options(synchronize_session=False)
     )
     result = await session.execute(stmt)
-    item = result.scalar_one_or_none()
-    if item is None:
-        return None
-    item.claim(settings.visibility_timeout_seconds)
-    return item
+    return result.rowcount
 
 
-async def get_item(session: AsyncSession, item_id: str) -> Optional[QueueItem]:
+async def get_item(session: AsyncSession, item_id: UUID) -> Optional[QueueItem]:
     stmt = select(QueueItem).where(QueueItem.id == item_id)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def ack(session: AsyncSession, item_id: str) -> bool:
-    item = await get_item(session, item_id)
-    if item is None:
-        return False
-    await session.delete(item)
-    return True
+async def ack(session: AsyncSession, item_id: UUID) -> bool:
+    stmt = (
+        delete(QueueItem)
+        .where(QueueItem.id == item_id)
+        .returning(QueueItem.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return result.first() is not None
+
+
+async def fail(
+    session: AsyncSession,
+    item_id: UUID,
+    *,
+    policies: dict[str, RetryPolicy],
+    default_policy: RetryPolicy,
+    error: Optional[str] = None,
+) -> FailResult:
+    return await fail_many(session, [item_id], policies=policies, default_policy=default_policy, error=error)
+
+
+def _ids_param(item_ids: list[UUID]):
+    return any_(bindparam("item_ids", item_ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+
+
+async def ack_many(session: AsyncSession, item_ids: list[UUID]) -> list[AckedItem]:
+    # claimed_at is stale on an item that went back to pending, so it is only reported for leases.
+    claimed_at = case((QueueItem.status == "processing", QueueItem.claimed_at), else_=None)
+    stmt = (
+        delete(QueueItem)
+        .where(QueueItem.id == _ids_param(item_ids))
+        .returning(QueueItem.topic, claimed_at)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return [AckedItem(*row) for row in result]
+
+
+async def fail_many(
+    session: AsyncSession,
+    item_ids: list[UUID],
+    *,
+    policies: dict[str, RetryPolicy],
+    default_policy: RetryPolicy,
+    error: Optional[str] = None,
+) -> FailResult:
+    now = datetime.utcnow()
+    dead_lettered = await _dead_letter(
+        session,
+        QueueItem.id == _ids_param(item_ids),
+        QueueItem.status == "processing",
+        QueueItem.attempts > _policy_value(policies, "max_retries", default_policy),
+        now=now,
+        error=error,
+    )
+    stmt = (
+        update(QueueItem)
+        .where(QueueItem.id == _ids_param(item_ids))
+        .where(QueueItem.status == "processing")
+        .values(
+            status="pending",
+            claimed_until=None,
+            available_at=bindparam("now", now)
+            + literal_column("interval '1 second'") * _retry_delay_seconds(policies, default_policy),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return FailResult(requeued=result.rowcount, dead_lettered=dead_lettered)
+
+
+def _policy_value(policies: dict[str, RetryPolicy], field: str, default_policy: RetryPolicy) -> ColumnElement:
+    # Items from different topics share one statement; the CASE picks each topic's setting.
+    values = {topic: getattr(policy, field) for topic, policy in policies.items()}
+    fallback = getattr(default_policy, field)
+    if not values:
+        return literal(fallback)
+    return case(values, value=QueueItem.topic, else_=fallback)
+
+
+def _retry_delay_seconds(policies: dict[str, RetryPolicy], default_policy: RetryPolicy) -> ColumnElement:
+    base = _policy_value(policies, "base_delay_seconds", default_policy)
+    cap = _policy_value(policies, "max_delay_seconds", default_policy)
+    jitter = _policy_value(policies, "jitter", default_policy)
+    # attempts was incremented on claim, so the first failure waits exactly the base delay.
+    backoff = func.least(cap, base * func.power(2, func.greatest(QueueItem.attempts - 1, 0)))
+    return backoff * (1 - jitter + 2 * jitter * func.random())
+
+
+async def _dead_letter(
+    session: AsyncSession,
+    *conditions: ColumnElement[bool],
+    now: datetime,
+    error: Optional[str],
+) -> int:
+    """Move matching queue items into ``broker.dead_letters`` in one statement."""
+    dead = (
+        delete(QueueItem)
+        .where(*conditions)
+        .returning(QueueItem.id, QueueItem.topic, QueueItem.payload, QueueItem.attempts, QueueItem.created_at)
+        .cte("dead")
+    )
+    stmt = (
+        insert(DeadLetter)
+        .from_select(
+            ["id", "topic", "payload", "attempts", "created_at", "dead_at", "last_error"],
+            select(
+                dead.c.id,
+                dead.c.topic,
+                dead.c.payload,
+                dead.c.attempts,
+                dead.c.created_at,
+                literal(now),
+                literal(error, Text),
+            ),
+        )
+        .returning(DeadLetter.id)
+    )
+    result = await session.execute(stmt)
+    return len(result.all())
+
+
+async def list_dead_letters(session: AsyncSession, topic: str, *, limit: int, offset: int) -> list[DeadLetter]:
+    stmt = (
+        select(DeadLetter)
+        .where(DeadLetter.topic == topic)
+        .order_by(DeadLetter.dead_at.asc())
+        .limit(limit)
+        .offset(offset)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+def _dead_letter_filter(topic: str, item_ids: Optional[list[UUID]]) -> list[ColumnElement[bool]]:
+    conditions = [DeadLetter.topic == topic]
+    if item_ids is not None:
+        conditions.append(DeadLetter.id == _ids_param(item_ids))
+    return conditions
+
+
+async def replay_dead_letters(
+    session: AsyncSession,
+    topic: str,
+    item_ids: Optional[list[UUID]] = None,
+    *,
+    priority: int = 0,
+) -> int:
+    """Move dead letters back onto their topic as fresh pending items."""
+    now = datetime.utcnow()
+    replayed = (
+        delete(DeadLetter)
+        .where(*_dead_letter_filter(topic, item_ids))
+        .returning(DeadLetter.id, DeadLetter.topic, DeadLetter.payload)
+        .cte("replayed")
+    )
+    stmt = (
+        insert(QueueItem)
+        .from_select(
+            [
+                "id",
+                "topic",
+                "payload",
+                "owner_id",
+                "status",
+                "attempts",
+                "priority",
+                "available_at",
+                "created_at",
+                "updated_at",
+            ],
+            select(
+                replayed.c.id,
+                replayed.c.topic,
+                replayed.c.payload,
+                func.coalesce(cast(replayed.c.payload, JSONB)["owner_id"].astext, ""),
+                literal("pending"),
+                literal(0),
+                literal(priority),
+                literal(now),
+                literal(now),
+                literal(now),
+            ),
+        )
+        .returning(QueueItem.id)
+    )
+    result = await session.execute(stmt)
+    count = len(result.all())
+    if count:
+        await notify(session, topic)
+    return count
+
 
+async def purge_dead_letters(session: AsyncSession, topic: str, item_ids: Optional[list[UUID]] = None) -> int:
+    stmt = (
+        delete(DeadLetter)
+        .where(*_dead_letter_filter(topic, item_ids))
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
 
-async def fail(session: AsyncSession, item_id: str, *, retry_delay_seconds: int) -> bool:
-    item = await get_item(session, item_id)
-    if item is None:
-        return False
-    item.mark_pending(delay_seconds=retry_delay_seconds)
-    return True
+
+async def queue_stats(session: AsyncSession) -> list[TopicStats]:
+    now = datetime.utcnow()
+    pending = QueueItem.status == "pending"
+    live = (
+        select(
+            QueueItem.topic,
+            func.count().filter(pending, QueueItem.available_at <= now).label("pending"),
+            func.count().filter(pending, QueueItem.available_at > now).label("delayed"),
+            func.count().filter(QueueItem.status == "processing").label("processing"),
+            func.min(QueueItem.created_at).filter(pending).label("oldest_pending_at"),
+        )
+        .group_by(QueueItem.topic)
+    )
+    dead = select(DeadLetter.topic, func.count()).group_by(DeadLetter.topic)
+    dead_counts = dict((await session.execute(dead)).all())
+    stats = {
+        row.topic: TopicStats(
+            topic=row.topic,
+            pending=row.pending,
+            delayed=row.delayed,
+            processing=row.processing,
+            dead_letters=dead_counts.pop(row.topic, 0),
+            oldest_pending_at=row.oldest_pending_at,
+        )
+        for row in await session.execute(live)
+    }
+    for topic, count in dead_counts.items():
+        stats[topic] = TopicStats(topic, 0, 0, 0, count, None)
+    return [stats[topic] for topic in sorted(stats)]
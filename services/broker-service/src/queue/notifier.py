@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+
+
+class TopicNotifier:
+    """Wake claim requests parked on a topic; in-process only."""
+
+    def __init__(self) -> None:
+        self._events: dict[str, asyncio.Event] = {}
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        self.wake_all()
+
+    def watch(self, topic: str) -> asyncio.Event:
+        # Taken before the claim attempt so a wake-up arriving in between is not lost.
+        event = self._events.get(topic)
+        if event is None:
+            event = self._events[topic] = asyncio.Event()
+        return event
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def wake(self, topic: str) -> None:
+        event = self._events.pop(topic, None)
+        if event is not None:
+            event.set()
+
+    def wake_all(self) -> None:
+        events, self._events = self._events, {}
+        for event in events.values():
+            event.set()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with jitter, capped at ``max_delay_seconds``.
+
+    The n-th failure waits ``min(max_delay, base_delay * 2 ** (n - 1))`` scaled by a
+    random factor in ``[1 - jitter, 1 + jitter]``. An item is dead-lettered once it
+    has been delivered more than ``max_retries`` times.
+    """
+
+    max_retries: int = 5
+    base_delay_seconds: int = 30
+    max_delay_seconds: int = 3600
+    jitter: float = 0.2
+
+    @classmethod
+    def from_definition(cls, definition: dict[str, Any]) -> RetryPolicy:
+        return cls(
+            max_retries=int(definition.get("max_retries", cls.max_retries)),
+            base_delay_seconds=int(definition.get("retry_delay_seconds", cls.base_delay_seconds)),
+            max_delay_seconds=int(definition.get("retry_max_delay_seconds", cls.max_delay_seconds)),
+            jitter=float(definition.get("retry_jitter", cls.jitter)),
+        )
+
+    # Python mirror of the SQL in manager.fail_many, used by the non-Postgres backends.
+    def exhausted(self, attempts: int) -> bool:
+        return attempts > self.max_retries
+
+    def next_delay_seconds(self, attempts: int) -> float:
+        backoff = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** max(attempts - 1, 0))
+        return backoff * (1 - self.jitter + 2 * self.jitter * random.random())
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from ..core.config import get_settings
+from .backends import FailResult
+from .policy import DEFAULT_RETRY_POLICY
+from .store import backend
+from .topics import registry
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def sweep_expired_leases() -> FailResult:
+    result = await backend.release_expired(
+        policies=registry.retry_policies,
+        default_policy=DEFAULT_RETRY_POLICY,
+    )
+    if result.requeued or result.dead_lettered:
+        logger.warning(
+            "Expired leases: %d returned to pending, %d dead-lettered",
+            result.requeued,
+            result.dead_lettered,
+        )
+    return result
+
+
+async def promote_aged_items() -> int:
+    promoted = await backend.promote_aged(
+        aging_seconds=settings.priority_aging_seconds,
+        max_priority=min(settings.priority_aging_max, settings.max_priority),
+    )
+    if promoted:
+        logger.info("Priority aging: promoted %d pending items", promoted)
+    return promoted
+
+
+async def run_reaper() -> None:
+    while True:
+        await asyncio.sleep(settings.cleanup_interval_seconds)
+        try:
+            await sweep_expired_leases()
+            if settings.priority_aging_seconds > 0:
+                await promote_aged_items()
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.exception("Lease sweep failed")
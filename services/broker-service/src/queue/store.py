@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from ..core.config import get_settings
+from .backends import create_backend
+
+# The queue engine this process serves, chosen by QUEUE_BACKEND.
+backend = create_backend(get_settings())
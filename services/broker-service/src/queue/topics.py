@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from ..core.config import Settings, get_settings
+from ..db.partitions import storage_options
+from .policy import DEFAULT_RETRY_POLICY, RetryPolicy
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class TopicPolicy:
+    name: str
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    visibility_timeout_seconds: int = settings.visibility_timeout_seconds
+    # Cap on items of this topic in `processing` at once; None means unbounded.
+    max_concurrency: Optional[int] = None
+    # Default priority for messages enqueued on this topic.
+    priority: int = 0
+    # Claim round-robin across payload owner_id values instead of global FIFO.
+    fair_share: bool = False
+    # With fair_share, cap on items of one owner in `processing` at once; None means unbounded.
+    max_inflight_per_owner: Optional[int] = None
+    # Postgres storage parameters for the topic's partition, over db.partitions.DEFAULT_STORAGE.
+    autovacuum: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_definition(cls, definition: dict[str, Any]) -> TopicPolicy:
+        max_concurrency = definition.get("max_concurrency")
+        max_inflight_per_owner = definition.get("max_inflight_per_owner")
+        return cls(
+            name=definition["name"],
+            retry=RetryPolicy.from_definition(definition),
+            visibility_timeout_seconds=int(
+                definition.get("visibility_timeout_seconds", settings.visibility_timeout_seconds)
+            ),
+            max_concurrency=int(max_concurrency) if max_concurrency is not None else None,
+            priority=int(definition.get("priority", 0)),
+            fair_share=bool(definition.get("fair_share", False)),
+            max_inflight_per_owner=int(max_inflight_per_owner) if max_inflight_per_owner is not None else None,
+            autovacuum=storage_options(definition.get("autovacuum", {})),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class TopicRegistry:
+    """In-memory view of ``definitions.json``, reloaded when the file changes.
+
+    Queue operations only read from memory; the file is touched at startup, by the
+    mtime watcher and by the admin reload endpoint.
+    """
+
+    def __init__(self, config: Settings) -> None:
+        self._config = config
+        self._path = config.definitions_path
+        self._mtime: Optional[float] = None
+        self._topics: dict[str, TopicPolicy] = {}
+        self._retry_policies: dict[str, RetryPolicy] = {}
+
+    @property
+    def retry_policies(self) -> dict[str, RetryPolicy]:
+        return self._retry_policies
+
+    def get(self, topic: str) -> TopicPolicy:
+        policy = self._topics.get(topic)
+        if policy is None:
+            return TopicPolicy(name=topic, retry=DEFAULT_RETRY_POLICY)
+        return policy
+
+    def all(self) -> dict[str, TopicPolicy]:
+        return dict(self._topics)
+
+    def load(self) -> None:
+        mtime = self._path.stat().st_mtime if self._path.exists() else None
+        topics = {
+            name: TopicPolicy.from_definition(definition)
+            for name, definition in self._config.load_topic_definitions().items()
+        }
+        # Swap whole dicts so concurrent readers never see a half-built registry.
+        self._topics = topics
+        self._retry_policies = {name: policy.retry for name, policy in topics.items()}
+        self._mtime = mtime
+        logger.info("Loaded %d topic definitions from %s", len(topics), self._path)
+
+    def reload_if_changed(self) -> bool:
+        mtime = self._path.stat().st_mtime if self._path.exists() else None
+        if mtime == self._mtime:
+            return False
+        self.load()
+        return True
+
+    async def watch(
+        self,
+        interval_seconds: float,
+        on_change: Optional[Callable[[dict[str, TopicPolicy]], Awaitable[None]]] = None,
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                if self.reload_if_changed() and on_change is not None:
+                    await on_change(self.all())
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                # Keep serving the last good definitions if the file is mid-write or invalid.
+                logger.exception("Failed to reload topic definitions from %s", self._path)
+
+
+registry = TopicRegistry(settings)
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Annotated, Any, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+DedupKey = Annotated[str, Field(min_length=1, max_length=255)]
+
+
+class EnqueueBatchRequest(BaseModel):
+    payloads: list[dict[str, Any]] = Field(..., min_length=1, description="Payloads to enqueue, in order")
+    dedup_keys: Optional[list[Optional[DedupKey]]] = Field(
+        default=None,
+        description="Per-payload idempotency keys; a payload whose key is already queued is not stored again",
+    )
+
+    @model_validator(mode="after")
+    def check_dedup_keys(self) -> "EnqueueBatchRequest":
+        if self.dedup_keys is not None and len(self.dedup_keys) != len(self.payloads):
+            raise ValueError("dedup_keys must have one entry per payload")
+        return self
+
+
+class ItemIdsRequest(BaseModel):
+    ids: list[UUID] = Field(..., min_length=1, description="Queue item ids")
+
+
+class FailRequest(BaseModel):
+    error: Optional[str] = Field(default=None, description="Failure reason, kept if the item is dead-lettered")
+
+
+class FailBatchRequest(ItemIdsRequest):
+    error: Optional[str] = None
+
+
+class StreamCommand(BaseModel):
+    """A frame sent by a subscriber over ``/api/subscribe/{topic}``."""
+
+    op: Literal["ack", "nack", "extend"]
+    ids: list[UUID] = Field(..., min_length=1)
+    # nack: failure reason, kept if an item is dead-lettered.
+    error: Optional[str] = None
+    # extend: new lease length; the broker's default job lease when omitted.
+    lease_seconds: Optional[int] = Field(default=None, ge=1)
+
+
+class DeadLetterSelection(BaseModel):
+    ids: Optional[list[UUID]] = Field(default=None, description="Dead letters to act on; all of the topic when omitted")
+
+
+class DeadLetterRead(BaseModel):
+    id: UUID
+    topic: str
+    payload: dict[str, Any]
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    dead_at: datetime
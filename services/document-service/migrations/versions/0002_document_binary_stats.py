@@ -0,0 +1,27 @@
+"""add stats to document binaries
+
+Revision ID: 0002_document_binary_stats
+Revises: 0001_create_documents_tables
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_document_binary_stats"
+down_revision = "0001_create_documents_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document_binaries", sa.Column("stats", postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document_binaries", "stats")
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import base64
+import io
+import json
+import logging
 from collections.abc import AsyncGenerator
 from datetime import datetime
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, File, Header, HTTPException, Response, UploadFile, status
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..clients.broker_client import BrokerClient
@@ -13,6 +16,7 @@ from ..core.config import get_settings
 from ..db.session import get_session
 from ..repositories import documents as documents_repo
 from ..schemas.document import (
+    PREPROCESSED_VARIANTS,
     BinaryPayload,
     BinaryVariant,
     DocumentRead,
@@ -22,7 +26,9 @@ from ..schemas.document import (
     StatusUpdatePayload,
 )
 from shared.schemas.events import DocumentEvent, DocumentEventType
+from shared.utils import raster
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 router = APIRouter()
 
@@ -41,14 +47,13 @@ async def get_broker_client() -> AsyncGenerator[BrokerClient, None]:
         await client.close()
 
 
-async def _publish_event(
-    broker: BrokerClient,
+def _build_event(
     *,
     event_type: DocumentEventType,
     document_id: str,
     owner_id: str,
     payload: Optional[dict[str, Any]] = None,
-) -> None:
+) -> dict[str, Any]:
     event = DocumentEvent(
         event_type=event_type,
         document_id=document_id,
@@ -56,7 +61,80 @@ async def _publish_event(
         timestamp=datetime.utcnow(),
         payload=payload,
     )
-    await broker.enqueue("document_events", event.model_dump(mode="json"))
+    return event.model_dump(mode="json")
+
+
+def _stage_dedup_key(event: dict[str, Any]) -> str:
+    # While one event for a document's stage is still queued, repeats collapse into it.
+    return f"{event['document_id']}:{event['event_type']}"
+
+
+async def _publish_event(
+    broker: BrokerClient,
+    *,
+    event_type: DocumentEventType,
+    document_id: str,
+    owner_id: str,
+    payload: Optional[dict[str, Any]] = None,
+    priority: Optional[int] = None,
+    deduplicate: bool = False,
+) -> None:
+    event = _build_event(event_type=event_type, document_id=document_id, owner_id=owner_id, payload=payload)
+    await _dispatch_events(broker, [event], priority=priority, deduplicate=deduplicate)
+
+
+async def _publish_events(broker: BrokerClient, events: list[dict[str, Any]]) -> None:
+    await _dispatch_events(broker, events, deduplicate=True)
+
+
+async def _dispatch_events(
+    broker: BrokerClient,
+    events: list[dict[str, Any]],
+    *,
+    priority: Optional[int] = None,
+    deduplicate: bool,
+) -> None:
+    """Publish ``events``, enqueueing the stage job of routed event types directly.
+
+    A routed event starts its stage without the worker-service hop; it is marked with
+    ``routed_to`` and, if audit events are on, still published to document_events,
+    where workers log it without fanning out again.
+    """
+    routes = settings.stage_routes()
+    jobs: dict[str, list[dict[str, Any]]] = {}
+    audit: list[dict[str, Any]] = []
+    for event in events:
+        # An event naming a pipeline is left to the worker-service pipeline engine.
+        topic = None if (event["payload"] or {}).get("pipeline") else routes.get(event["event_type"])
+        if topic is None:
+            audit.append(event)
+            continue
+        jobs.setdefault(topic, []).append(event)
+        event["payload"] = {**(event["payload"] or {}), "routed_to": topic}
+        if settings.publish_audit_events:
+            audit.append(event)
+
+    # Bare stage jobs, with no run or reply. The key only collapses repeats for the same document and
+    # stage; pipeline-engine jobs are keyed by run and stage, and routed events never fire a pipeline trigger.
+    for topic, routed in jobs.items():
+        await broker.enqueue_many(
+            topic,
+            [{"document_id": event["document_id"], "owner_id": event["owner_id"]} for event in routed],
+            priority=priority,
+            dedup_keys=[f"{event['document_id']}:{topic}" for event in routed],
+        )
+
+    if not audit:
+        return
+    dedup_keys = [_stage_dedup_key(event) for event in audit] if deduplicate else None
+    try:
+        await broker.enqueue_many(settings.document_events_topic, audit, priority=priority, dedup_keys=dedup_keys)
+    except Exception:  # noqa: BLE001
+        if all((event["payload"] or {}).get("routed_to") for event in audit):
+            # The stage jobs are queued; losing their audit copies must not fail the request.
+            logger.exception("Failed to publish %d audit events", len(audit))
+            return
+        raise
 
 
 @router.get("/health", tags=["system"])
@@ -176,6 +254,9 @@ async def requeue_document(
             document_id=str(document.id),
             owner_id=owner_id,
             payload={"reason": "manual_requeue"},
+            # Jump ahead of bulk batch events; the user is waiting on this one document.
+            priority=settings.interactive_priority,
+            deduplicate=True,
         )
         await session.commit()
         await session.refresh(document)
@@ -197,6 +278,7 @@ async def process_batch_documents(
 ) -> dict[str, Any]:
     processed_ids = []
     errors = {}
+    events = []
 
     for doc_id in payload.document_ids:
         document_id_str = str(doc_id)
@@ -206,21 +288,27 @@ async def process_batch_documents(
             errors[document_id_str] = "Document not found or access denied"
             continue
 
-        try:
-            document.status = "queued_preprocessing"
-            document.error_message = None
-            await session.flush()
-
-            await _publish_event(
-                broker,
+        document.status = "queued_preprocessing"
+        document.error_message = None
+        events.append(
+            _build_event(
                 event_type="document_uploaded",
                 document_id=document_id_str,
                 owner_id=owner_id,
-                payload={"reason": "batch_processing_request"},
+                payload={"reason": "batch_processing_request", "pipeline": payload.pipeline},
             )
-            processed_ids.append(document_id_str)
+        )
+        processed_ids.append(document_id_str)
+
+    if events:
+        try:
+            await session.flush()
+            await _publish_events(broker, events)
         except Exception as exc:  # noqa: BLE001
-            errors[document_id_str] = f"Failed to queue: {exc}"
+            # The whole batch is queued in one broker call, so it fails as a unit.
+            await session.rollback()
+            errors.update({document_id_str: f"Failed to queue: {exc}" for document_id_str in processed_ids})
+            processed_ids = []
 
     if not processed_ids and errors:
         await session.rollback()
@@ -239,6 +327,7 @@ async def process_batch_ocr(
 ) -> dict[str, Any]:
     processed_ids = []
     errors = {}
+    events = []
 
     for doc_id in payload.document_ids:
         document_id_str = str(doc_id)
@@ -253,21 +342,26 @@ async def process_batch_ocr(
             errors[document_id_str] = "Document must be preprocessed first"
             continue
 
-        try:
-            document.status = "queued_ocr"
-            document.error_message = None
-            await session.flush()
-
-            await _publish_event(
-                broker,
+        document.status = "queued_ocr"
+        document.error_message = None
+        events.append(
+            _build_event(
                 event_type="document_preprocessed",
                 document_id=document_id_str,
                 owner_id=owner_id,
                 payload={"reason": "batch_ocr_request"},
             )
-            processed_ids.append(document_id_str)
+        )
+        processed_ids.append(document_id_str)
+
+    if events:
+        try:
+            await session.flush()
+            await _publish_events(broker, events)
         except Exception as exc:  # noqa: BLE001
-            errors[document_id_str] = f"Failed to queue: {exc}"
+            await session.rollback()
+            errors.update({document_id_str: f"Failed to queue: {exc}" for document_id_str in processed_ids})
+            processed_ids = []
 
     if not processed_ids and errors:
         await session.rollback()
@@ -291,14 +385,57 @@ def _decode_base64(data_base64: str) -> bytes:
 )
 async def get_binary(
     document_id: str,
-    variant: BinaryVariant = "original",
+    variant: list[BinaryVariant] = Query(default=["original"]),
     session: AsyncSession = Depends(get_session),
 ) -> Response:
-    record = await documents_repo.get_binary(session, document_id=document_id, variant=variant)
+    """Return the first stored of the requested variants, named in ``X-Binary-Variant``.
+
+    Consumers that read rasters ask for ``variant=raster&variant=preprocessed``. A plain
+    ``preprocessed`` request is still answered when only the raster exists, as PNG.
+    """
+    candidates = list(variant)
+    if "preprocessed" in candidates and "raster" not in candidates:
+        candidates.append("raster")
+    record = await documents_repo.get_first_binary(session, document_id=document_id, variants=candidates)
     if record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="binary not found")
-    media_type = "application/octet-stream" if variant != "preprocessed" else "image/png"
-    return Response(content=record.content, media_type=media_type)
+    content = record.content
+    headers = {"X-Binary-Variant": record.variant}
+    if record.stats:
+        headers["X-Processing-Stats"] = json.dumps(record.stats)
+    if record.variant == "raster" and "raster" not in variant:
+        content = _raster_to_png(content)
+        headers["X-Binary-Variant"] = "preprocessed"
+        media_type = "image/png"
+    elif record.variant == "raster":
+        media_type = raster.MEDIA_TYPE
+    # A passed-through preprocessed variant keeps the original's encoding.
+    elif record.variant == "preprocessed" and not (record.stats and record.stats.get("passthrough")):
+        media_type = "image/png"
+    else:
+        media_type = _sniff_media_type(content)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def _sniff_media_type(content: bytes) -> str:
+    for signature, media_type in _IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return media_type
+    return "application/octet-stream"
+
+
+def _raster_to_png(data: bytes) -> bytes:
+    buffer = io.BytesIO()
+    raster.to_image(data).save(buffer, format="PNG")
+    return buffer.getvalue()
 
 
 @router.post(
@@ -318,15 +455,32 @@ async def upload_variant(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="document not found")
 
     try:
-        content = _decode_base64(payload.data_base64)
-        await documents_repo.store_binary(
-            session,
-            document_id=document_id,
-            variant=payload.variant,
-            content=content,
-        )
+        if payload.copy_from is not None:
+            copied = await documents_repo.copy_binary(
+                session,
+                document_id=document_id,
+                source=payload.copy_from,
+                variant=payload.variant,
+                stats=payload.stats,
+            )
+            if not copied:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="source binary not found")
+        else:
+            await documents_repo.store_binary(
+                session,
+                document_id=document_id,
+                variant=payload.variant,
+                content=_decode_base64(payload.data_base64),
+                stats=payload.stats,
+            )
 
-        if payload.variant == "preprocessed":
+        if payload.variant in PREPROCESSED_VARIANTS:
+            # Drop the other form, so negotiation never hands OCR a stale page.
+            await documents_repo.delete_binaries(
+                session,
+                document_id=document_id,
+                variants=[variant for variant in PREPROCESSED_VARIANTS if variant != payload.variant],
+            )
             document.status = "queued_ocr"
             document.error_message = None
             await session.flush()
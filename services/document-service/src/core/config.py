@@ -9,6 +9,24 @@ class Settings:
     broker_service_url: str = os.getenv("BROKER_SERVICE_URL", "http://broker-service:8003")
     storage_backend: str = os.getenv("STORAGE_BACKEND", "postgres")
     max_upload_mb: int = int(os.getenv("MAX_UPLOAD_MB", "10"))
+    # Broker priority for events a user is actively waiting on (single-document requeues).
+    interactive_priority: int = int(os.getenv("INTERACTIVE_EVENT_PRIORITY", "10"))
+    document_events_topic: str = os.getenv("DOCUMENT_EVENTS_TOPIC", "document_events")
+    preprocess_topic: str = os.getenv("PREPROCESS_TOPIC", "image_preprocess")
+    ocr_topic: str = os.getenv("OCR_TOPIC", "ocr_extract")
+    # Enqueue stage jobs straight onto their topic instead of via worker-service and document_events.
+    direct_stage_routing: bool = os.getenv("DIRECT_STAGE_ROUTING", "true").lower() in {"1", "true", "yes"}
+    # With direct routing, still publish routed events to document_events for audit consumers.
+    publish_audit_events: bool = os.getenv("PUBLISH_AUDIT_EVENTS", "true").lower() in {"1", "true", "yes"}
+
+    def stage_routes(self) -> dict[str, str]:
+        """Event type -> topic of the stage job it starts; empty when direct routing is off."""
+        if not self.direct_stage_routing:
+            return {}
+        return {
+            "document_uploaded": self.preprocess_topic,
+            "document_preprocessed": self.ocr_topic,
+        }
 
 
 def get_settings() -> Settings:
@@ -4,7 +4,7 @@ from datetime import datetime
 from uuid import uuid4
 
 from sqlalchemy import Column, DateTime, LargeBinary, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -32,6 +32,8 @@ class DocumentBinary(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     document_id = Column(UUID(as_uuid=True), nullable=False, index=True)
-    variant = Column(String(32), nullable=False)  # original, preprocessed
+    variant = Column(String(32), nullable=False)  # original, preprocessed, raster
     content = Column(LargeBinary, nullable=False)
+    # How the variant was produced, e.g. preprocessing stages and their timings.
+    stats = Column(JSONB, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -3,9 +3,9 @@ from __future__ import annotations
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional, Sequence
 
-from sqlalchemy import Select, delete, select, update
+from sqlalchemy import Select, delete, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db.models import Document, DocumentBinary
@@ -50,6 +50,7 @@ async def store_binary(
     document_id: str,
     variant: str,
     content: bytes,
+    stats: Optional[dict[str, Any]] = None,
 ) -> DocumentBinary:
     await session.execute(
         delete(DocumentBinary).where(
@@ -57,12 +58,39 @@ async def store_binary(
             DocumentBinary.variant == variant,
         )
     )
-    record = DocumentBinary(document_id=document_id, variant=variant, content=content)
+    record = DocumentBinary(document_id=document_id, variant=variant, content=content, stats=stats)
     session.add(record)
     await session.flush()
     return record
 
 
+async def copy_binary(
+    session: AsyncSession,
+    *,
+    document_id: str,
+    source: str,
+    variant: str,
+    stats: Optional[dict[str, Any]] = None,
+) -> bool:
+    """Store ``source`` again as ``variant`` inside the database; False if there is no ``source``."""
+    await session.execute(
+        delete(DocumentBinary).where(
+            DocumentBinary.document_id == document_id,
+            DocumentBinary.variant == variant,
+        )
+    )
+    copied = select(
+        DocumentBinary.document_id,
+        literal(variant),
+        DocumentBinary.content,
+        literal(stats, type_=DocumentBinary.stats.type),
+    ).where(DocumentBinary.document_id == document_id, DocumentBinary.variant == source)
+    result = await session.execute(
+        insert(DocumentBinary).from_select(["document_id", "variant", "content", "stats"], copied)
+    )
+    return result.rowcount > 0
+
+
 async def get_binary(session: AsyncSession, *, document_id: str, variant: str = "original") -> Optional[DocumentBinary]:
     stmt = select(DocumentBinary).where(
         DocumentBinary.document_id == document_id,
@@ -72,6 +100,30 @@ async def get_binary(session: AsyncSession, *, document_id: str, variant: str =
     return result.scalar_one_or_none()
 
 
+async def get_first_binary(
+    session: AsyncSession,
+    *,
+    document_id: str,
+    variants: Sequence[str],
+) -> Optional[DocumentBinary]:
+    """The first of ``variants``, in order of preference, that the document has."""
+    stmt = select(DocumentBinary).where(
+        DocumentBinary.document_id == document_id,
+        DocumentBinary.variant.in_(variants),
+    )
+    stored = {record.variant: record for record in (await session.execute(stmt)).scalars()}
+    return next((stored[variant] for variant in variants if variant in stored), None)
+
+
+async def delete_binaries(session: AsyncSession, *, document_id: str, variants: Sequence[str]) -> None:
+    await session.execute(
+        delete(DocumentBinary).where(
+            DocumentBinary.document_id == document_id,
+            DocumentBinary.variant.in_(variants),
+        )
+    )
+
+
 async def update_status(
     session: AsyncSession,
     *,
@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 DocumentStatus = Literal[
     "uploaded",
@@ -38,12 +38,26 @@ class DocumentRead(BaseModel):
         from_attributes = True
 
 
-BinaryVariant = Literal["original", "preprocessed"]
+# raster: the preprocessed page as an uncompressed shared.utils.raster, handed to OCR without a PNG round trip.
+BinaryVariant = Literal["original", "preprocessed", "raster"]
+# Either form of the preprocessed page; a document keeps only the latest one.
+PREPROCESSED_VARIANTS: tuple[BinaryVariant, ...] = ("preprocessed", "raster")
 
 
 class BinaryPayload(BaseModel):
     variant: BinaryVariant
-    data_base64: str = Field(..., description="Base64 encoded binary payload")
+    data_base64: Optional[str] = Field(default=None, description="Base64 encoded binary payload")
+    copy_from: Optional[BinaryVariant] = Field(
+        default=None,
+        description="Store a copy of this existing variant instead of uploaded data",
+    )
+    stats: Optional[dict[str, Any]] = Field(default=None, description="How the variant was produced, e.g. stage timings")
+
+    @model_validator(mode="after")
+    def _one_source(self) -> "BinaryPayload":
+        if (self.data_base64 is None) == (self.copy_from is None):
+            raise ValueError("exactly one of data_base64 and copy_from is required")
+        return self
 
 
 class OCRTextPayload(BaseModel):
@@ -62,3 +76,4 @@ class StatusUpdatePayload(BaseModel):
 
 class ProcessDocumentsRequest(BaseModel):
     document_ids: list[UUID] = Field(..., description="List of document IDs to process")
+    pipeline: Optional[str] = Field(default=None, description="Worker-service pipeline to run instead of the default")
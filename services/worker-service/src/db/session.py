@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from ..core.config import get_settings
+
+settings = get_settings()
+engine = create_async_engine(settings.postgres_dsn, echo=False, future=True)
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
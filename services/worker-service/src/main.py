@@ -2,59 +2,54 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from typing import Any, Optional
 
 from shared.utils.broker import AsyncBrokerClient
+from shared.utils.consumer import Consumer, ConsumerConfig
 
 from .consumers.document_consumer import DocumentConsumer
 from .core.config import get_settings
+from .db.session import SessionLocal, engine
+from .pipelines.definition import PipelineCatalog
+from .pipelines.engine import PipelineEngine
 
 logger = logging.getLogger("worker-service")
 logging.basicConfig(level=logging.INFO)
 
 
+def document_of(job: dict[str, Any]) -> Optional[str]:
+    return job["payload"].get("document_id")
+
+
 async def run_worker() -> None:
     settings = get_settings()
-    broker = AsyncBrokerClient(settings.broker_service_url)
-    consumer = DocumentConsumer(broker, settings=settings)
+    broker = AsyncBrokerClient(
+        settings.broker_service_url,
+        ack_batch_window_seconds=settings.ack_batch_window_seconds or None,
+        enqueue_batch_window_seconds=settings.enqueue_batch_window_seconds or None,
+    )
+    catalog = PipelineCatalog.from_definitions(settings.load_pipeline_definitions())
+    consumer = DocumentConsumer(
+        PipelineEngine(broker, catalog, SessionLocal, events_topic=settings.document_events_topic)
+    )
+    config = ConsumerConfig(
+        topic=settings.document_events_topic,
+        concurrency=settings.concurrency,
+        prefetch=settings.prefetch_count,
+        claim_wait_seconds=settings.claim_wait_seconds,
+        drain_timeout_seconds=settings.drain_timeout_seconds,
+    )
 
     try:
-        while True:
-            try:
-                job = await broker.claim(settings.document_events_topic)
-            except Exception as exc:  # noqa: BLE001
-                if isinstance(exc, asyncio.CancelledError):  # propagate cancellations cleanly
-                    raise
-                logger.exception("Failed to claim document event: %s", exc)
-                await asyncio.sleep(settings.poll_interval_seconds)
-                continue
-
-            if job is None:
-                await asyncio.sleep(settings.poll_interval_seconds)
-                continue
-
-            item_id = job["id"]
-            try:
-                await consumer.handle(job["payload"])
-            except Exception as exc:  # noqa: BLE001
-                if isinstance(exc, asyncio.CancelledError):
-                    raise
-                logger.exception("Error processing event %s: %s", item_id, exc)
-                try:
-                    await broker.fail(item_id)
-                except Exception:  # noqa: BLE001
-                    logger.exception("Failed to requeue event %s", item_id)
-                await asyncio.sleep(settings.poll_interval_seconds)
-                continue
-
-            try:
-                await broker.ack(item_id)
-            except Exception as exc:  # noqa: BLE001
-                if isinstance(exc, asyncio.CancelledError):
-                    raise
-                logger.exception("Failed to ack event %s", item_id)
-
+        await Consumer(
+            broker,
+            lambda job: consumer.handle(job["payload"], priority=job.get("priority")),
+            config,
+            ordering_key=document_of if settings.order_by_document else None,
+        ).run()
     finally:
         await broker.close()
+        await engine.dispose()
 
 
 def main() -> None:
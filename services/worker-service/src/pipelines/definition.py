@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    topic: str
+    # Stages that must complete first; several stages after the same one fan out, one after several fans in.
+    after: tuple[str, ...] = ()
+    # Passed to the stage consumer as ``payload["params"]``, e.g. {"lang": "deu"} for OCR.
+    params: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_definition(cls, definition: dict[str, Any]) -> Stage:
+        return cls(
+            name=definition["name"],
+            topic=definition["topic"],
+            after=tuple(definition.get("after", ())),
+            params=dict(definition.get("params", {})),
+        )
+
+
+@dataclass(frozen=True)
+class Pipeline:
+    name: str
+    stages: dict[str, Stage]
+
+    @classmethod
+    def from_definition(cls, definition: dict[str, Any]) -> Pipeline:
+        name = definition["name"]
+        stages: dict[str, Stage] = {}
+        for item in definition["stages"]:
+            stage = Stage.from_definition(item)
+            if stage.name in stages:
+                raise ValueError(f"pipeline '{name}': duplicate stage '{stage.name}'")
+            stages[stage.name] = stage
+        if not stages:
+            raise ValueError(f"pipeline '{name}' has no stages")
+        for stage in stages.values():
+            unknown = set(stage.after) - stages.keys()
+            if unknown:
+                raise ValueError(f"pipeline '{name}': stage '{stage.name}' depends on unknown {sorted(unknown)}")
+        pipeline = cls(name=name, stages=stages)
+        pipeline._check_acyclic()
+        return pipeline
+
+    def _check_acyclic(self) -> None:
+        done: set[str] = set()
+        while len(done) < len(self.stages):
+            ready = self.ready(done, started=done)
+            if not ready:
+                cycle = sorted(self.stages.keys() - done)
+                raise ValueError(f"pipeline '{self.name}': dependency cycle among {cycle}")
+            done.update(stage.name for stage in ready)
+
+    def ready(self, completed: set[str], *, started: set[str]) -> list[Stage]:
+        """Stages not started yet whose dependencies have all completed."""
+        return [
+            stage
+            for stage in self.stages.values()
+            if stage.name not in started and completed.issuperset(stage.after)
+        ]
+
+
+@dataclass(frozen=True)
+class PipelineCatalog:
+    pipelines: dict[str, Pipeline]
+    # Event type -> pipeline started for it when the event does not name one.
+    triggers: dict[str, str]
+
+    @classmethod
+    def from_definitions(cls, definitions: dict[str, Any]) -> PipelineCatalog:
+        pipelines = {item["name"]: Pipeline.from_definition(item) for item in definitions.get("pipelines", [])}
+        triggers = dict(definitions.get("triggers", {}))
+        unknown = set(triggers.values()) - pipelines.keys()
+        if unknown:
+            raise ValueError(f"triggers reference unknown pipelines {sorted(unknown)}")
+        return cls(pipelines=pipelines, triggers=triggers)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Optional
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from shared.schemas.events import DocumentEvent
+from shared.utils.broker import AsyncBrokerClient
+
+from ..db.models import PipelineRun
+from ..repositories import pipeline_runs as runs_repo
+from .definition import Pipeline, PipelineCatalog, Stage
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineEngine:
+    """Drive per-document pipeline runs through their stage DAG.
+
+    Every ready stage is enqueued on its topic at once, so independent stages run
+    concurrently. Stage jobs carry a ``reply`` that the stage consumer publishes as a
+    ``stage_completed`` event on ``events_topic``; that completion is what advances
+    the run. Run state lives in ``pipeline_runs`` and is updated under a row lock,
+    with the follow-up enqueues made before the commit: a failed enqueue rolls the
+    step back and the event is retried.
+    """
+
+    def __init__(
+        self,
+        broker: AsyncBrokerClient,
+        catalog: PipelineCatalog,
+        sessions: async_sessionmaker[AsyncSession],
+        *,
+        events_topic: str,
+    ) -> None:
+        self._broker = broker
+        self._catalog = catalog
+        self._sessions = sessions
+        self._events_topic = events_topic
+
+    def pipeline_for(self, event: DocumentEvent) -> Optional[str]:
+        return (event.payload or {}).get("pipeline") or self._catalog.triggers.get(event.event_type)
+
+    async def start(self, event: DocumentEvent, name: str, *, priority: Optional[int] = None) -> None:
+        pipeline = self._catalog.pipelines.get(name)
+        if pipeline is None:
+            logger.error("Document %s asked for unknown pipeline '%s'", event.document_id, name)
+            return
+        # One run per triggering event, so a redelivered event resumes its run instead of starting another.
+        run_id = uuid5(NAMESPACE_URL, f"{event.document_id}:{name}:{event.timestamp.isoformat()}")
+        async with self._sessions() as session, session.begin():
+            run = await runs_repo.create_run(
+                session,
+                run_id=run_id,
+                document_id=event.document_id,
+                owner_id=event.owner_id,
+                pipeline=name,
+                stages=list(pipeline.stages),
+                priority=priority,
+            )
+            logger.info("Document %s: pipeline '%s' run %s", event.document_id, name, run.id)
+            await self._advance(run, pipeline)
+
+    async def stage_completed(self, event: DocumentEvent) -> None:
+        payload = event.payload or {}
+        stage = payload["stage"]
+        async with self._sessions() as session, session.begin():
+            run = await runs_repo.get_run_for_update(session, UUID(payload["run_id"]))
+            if run is None:
+                logger.warning("Completion of stage '%s' for unknown run %s", stage, payload["run_id"])
+                return
+            if stage not in run.stages:
+                logger.warning("Run %s has no stage '%s'", run.id, stage)
+                return
+            if run.stages[stage] == "completed":
+                return
+            pipeline = self._catalog.pipelines.get(run.pipeline)
+            if pipeline is None:
+                run.status = "failed"
+                run.error_message = f"pipeline '{run.pipeline}' is no longer defined"
+                return
+            run.stages = {**run.stages, stage: "completed"}
+            await self._advance(run, pipeline)
+
+    async def document_failed(self, event: DocumentEvent) -> None:
+        error_message = (event.payload or {}).get("error_message", "unknown error")
+        async with self._sessions() as session, session.begin():
+            # Stages already queued still run; a later completion (e.g. a successful retry) resumes the run.
+            for run in await runs_repo.list_running_for_update(session, event.document_id):
+                run.status = "failed"
+                run.error_message = error_message
+
+    async def _advance(self, run: PipelineRun, pipeline: Pipeline) -> None:
+        completed = {name for name, state in run.stages.items() if state == "completed"}
+        started = {name for name, state in run.stages.items() if state != "pending"}
+        ready = pipeline.ready(completed, started=started)
+        await asyncio.gather(*(self._enqueue(run, stage) for stage in ready))
+        run.stages = {**run.stages, **{stage.name: "queued" for stage in ready}}
+        run.status = "completed" if len(completed) == len(pipeline.stages) else "running"
+        run.error_message = None
+        if run.status == "completed":
+            logger.info("Document %s: pipeline '%s' completed", run.document_id, run.pipeline)
+
+    async def _enqueue(self, run: PipelineRun, stage: Stage) -> None:
+        reply: dict[str, Any] = {
+            "event_type": "stage_completed",
+            "document_id": run.document_id,
+            "owner_id": run.owner_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "payload": {"run_id": str(run.id), "pipeline": run.pipeline, "stage": stage.name},
+        }
+        await self._broker.enqueue(
+            stage.topic,
+            {
+                "document_id": run.document_id,
+                "owner_id": run.owner_id,
+                "run_id": str(run.id),
+                "stage": stage.name,
+                "params": stage.params,
+                "reply_to": self._events_topic,
+                "reply": reply,
+            },
+            priority=run.priority,
+            dedup_key=f"{run.id}:{stage.name}",
+        )
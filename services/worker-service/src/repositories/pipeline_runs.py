@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Select, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models import PipelineRun
+
+
+async def create_run(
+    session: AsyncSession,
+    *,
+    run_id: UUID,
+    document_id: str,
+    owner_id: str,
+    pipeline: str,
+    stages: list[str],
+    priority: Optional[int],
+) -> PipelineRun:
+    """Insert the run unless it exists, and return it locked for the rest of the transaction."""
+    await session.execute(
+        insert(PipelineRun)
+        .values(
+            id=run_id,
+            document_id=document_id,
+            owner_id=owner_id,
+            pipeline=pipeline,
+            status="running",
+            stages={name: "pending" for name in stages},
+            priority=priority,
+        )
+        .on_conflict_do_nothing(index_elements=[PipelineRun.id])
+    )
+    result = await session.execute(_select_for_update(run_id))
+    return result.scalar_one()
+
+
+async def get_run_for_update(session: AsyncSession, run_id: UUID) -> Optional[PipelineRun]:
+    result = await session.execute(_select_for_update(run_id))
+    return result.scalar_one_or_none()
+
+
+def _select_for_update(run_id: UUID) -> Select[tuple[PipelineRun]]:
+    return select(PipelineRun).where(PipelineRun.id == run_id).with_for_update()
+
+
+async def list_running_for_update(session: AsyncSession, document_id: str) -> Sequence[PipelineRun]:
+    result = await session.execute(
+        select(PipelineRun)
+        .where(PipelineRun.document_id == document_id, PipelineRun.status == "running")
+        .with_for_update()
+    )
+    return result.scalars().all()
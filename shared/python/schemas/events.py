@@ -8,6 +8,8 @@ DocumentEventType = Literal[
     "document_preprocessed",
     "document_ocr_completed",
     "document_failed",
+    # Published by a stage consumer for the worker-service pipeline engine; payload has run_id and stage.
+    "stage_completed",
 ]
 
 
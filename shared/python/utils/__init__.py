@@ -2,8 +2,10 @@
 
 __all__ = [
     "broker",
+    "consumer",
     "jwt",
     "logging",
     "messaging",
+    "raster",
     "security",
 ]
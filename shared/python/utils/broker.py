@@ -1,33 +1,391 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
 
 import httpx
 
+logger = logging.getLogger(__name__)
+
+
+class _BatchBuffer:
+    """Collect ids for a short window and hand them to ``send`` as one batch."""
+
+    def __init__(
+        self,
+        send: Callable[[list[str]], Awaitable[Any]],
+        *,
+        window_seconds: float,
+        max_size: int,
+    ) -> None:
+        self._send = send
+        self._window_seconds = window_seconds
+        self._max_size = max_size
+        self._pending: list[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    def add(self, item_id: str) -> None:
+        self._pending.append(item_id)
+        if len(self._pending) >= self._max_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._window_seconds, self._dispatch)
+
+    async def flush(self) -> None:
+        self._dispatch()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._deliver(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(self, batch: list[str]) -> None:
+        try:
+            await self._send(batch)
+        except Exception:  # noqa: BLE001
+            # Unacknowledged items are redelivered once their lease expires.
+            logger.exception("Failed to deliver batch of %d ids", len(batch))
+
+
+# (payload, dedup_key, future resolved with the item id) waiting for the next enqueue-batch request.
+_PendingEnqueue = tuple[dict[str, Any], Optional[str], asyncio.Future[str]]
+_EnqueueKey = tuple[str, Optional[int]]
+
+
+class _EnqueueBatcher:
+    """Coalesce concurrent ``enqueue`` calls per (topic, priority) into ``enqueue_many`` requests.
+
+    Callers still await their own item id; they wait at most one window for company.
+    """
+
+    def __init__(
+        self,
+        send: Callable[..., Awaitable[list[str]]],
+        *,
+        window_seconds: float,
+        max_size: int,
+    ) -> None:
+        self._send = send
+        self._window_seconds = window_seconds
+        self._max_size = max_size
+        self._pending: dict[_EnqueueKey, list[_PendingEnqueue]] = {}
+        self._timers: dict[_EnqueueKey, asyncio.TimerHandle] = {}
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    async def enqueue(
+        self,
+        topic: str,
+        payload: dict[str, Any],
+        *,
+        priority: Optional[int],
+        dedup_key: Optional[str],
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        key = (topic, priority)
+        future: asyncio.Future[str] = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((payload, dedup_key, future))
+        if len(batch) >= self._max_size:
+            self._dispatch(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self._window_seconds, self._dispatch, key)
+        return await future
+
+    async def flush(self) -> None:
+        for key in list(self._pending):
+            self._dispatch(key)
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def _dispatch(self, key: _EnqueueKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._deliver(key, batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(
+        self,
+        key: _EnqueueKey,
+        batch: list[_PendingEnqueue],
+    ) -> None:
+        topic, priority = key
+        dedup_keys = [dedup_key for _, dedup_key, _ in batch]
+        try:
+            ids = await self._send(
+                topic,
+                [payload for payload, _, _ in batch],
+                priority=priority,
+                dedup_keys=dedup_keys if any(k is not None for k in dedup_keys) else None,
+            )
+        except Exception as exc:  # noqa: BLE001
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, _, future), item_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(item_id)
+
+
+class BrokerSubscription:
+    """Leases pushed by the broker over ``/api/subscribe/{topic}``.
+
+    Iterate it, ideally inside ``async with`` so the socket is closed on exit; every
+    item must be acked or nacked through the subscription (not the HTTP client) to
+    return prefetch credit.
+    """
+
+    def __init__(self, url: str) -> None:
+        self._url = url
+        self._connection: Any = None
+        self._closed = False
+        self._buffered: deque[dict[str, Any]] = deque()
+
+    async def __aenter__(self) -> BrokerSubscription:
+        await self._connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _connect(self) -> Any:
+        if self._connection is None:
+            # Imported lazily so producers that never subscribe don't need the websockets package.
+            from websockets.asyncio.client import connect
+
+            self._connection = await connect(self._url)
+        return self._connection
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+    def __aiter__(self) -> BrokerSubscription:
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        from websockets.exceptions import ConnectionClosedOK
+
+        while not self._buffered:
+            if self._closed:
+                raise StopAsyncIteration
+            connection = await self._connect()
+            try:
+                frame = json.loads(await connection.recv())
+            except ConnectionClosedOK:
+                raise StopAsyncIteration from None
+            if frame.get("type") == "messages":
+                self._buffered.extend(frame["items"])
+        return self._buffered.popleft()
+
+    async def _send(self, command: dict[str, Any]) -> None:
+        if self._closed:
+            raise RuntimeError("subscription is closed")
+        connection = await self._connect()
+        await connection.send(json.dumps(command))
+
+    async def ack(self, *item_ids: str) -> None:
+        await self._send({"op": "ack", "ids": list(item_ids)})
+
+    async def nack(self, *item_ids: str, error: Optional[str] = None) -> None:
+        """Fail the items: they are retried with backoff or dead-lettered like ``fail``."""
+        await self._send({"op": "nack", "ids": list(item_ids), "error": error})
+
+    async def extend(self, *item_ids: str, lease_seconds: Optional[int] = None) -> None:
+        await self._send({"op": "extend", "ids": list(item_ids), "lease_seconds": lease_seconds})
+
 
 class AsyncBrokerClient:
-    def __init__(self, base_url: str, *, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        timeout: float = 10.0,
+        ack_batch_window_seconds: Optional[float] = None,
+        ack_batch_size: int = 100,
+        enqueue_batch_window_seconds: Optional[float] = None,
+        enqueue_batch_size: int = 100,
+    ) -> None:
+        self._timeout = timeout
         self._client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        # Opt-in: when a window is set, ack() only buffers the id and returns immediately.
+        self._ack_buffer: Optional[_BatchBuffer] = None
+        if ack_batch_window_seconds is not None:
+            self._ack_buffer = _BatchBuffer(
+                self.ack_many,
+                window_seconds=ack_batch_window_seconds,
+                max_size=ack_batch_size,
+            )
+        # Opt-in: when a window is set, concurrent enqueue() calls share enqueue-batch requests.
+        self._enqueue_batcher: Optional[_EnqueueBatcher] = None
+        if enqueue_batch_window_seconds is not None:
+            self._enqueue_batcher = _EnqueueBatcher(
+                self.enqueue_many,
+                window_seconds=enqueue_batch_window_seconds,
+                max_size=enqueue_batch_size,
+            )
 
     async def close(self) -> None:
+        if self._enqueue_batcher is not None:
+            await self._enqueue_batcher.flush()
+        await self.flush_acks()
         await self._client.aclose()
 
-    async def enqueue(self, topic: str, payload: dict[str, Any]) -> str:
-        response = await self._client.post(f"/api/enqueue/{topic}", json=payload)
+    async def flush_acks(self) -> None:
+        if self._ack_buffer is not None:
+            await self._ack_buffer.flush()
+
+    async def enqueue(
+        self,
+        topic: str,
+        payload: dict[str, Any],
+        *,
+        priority: Optional[int] = None,
+        dedup_key: Optional[str] = None,
+    ) -> str:
+        """Enqueue one payload; with ``dedup_key`` a still-queued duplicate returns the existing id."""
+        if self._enqueue_batcher is not None:
+            return await self._enqueue_batcher.enqueue(topic, payload, priority=priority, dedup_key=dedup_key)
+        params: dict[str, Any] = {}
+        if priority is not None:
+            params["priority"] = priority
+        if dedup_key is not None:
+            params["dedup_key"] = dedup_key
+        response = await self._client.post(f"/api/enqueue/{topic}", json=payload, params=params)
         response.raise_for_status()
         return response.json()["id"]
 
-    async def claim(self, topic: str) -> Optional[dict[str, Any]]:
-        response = await self._client.post(f"/api/claim/{topic}")
+    async def enqueue_many(
+        self,
+        topic: str,
+        payloads: list[dict[str, Any]],
+        *,
+        priority: Optional[int] = None,
+        dedup_keys: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        if not payloads:
+            return []
+        params = {"priority": priority} if priority is not None else None
+        body: dict[str, Any] = {"payloads": payloads}
+        if dedup_keys is not None:
+            body["dedup_keys"] = dedup_keys
+        response = await self._client.post(f"/api/enqueue-batch/{topic}", json=body, params=params)
+        response.raise_for_status()
+        return response.json()["ids"]
+
+    async def claim(self, topic: str, *, wait_seconds: float = 0) -> Optional[dict[str, Any]]:
+        response = await self._client.post(
+            f"/api/claim/{topic}",
+            params={"wait_seconds": wait_seconds},
+            timeout=self._timeout + wait_seconds,
+        )
         if response.status_code == 404:
             return None
         response.raise_for_status()
         return response.json()
 
+    async def claim_many(self, topic: str, max_items: int, *, wait_seconds: float = 0) -> list[dict[str, Any]]:
+        response = await self._client.post(
+            f"/api/claim/{topic}",
+            params={"max_items": max_items, "wait_seconds": wait_seconds},
+            timeout=self._timeout + wait_seconds,
+        )
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return response.json()["items"]
+
+    def subscribe(self, topic: str, *, prefetch: int = 10) -> BrokerSubscription:
+        """Stream leases of ``topic``, at most ``prefetch`` unacknowledged at a time.
+
+        ::
+
+            async with client.subscribe("document_events", prefetch=32) as subscription:
+                async for item in subscription:
+                    ...
+                    await subscription.ack(item["id"])
+        """
+        base = self._client.base_url
+        url = base.copy_with(
+            scheme="wss" if base.scheme == "https" else "ws",
+            path=f"{base.path.rstrip('/')}/api/subscribe/{topic}",
+            params={"prefetch": prefetch},
+        )
+        return BrokerSubscription(str(url))
+
     async def ack(self, item_id: str) -> None:
+        if self._ack_buffer is not None:
+            self._ack_buffer.add(item_id)
+            return
         response = await self._client.post(f"/api/ack/{item_id}")
         response.raise_for_status()
 
-    async def fail(self, item_id: str) -> None:
-        response = await self._client.post(f"/api/fail/{item_id}")
+    async def ack_many(self, item_ids: list[str]) -> int:
+        if not item_ids:
+            return 0
+        response = await self._client.post("/api/ack-batch", json={"ids": item_ids})
+        response.raise_for_status()
+        return response.json()["acknowledged"]
+
+    async def fail(self, item_id: str, *, error: Optional[str] = None) -> None:
+        body = {"error": error} if error is not None else None
+        response = await self._client.post(f"/api/fail/{item_id}", json=body)
+        response.raise_for_status()
+
+    async def fail_many(self, item_ids: list[str], *, error: Optional[str] = None) -> dict[str, int]:
+        if not item_ids:
+            return {"requeued": 0, "dead_lettered": 0}
+        response = await self._client.post("/api/fail-batch", json={"ids": item_ids, "error": error})
         response.raise_for_status()
+        return response.json()
+
+    async def extend(self, item_id: str, *, lease_seconds: Optional[int] = None) -> None:
+        params = {"lease_seconds": lease_seconds} if lease_seconds is not None else None
+        response = await self._client.post(f"/api/extend/{item_id}", params=params)
+        response.raise_for_status()
+
+    @asynccontextmanager
+    async def heartbeat(
+        self,
+        item_id: str,
+        *,
+        interval_seconds: float,
+        lease_seconds: Optional[int] = None,
+    ) -> AsyncIterator[None]:
+        """Keep renewing the lease on ``item_id`` while the wrapped block runs."""
+
+        async def renew() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    await self.extend(item_id, lease_seconds=lease_seconds)
+                except httpx.HTTPError:
+                    logger.warning("Failed to extend lease for %s", item_id, exc_info=True)
+
+        task = asyncio.create_task(renew())
+        try:
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import signal
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from .broker import AsyncBrokerClient
+
+logger = logging.getLogger(__name__)
+
+# Returning acks the job; raising fails it with ``str(exc)`` so the broker retries or dead-letters it.
+# A job whose payload has ``reply_to`` and ``reply`` gets ``reply`` enqueued on that topic once handled.
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+# Jobs with the same key run one at a time, in claim order; None means unordered.
+OrderingKey = Callable[[dict[str, Any]], Optional[str]]
+
+
+@dataclass(frozen=True)
+class ConsumerConfig:
+    topic: str
+    # Handlers running at once in this process.
+    concurrency: int = 4
+    # Jobs leased ahead of free handlers, so a finishing handler never waits on a claim round trip.
+    prefetch: int = 0
+    # Largest claim the broker accepts (its MAX_CLAIM_BATCH_SIZE); more free slots take several claims.
+    max_claim_batch: int = 100
+    # Broker-side long-poll per claim; 0 polls and relies on the idle backoff instead.
+    claim_wait_seconds: float = 20.0
+    # Bounds of the jittered backoff after claim errors and non-parking empty claims.
+    idle_min_seconds: float = 0.5
+    idle_max_seconds: float = 30.0
+    # Renew each running job's lease this often; None leaves leases at the topic default.
+    heartbeat_seconds: Optional[float] = None
+    lease_seconds: Optional[int] = None
+    # After SIGTERM, how long running and prefetched jobs get before they are abandoned to lease expiry.
+    drain_timeout_seconds: float = 60.0
+
+
+class _Backoff:
+    """Exponential backoff with full jitter, reset once work shows up."""
+
+    def __init__(self, minimum: float, maximum: float) -> None:
+        self._minimum = minimum
+        self._maximum = maximum
+        self._current = minimum
+
+    def reset(self) -> None:
+        self._current = self._minimum
+
+    def next_delay(self) -> float:
+        delay = random.uniform(self._minimum, self._current)
+        self._current = min(self._maximum, self._current * 2)
+        return delay
+
+
+class Consumer:
+    """Claim jobs of one topic and run ``handler`` on up to ``concurrency`` of them at once.
+
+    A single claim loop keeps ``concurrency + prefetch`` leases in hand and feeds the
+    handler tasks through a local queue. ``stop()`` (wired to SIGTERM and SIGINT by
+    ``run``) stops claiming and lets leased jobs finish within ``drain_timeout_seconds``.
+
+    With ``ordering_key``, a job whose key is already running is parked behind it and
+    run by the same task afterwards, so other keys keep every handler slot busy.
+    Ordering holds among the jobs this process has leased; a failed job is retried
+    by the broker later and does not hold back the ones behind it.
+    """
+
+    def __init__(
+        self,
+        broker: AsyncBrokerClient,
+        handler: JobHandler,
+        config: ConsumerConfig,
+        *,
+        ordering_key: Optional[OrderingKey] = None,
+    ) -> None:
+        self._broker = broker
+        self._handler = handler
+        self._config = config
+        self._ordering_key = ordering_key
+        # Key -> jobs waiting behind the running one of that key.
+        self._ordered: dict[str, deque[dict[str, Any]]] = {}
+        self._capacity = asyncio.Semaphore(config.concurrency + config.prefetch)
+        self._jobs: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        self._backoff = _Backoff(config.idle_min_seconds, config.idle_max_seconds)
+
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            logger.info("Draining consumer of '%s'", self._config.topic)
+            self._stopping.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(signum, self.stop)
+
+        claimer = asyncio.create_task(self._claim_loop())
+        workers = [asyncio.create_task(self._work_loop()) for _ in range(self._config.concurrency)]
+        try:
+            await self._stopping.wait()
+            # An in-flight long-poll may still lease jobs; those expire back to pending.
+            claimer.cancel()
+            await asyncio.gather(claimer, return_exceptions=True)
+            try:
+                await asyncio.wait_for(self._jobs.join(), timeout=self._config.drain_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Drain of '%s' timed out; %d leased jobs are left to expire",
+                    self._config.topic,
+                    self._jobs.qsize(),
+                )
+        finally:
+            self._stopping.set()
+            claimer.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(claimer, *workers, return_exceptions=True)
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                with contextlib.suppress(NotImplementedError, RuntimeError):
+                    loop.remove_signal_handler(signum)
+            await self._broker.flush_acks()
+
+    async def _claim_loop(self) -> None:
+        config = self._config
+        while not self._stopping.is_set():
+            # Hold every free slot before claiming, then hand back the ones the broker could not fill.
+            await self._capacity.acquire()
+            free = 1
+            batch = min(config.concurrency + config.prefetch, config.max_claim_batch)
+            while free < batch and not self._capacity.locked():
+                await self._capacity.acquire()
+                free += 1
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                jobs = await self._broker.claim_many(config.topic, free, wait_seconds=config.claim_wait_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to claim from '%s'", config.topic)
+                jobs = []
+                delay: Optional[float] = self._backoff.next_delay()
+            else:
+                # A parked long-poll already was the idle wait; only back off when the claim came back early.
+                elapsed = loop.time() - started
+                parked = config.claim_wait_seconds > 0 and elapsed >= config.claim_wait_seconds * 0.9
+                delay = None if jobs or parked else self._backoff.next_delay()
+            for job in jobs:
+                self._jobs.put_nowait(job)
+            for _ in range(free - len(jobs)):
+                self._capacity.release()
+            if jobs:
+                self._backoff.reset()
+            elif delay is not None:
+                await asyncio.sleep(delay)
+
+    async def _work_loop(self) -> None:
+        while True:
+            job = await self._jobs.get()
+            key = self._ordering_key(job) if self._ordering_key is not None else None
+            if key is None:
+                await self._run_one(job)
+                continue
+            backlog = self._ordered.get(key)
+            if backlog is not None:
+                backlog.append(job)
+                continue
+            backlog = self._ordered[key] = deque([job])
+            try:
+                while backlog:
+                    await self._run_one(backlog[0])
+                    backlog.popleft()
+            finally:
+                del self._ordered[key]
+
+    async def _run_one(self, job: dict[str, Any]) -> None:
+        try:
+            await self._process(job)
+        finally:
+            self._capacity.release()
+            self._jobs.task_done()
+
+    async def _process(self, job: dict[str, Any]) -> None:
+        item_id = job["id"]
+        config = self._config
+        try:
+            if config.heartbeat_seconds is None:
+                await self._handler(job)
+            else:
+                async with self._broker.heartbeat(
+                    item_id,
+                    interval_seconds=config.heartbeat_seconds,
+                    lease_seconds=config.lease_seconds,
+                ):
+                    await self._handler(job)
+            await self._reply(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Job %s from '%s' failed", item_id, config.topic)
+            try:
+                await self._broker.fail(item_id, error=str(exc) or type(exc).__name__)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to fail job %s", item_id)
+            return
+        try:
+            await self._broker.ack(item_id)
+        except Exception:  # noqa: BLE001
+            # The lease expires and the job is redelivered; handlers are expected to be idempotent.
+            logger.exception("Failed to ack job %s", item_id)
+
+    async def _reply(self, job: dict[str, Any]) -> None:
+        payload = job["payload"]
+        reply_to = payload.get("reply_to")
+        if reply_to is None:
+            return
+        # Sent before the ack: a lost reply fails the job, so it is redelivered rather than forgotten.
+        await self._broker.enqueue(reply_to, payload["reply"], priority=job.get("priority"))
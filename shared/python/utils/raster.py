@@ -0,0 +1,47 @@
+"""Uncompressed page raster handed from preprocessing to OCR.
+
+A 16-byte header (magic, bits per pixel, height, width) followed by the pixels:
+8-bit grayscale rows, or for two-tone pages rows packed 8 pixels per byte, MSB
+first and padded to a whole byte, 1 meaning white. Reading needs Pillow only.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING
+
+from PIL import Image
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"RAST"
+HEADER = struct.Struct("<4sB3xII")
+MEDIA_TYPE = "application/x-raster"
+
+
+def encode(image: np.ndarray) -> bytes:
+    """Raster of a 2-D uint8 image; 1-bit when every pixel is 0 or 255, else 8-bit."""
+    import numpy as np
+
+    height, width = image.shape
+    if not np.count_nonzero((image != 0) & (image != 255)):
+        return HEADER.pack(MAGIC, 1, height, width) + np.packbits(image > 127, axis=1).tobytes()
+    return HEADER.pack(MAGIC, 8, height, width) + np.ascontiguousarray(image).tobytes()
+
+
+def is_raster(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def to_image(data: bytes) -> Image.Image:
+    """PIL view of a raster; 8-bit rasters share ``data``'s memory instead of copying it."""
+    magic, bits, height, width = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a raster")
+    pixels = memoryview(data)[HEADER.size :]
+    if bits == 1:
+        return Image.frombytes("1", (width, height), bytes(pixels))
+    if bits == 8:
+        return Image.frombuffer("L", (width, height), pixels, "raw", "L", 0, 1)
+    raise ValueError(f"unsupported raster depth {bits}")
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Each service ships its code as a top-level ``src`` package and the shared library as ``shared``
+# (see the Dockerfiles); register them under distinct names so one test run can import several.
+PACKAGES = {
+    "shared": ROOT / "shared" / "python",
+    "broker_service": ROOT / "services" / "broker-service" / "src",
+    "worker_service": ROOT / "services" / "worker-service" / "src",
+    "preprocessing_service": ROOT / "processing-services" / "image-preprocessing-service" / "src",
+}
+
+for name, path in PACKAGES.items():
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [str(path)]
+        sys.modules[name] = package
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from preprocessing_service.pipelines.preprocess import preprocess_image
+from preprocessing_service.pipelines.stages import (
+    DEFAULT_STAGES,
+    ImageAnalysis,
+    PreprocessOptions,
+    plan_stages,
+    resolve_stages,
+)
+from shared.utils import raster
+
+OPTIONS = PreprocessOptions()
+
+
+def _page(*, paper: int = 255, ink: int = 0, noise: float = 0.0) -> np.ndarray:
+    """A gray page of body text at roughly 300 DPI, with under 5% of its pixels ink."""
+    page = np.full((1600, 1200), paper, np.uint8)
+    for top in range(80, 1520, 64):
+        cv2.putText(page, "The quick brown fox jumps over", (40, top), cv2.FONT_HERSHEY_SIMPLEX, 1.2, ink, 2, cv2.LINE_8)
+    if noise:
+        rng = np.random.default_rng(0)
+        page = np.clip(page + rng.normal(0, noise, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+
+def _png(image: np.ndarray) -> bytes:
+    ok, encoded = cv2.imencode(".png", image)
+    assert ok
+    return encoded.tobytes()
+
+
+def test_clean_page_measures_as_bilevel() -> None:
+    page = _page()
+    assert np.count_nonzero(page < 128) / page.size < 0.05
+    analysis = ImageAnalysis(page, OPTIONS)
+    assert analysis.contrast > 200
+    assert analysis.bilevel > 0.97
+
+
+def test_clean_page_skips_filters() -> None:
+    _, skipped = plan_stages(DEFAULT_STAGES, ImageAnalysis(_page(), OPTIONS))
+    assert {"grayscale", "denoise", "sharpen"} <= set(skipped)
+
+
+def test_noisy_low_contrast_page_runs_filters() -> None:
+    page = _page(paper=200, ink=90, noise=8.0)
+    run, skipped = plan_stages(DEFAULT_STAGES, ImageAnalysis(page, OPTIONS))
+    assert "grayscale" in skipped
+    assert {"denoise", "sharpen"} <= set(run)
+
+
+def test_color_page_is_converted() -> None:
+    page = cv2.cvtColor(_page(), cv2.COLOR_GRAY2BGR)
+    run, _ = plan_stages(("grayscale",), ImageAnalysis(page, OPTIONS))
+    assert run == ("grayscale",)
+
+
+def test_unknown_stage_is_rejected() -> None:
+    with pytest.raises(ValueError, match="unknown preprocessing stages"):
+        resolve_stages(["grayscale", "sparkle"])
+
+
+def test_blank_names_are_dropped() -> None:
+    assert resolve_stages([" grayscale", "", "denoise "]) == ("grayscale", "denoise")
+
+
+def test_every_stage_is_timed() -> None:
+    stages = ("denoise", "grayscale", "sharpen")
+    result = preprocess_image(_png(_page()), stages=stages, adaptive=False, handoff="png")
+    assert result.data.startswith(b"\x89PNG")
+    assert set(result.timings) == {"decode", "denoise", "grayscale", "sharpen", "encode"}
+
+
+def test_leading_grayscale_decodes_straight_to_gray() -> None:
+    color = cv2.cvtColor(_page(), cv2.COLOR_GRAY2BGR)
+    result = preprocess_image(_png(color), stages=("grayscale", "denoise"), adaptive=False, handoff="png")
+    assert cv2.imdecode(np.frombuffer(result.data, np.uint8), cv2.IMREAD_UNCHANGED).ndim == 2
+
+
+def test_undecodable_input_is_returned_as_is() -> None:
+    result = preprocess_image(b"not an image", stages=("denoise",))
+    assert result.data == b"not an image"
+    assert set(result.timings) == {"decode"}
+
+
+def test_clean_gray_original_is_passed_through() -> None:
+    result = preprocess_image(_png(_page()), stages=("grayscale", "denoise", "sharpen"))
+    assert result.data is None
+    assert result.variant == "preprocessed"
+
+
+def test_color_original_is_never_passed_through() -> None:
+    page = cv2.cvtColor(_page(), cv2.COLOR_GRAY2BGR)
+    result = preprocess_image(_png(page), stages=("grayscale", "denoise", "sharpen"))
+    assert result.data is not None
+    assert result.variant == "raster"
+    assert raster.to_image(result.data).size == (1200, 1600)
+
+
+def test_raster_handoff() -> None:
+    result = preprocess_image(_png(_page()), stages=("denoise",), adaptive=False)
+    assert result.variant == "raster"
+    assert result.data is not None and raster.to_image(result.data).size == (1200, 1600)
+
+
+def test_png_handoff() -> None:
+    result = preprocess_image(_png(_page()), stages=("denoise",), adaptive=False, handoff="png")
+    assert result.variant == "preprocessed"
+    assert result.data is not None and result.data.startswith(b"\x89PNG")
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Iterator
+from pathlib import Path
+from typing import Any, TypeVar
+
+import pytest
+
+from broker_service.queue.backends.base import QueueBackend
+from broker_service.queue.backends.memory import MemoryBackend
+from broker_service.queue.backends.sqlite import SqliteBackend
+from broker_service.queue.policy import RetryPolicy
+from broker_service.queue.topics import TopicPolicy
+
+T = TypeVar("T")
+
+TOPIC = "tests"
+POLICY = TopicPolicy(name=TOPIC, retry=RetryPolicy(max_retries=1, base_delay_seconds=60, jitter=0.0))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def run(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[Callable[[Callable[[QueueBackend], Awaitable[T]]], T]]:
+    """Run a scenario against a started backend of each kind, on a fresh event loop."""
+
+    def runner(scenario: Callable[[QueueBackend], Awaitable[T]]) -> T:
+        async def main() -> T:
+            backend = MemoryBackend() if request.param == "memory" else SqliteBackend(tmp_path / "queue.sqlite3")
+            await backend.start()
+            try:
+                return await scenario(backend)
+            finally:
+                await backend.stop()
+
+        return asyncio.run(main())
+
+    yield runner
+
+
+def _payload(index: int, owner: str = "owner") -> str:
+    return json.dumps({"index": index, "owner_id": owner})
+
+
+def _indexes(items: list[Any]) -> list[int]:
+    return [json.loads(item.payload)["index"] for item in items]
+
+
+def test_claim_is_fifo_and_leases_each_item_once(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(index) for index in range(5)])
+        first = await backend.claim_many(TOPIC, max_items=3, policy=POLICY)
+        second = await backend.claim_many(TOPIC, max_items=3, policy=POLICY)
+        assert _indexes(first) == [0, 1, 2]
+        assert _indexes(second) == [3, 4]
+        assert all(item.attempts == 1 for item in first + second)
+        assert await backend.claim_many(TOPIC, max_items=3, policy=POLICY) == []
+
+    run(scenario)
+
+
+def test_higher_priority_is_claimed_first(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0), _payload(1)])
+        await backend.enqueue_many(TOPIC, [_payload(2)], priority=5)
+        claimed = await backend.claim_many(TOPIC, max_items=3, policy=POLICY)
+        assert _indexes(claimed) == [2, 0, 1]
+
+    run(scenario)
+
+
+def test_ack_deletes_the_item(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0)])
+        (item,) = await backend.claim_many(TOPIC, max_items=1, policy=POLICY)
+        acked = await backend.ack_many([item.id])
+        assert [entry.topic for entry in acked] == [TOPIC]
+        assert await backend.ack_many([item.id]) == []
+        assert await backend.queue_stats() == []
+
+    run(scenario)
+
+
+def test_dedup_key_collapses_into_the_live_item(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        (first,) = await backend.enqueue_many(TOPIC, [_payload(0)], dedup_keys=["doc-1"])
+        (second,) = await backend.enqueue_many(TOPIC, [_payload(1)], dedup_keys=["doc-1"])
+        assert not first.duplicate
+        assert second.duplicate and second.id == first.id
+        (item,) = await backend.claim_many(TOPIC, max_items=5, policy=POLICY)
+        await backend.ack_many([item.id])
+        # Once the item is gone the key is free again.
+        (third,) = await backend.enqueue_many(TOPIC, [_payload(2)], dedup_keys=["doc-1"])
+        assert not third.duplicate
+
+    run(scenario)
+
+
+def test_failed_item_waits_out_its_backoff(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0)])
+        (item,) = await backend.claim_many(TOPIC, max_items=1, policy=POLICY)
+        result = await backend.fail_many([item.id], policies={TOPIC: POLICY.retry}, default_policy=POLICY.retry)
+        assert (result.requeued, result.dead_lettered) == (1, 0)
+        assert await backend.claim_many(TOPIC, max_items=1, policy=POLICY) == []
+        (stats,) = await backend.queue_stats()
+        assert (stats.pending, stats.delayed, stats.processing) == (0, 1, 0)
+
+    run(scenario)
+
+
+def test_exhausted_item_is_dead_lettered_and_replayable(run) -> None:
+    policy = TopicPolicy(name=TOPIC, retry=RetryPolicy(max_retries=0))
+
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0)])
+        (item,) = await backend.claim_many(TOPIC, max_items=1, policy=policy)
+        result = await backend.fail_many(
+            [item.id], policies={TOPIC: policy.retry}, default_policy=policy.retry, error="boom"
+        )
+        assert (result.requeued, result.dead_lettered) == (0, 1)
+        (dead,) = await backend.list_dead_letters(TOPIC, limit=10, offset=0)
+        assert dead.last_error == "boom"
+        assert dead.attempts == 1
+
+        assert await backend.replay_dead_letters(TOPIC) == 1
+        assert await backend.list_dead_letters(TOPIC, limit=10, offset=0) == []
+        (replayed,) = await backend.claim_many(TOPIC, max_items=1, policy=policy)
+        assert _indexes([replayed]) == [0]
+        assert replayed.attempts == 1
+
+    run(scenario)
+
+
+def test_fair_share_takes_turns_across_owners(run) -> None:
+    policy = TopicPolicy(name=TOPIC, fair_share=True)
+
+    async def scenario(backend: QueueBackend) -> None:
+        payloads = [_payload(index, "bulk") for index in range(4)] + [_payload(10, "single")]
+        owners = ["bulk"] * 4 + ["single"]
+        await backend.enqueue_many(TOPIC, payloads, owner_ids=owners)
+        claimed = await backend.claim_many(TOPIC, max_items=2, policy=policy)
+        assert sorted(_indexes(claimed)) == [0, 10]
+
+    run(scenario)
+
+
+def test_aging_stops_at_the_given_cap(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0)])
+        await asyncio.sleep(0.05)
+        assert await backend.promote_aged(aging_seconds=0.001, max_priority=3) == 1
+        (item,) = await backend.claim_many(TOPIC, max_items=1, policy=POLICY)
+        assert item.priority == 3
+
+    run(scenario)
+
+
+def test_aging_rewrites_only_items_whose_level_rises(run) -> None:
+    async def scenario(backend: QueueBackend) -> None:
+        await backend.enqueue_many(TOPIC, [_payload(0)])
+        await backend.enqueue_many(TOPIC, [_payload(1)], priority=5)
+        await asyncio.sleep(0.4)
+        # Both have waited one step: the first rises to 1, the second is already above that.
+        assert await backend.promote_aged(aging_seconds=0.3, max_priority=9) == 1
+        assert await backend.promote_aged(aging_seconds=0.3, max_priority=9) == 0
+        claimed = await backend.claim_many(TOPIC, max_items=2, policy=POLICY)
+        assert [item.priority for item in claimed] == [5, 1]
+
+    run(scenario)
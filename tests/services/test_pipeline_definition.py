@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from worker_service.pipelines.definition import Pipeline, PipelineCatalog
+
+
+def _pipeline(*stages: dict) -> Pipeline:
+    return Pipeline.from_definition({"name": "test", "stages": list(stages)})
+
+
+def test_ready_fans_out_and_in() -> None:
+    pipeline = _pipeline(
+        {"name": "preprocess", "topic": "image_preprocess"},
+        {"name": "ocr", "topic": "ocr_extract", "after": ["preprocess"]},
+        {"name": "thumbnail", "topic": "thumbnails", "after": ["preprocess"]},
+        {"name": "index", "topic": "indexing", "after": ["ocr", "thumbnail"]},
+    )
+
+    def ready(completed: set[str], started: set[str]) -> list[str]:
+        return sorted(stage.name for stage in pipeline.ready(completed, started=started))
+
+    assert ready(set(), set()) == ["preprocess"]
+    assert ready(set(), {"preprocess"}) == []
+    assert ready({"preprocess"}, {"preprocess"}) == ["ocr", "thumbnail"]
+    assert ready({"preprocess", "ocr"}, {"preprocess", "ocr", "thumbnail"}) == []
+    assert ready({"preprocess", "ocr", "thumbnail"}, {"preprocess", "ocr", "thumbnail"}) == ["index"]
+
+
+def test_stage_params_are_kept() -> None:
+    pipeline = _pipeline({"name": "ocr", "topic": "ocr_extract", "params": {"lang": "deu"}})
+    assert pipeline.stages["ocr"].params == {"lang": "deu"}
+
+
+@pytest.mark.parametrize(
+    ("stages", "message"),
+    [
+        ([], "has no stages"),
+        ([{"name": "a", "topic": "t"}, {"name": "a", "topic": "t"}], "duplicate stage"),
+        ([{"name": "a", "topic": "t", "after": ["missing"]}], "depends on unknown"),
+        (
+            [{"name": "a", "topic": "t", "after": ["b"]}, {"name": "b", "topic": "t", "after": ["a"]}],
+            "dependency cycle",
+        ),
+    ],
+)
+def test_invalid_pipelines_are_rejected(stages: list[dict], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        _pipeline(*stages)
+
+
+def test_triggers_must_name_a_pipeline() -> None:
+    with pytest.raises(ValueError, match="unknown pipelines"):
+        PipelineCatalog.from_definitions({"pipelines": [], "triggers": {"document_uploaded": "missing"}})
+
+
+def test_shipped_definitions_load() -> None:
+    root = Path(__file__).resolve().parents[2]
+    definitions = json.loads((root / "services" / "worker-service" / "pipelines.json").read_text())
+    catalog = PipelineCatalog.from_definitions(definitions)
+    assert catalog.triggers == {"document_uploaded": "preprocess", "document_preprocessed": "ocr"}
+    # Every OCR stage writes the document's one ocr_text, so no pipeline may run two of them.
+    for pipeline in catalog.pipelines.values():
+        assert sum(stage.topic == "ocr_extract" for stage in pipeline.stages.values()) <= 1, pipeline.name
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from broker_service.queue.policy import DEFAULT_RETRY_POLICY, RetryPolicy
+
+
+def test_missing_fields_fall_back_to_defaults() -> None:
+    policy = RetryPolicy.from_definition({"name": "tests", "max_retries": 2})
+    assert policy == RetryPolicy(max_retries=2)
+    assert RetryPolicy.from_definition({}) == DEFAULT_RETRY_POLICY
+
+
+def test_definition_fields_map_onto_the_policy() -> None:
+    policy = RetryPolicy.from_definition(
+        {"retry_delay_seconds": 5, "retry_max_delay_seconds": 40, "retry_jitter": 0.5, "max_retries": 3}
+    )
+    assert policy == RetryPolicy(max_retries=3, base_delay_seconds=5, max_delay_seconds=40, jitter=0.5)
+
+
+def test_exhausted_after_max_retries_deliveries() -> None:
+    policy = RetryPolicy(max_retries=2)
+    assert not policy.exhausted(2)
+    assert policy.exhausted(3)
+
+
+def test_delay_doubles_up_to_the_cap_within_jitter() -> None:
+    policy = RetryPolicy(base_delay_seconds=10, max_delay_seconds=60, jitter=0.2)
+    for attempts, backoff in [(1, 10), (2, 20), (3, 40), (4, 60), (9, 60)]:
+        delay = policy.next_delay_seconds(attempts)
+        assert backoff * 0.8 <= delay <= backoff * 1.2
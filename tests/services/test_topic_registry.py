@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from broker_service.core.config import Settings
+from broker_service.queue.policy import DEFAULT_RETRY_POLICY
+from broker_service.queue.topics import TopicRegistry
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _write(path: Path, *topics: dict, mtime: int) -> None:
+    path.write_text(json.dumps({"topics": list(topics)}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_shipped_definitions_load() -> None:
+    registry = TopicRegistry(Settings(definitions_path=ROOT / "infrastructure" / "broker" / "definitions.json"))
+    registry.load()
+    assert set(registry.retry_policies) == set(registry.all())
+    assert registry.get("document_events").retry.max_delay_seconds == 600
+
+
+def test_unknown_topic_gets_the_default_policy(tmp_path: Path) -> None:
+    registry = TopicRegistry(Settings(definitions_path=tmp_path / "missing.json"))
+    registry.load()
+    policy = registry.get("anything")
+    assert policy.name == "anything"
+    assert policy.retry == DEFAULT_RETRY_POLICY
+
+
+def test_reload_only_when_the_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "definitions.json"
+    _write(path, {"name": "tests", "max_retries": 1}, mtime=1000)
+    registry = TopicRegistry(Settings(definitions_path=path))
+    registry.load()
+    assert not registry.reload_if_changed()
+
+    _write(path, {"name": "tests", "max_retries": 7, "priority": 3}, mtime=2000)
+    assert registry.reload_if_changed()
+    assert registry.get("tests").retry.max_retries == 7
+    assert registry.get("tests").priority == 3
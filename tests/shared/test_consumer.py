@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Optional
+
+from shared.utils.consumer import Consumer, ConsumerConfig
+
+CONFIG = ConsumerConfig(
+    topic="tests",
+    concurrency=3,
+    claim_wait_seconds=0.01,
+    idle_min_seconds=0.001,
+    idle_max_seconds=0.01,
+    drain_timeout_seconds=5.0,
+)
+
+
+class FakeBroker:
+    """Hands out queued jobs on claim and records what the consumer does with them."""
+
+    def __init__(self, jobs: list[dict[str, Any]]) -> None:
+        self.pending = list(jobs)
+        self.calls: list[tuple[str, Any]] = []
+        self.claims = 0
+        self.largest_claim = 0
+
+    async def claim_many(self, topic: str, max_items: int, *, wait_seconds: float = 0) -> list[dict[str, Any]]:
+        self.claims += 1
+        self.largest_claim = max(self.largest_claim, max_items)
+        claimed, self.pending = self.pending[:max_items], self.pending[max_items:]
+        if not claimed:
+            await asyncio.sleep(wait_seconds)
+        return claimed
+
+    async def ack(self, item_id: str) -> None:
+        self.calls.append(("ack", item_id))
+
+    async def fail(self, item_id: str, *, error: Optional[str] = None) -> None:
+        self.calls.append(("fail", item_id))
+
+    async def enqueue(self, topic: str, payload: dict[str, Any], *, priority: Optional[int] = None) -> None:
+        self.calls.append(("enqueue", (topic, payload)))
+
+    async def flush_acks(self) -> None:
+        return None
+
+    def acked(self) -> list[str]:
+        return [item for call, item in self.calls if call == "ack"]
+
+
+def _job(item_id: str, **payload: Any) -> dict[str, Any]:
+    return {"id": item_id, "payload": payload}
+
+
+async def _run_until(consumer: Consumer, done: asyncio.Event) -> None:
+    task = asyncio.create_task(consumer.run())
+    await asyncio.wait_for(done.wait(), timeout=5)
+    consumer.stop()
+    await asyncio.wait_for(task, timeout=5)
+
+
+def test_ordering_key_serializes_jobs_per_key_only() -> None:
+    jobs = [_job(f"{key}{index}", key=key) for index in range(3) for key in "ab"]
+    broker = FakeBroker(jobs)
+    running: dict[str, int] = {"a": 0, "b": 0}
+    finished: list[str] = []
+    overlap: list[int] = []
+    done = asyncio.Event()
+
+    async def handler(job: dict[str, Any]) -> None:
+        key = job["payload"]["key"]
+        running[key] += 1
+        assert running[key] == 1, f"two jobs of key {key} ran at once"
+        overlap.append(sum(running.values()))
+        await asyncio.sleep(0.01)
+        running[key] -= 1
+        finished.append(job["id"])
+        if len(finished) == len(jobs):
+            done.set()
+
+    consumer = Consumer(broker, handler, CONFIG, ordering_key=lambda job: job["payload"]["key"])
+    asyncio.run(_run_until(consumer, done))
+
+    assert [item for item in finished if item.startswith("a")] == ["a0", "a1", "a2"]
+    assert [item for item in finished if item.startswith("b")] == ["b0", "b1", "b2"]
+    assert max(overlap) == 2
+    assert sorted(broker.acked()) == sorted(job["id"] for job in jobs)
+
+
+def test_stop_drains_leased_jobs_and_claims_no_more() -> None:
+    broker = FakeBroker([_job(str(index)) for index in range(10)])
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(job: dict[str, Any]) -> None:
+        started.set()
+        await release.wait()
+
+    async def main() -> None:
+        consumer = Consumer(broker, handler, CONFIG)
+        task = asyncio.create_task(consumer.run())
+        await asyncio.wait_for(started.wait(), timeout=5)
+        consumer.stop()
+        await asyncio.sleep(0.05)
+        # Stopped, but still draining the jobs it holds.
+        assert not task.done()
+        release.set()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(main())
+    # The first claim leased `concurrency` jobs; those finished, the rest stayed with the broker.
+    assert sorted(broker.acked()) == ["0", "1", "2"]
+    assert len(broker.pending) == 7
+
+
+def test_claims_stay_within_the_broker_batch_limit() -> None:
+    broker = FakeBroker([_job(str(index)) for index in range(250)])
+    done = asyncio.Event()
+    handled: list[str] = []
+
+    async def handler(job: dict[str, Any]) -> None:
+        handled.append(job["id"])
+        if len(handled) == 250:
+            done.set()
+
+    config = ConsumerConfig(topic="tests", concurrency=150, prefetch=10, claim_wait_seconds=0.01, max_claim_batch=100)
+    asyncio.run(_run_until(Consumer(broker, handler, config), done))
+
+    assert broker.largest_claim == 100
+    assert len(broker.acked()) == 250
+
+
+def test_failed_job_is_failed_and_reply_is_sent_before_ack() -> None:
+    reply = {"event_type": "stage_completed"}
+    broker = FakeBroker([_job("bad", fail=True), _job("good", reply_to="events", reply=reply)])
+    done = asyncio.Event()
+    handled: list[str] = []
+
+    async def handler(job: dict[str, Any]) -> None:
+        handled.append(job["id"])
+        if len(handled) == 2:
+            done.set()
+        if job["payload"].get("fail"):
+            raise RuntimeError("broken page")
+
+    asyncio.run(_run_until(Consumer(broker, handler, CONFIG), done))
+
+    assert ("fail", "bad") in broker.calls
+    assert "bad" not in broker.acked()
+    assert broker.calls.index(("enqueue", ("events", reply))) < broker.calls.index(("ack", "good"))
+
+
+def test_zero_wait_empty_claims_back_off() -> None:
+    config = ConsumerConfig(topic="tests", claim_wait_seconds=0, idle_min_seconds=0.05, idle_max_seconds=0.05)
+    broker = FakeBroker([])
+
+    async def main() -> None:
+        consumer = Consumer(broker, lambda job: asyncio.sleep(0), config)
+        task = asyncio.create_task(consumer.run())
+        await asyncio.sleep(0.3)
+        consumer.stop()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(main())
+    # Each empty claim sleeps out the 50 ms backoff instead of polling again at once.
+    assert broker.claims <= 8
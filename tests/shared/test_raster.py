@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from shared.utils import raster
+
+
+def test_gray_page_round_trips_as_8_bit() -> None:
+    page = np.random.default_rng(0).integers(0, 256, (37, 53), dtype=np.uint8)
+    data = raster.encode(page)
+    assert raster.is_raster(data)
+    assert len(data) == raster.HEADER.size + page.size
+
+    image = raster.to_image(data)
+    assert image.mode == "L"
+    assert image.size == (53, 37)
+    assert np.array_equal(np.asarray(image), page)
+
+
+def test_two_tone_page_round_trips_as_1_bit() -> None:
+    # A width that is not a multiple of 8 exercises the per-row padding.
+    page = np.where(np.random.default_rng(1).random((21, 45)) > 0.5, 255, 0).astype(np.uint8)
+    data = raster.encode(page)
+    assert len(data) == raster.HEADER.size + 21 * 6
+
+    image = raster.to_image(data)
+    assert image.mode == "1"
+    assert image.size == (45, 21)
+    assert np.array_equal(np.asarray(image.convert("L")), page)
+
+
+def test_other_payloads_are_not_rasters() -> None:
+    assert not raster.is_raster(b"\x89PNG\r\n\x1a\n")
+    with pytest.raises(ValueError):
+        raster.to_image(b"\x89PNG\r\n\x1a\n" + bytes(16))